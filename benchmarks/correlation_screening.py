@@ -0,0 +1,78 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fpm_universe.kernels import correlated_pairs
+
+
+def make_values(
+    timeframes: int, instruments: int, clusters: int, seed: int
+) -> np.ndarray:
+    """
+    Make the returns of the instruments loading on the cluster factors with
+    random signs and noise levels, so the correlations spread over [-1, 1].
+    """
+    random_state = np.random.RandomState(seed)
+    factors = random_state.randn(timeframes, clusters)
+    membership = random_state.randint(0, clusters, instruments)
+    loadings = random_state.choice([-1.0, 1.0], instruments)
+    noise = random_state.uniform(0.1, 2.0, instruments)
+    return (
+        factors[:, membership] * loadings
+        + random_state.randn(timeframes, instruments) * noise
+    )
+
+
+def exact_pairs(values: np.ndarray, threshold: float) -> set:
+    """
+    Find the pairs above the threshold from the full correlation matrix of
+    `DataFrame.corr`, as the exact method of the pipeline.
+    """
+    correlations = pd.DataFrame(values).corr().to_numpy()
+    left, right = np.nonzero(np.triu(np.abs(correlations) > threshold, k=1))
+    return set(zip(left.tolist(), right.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the recall and the speed of the approximate "
+        "correlation screening against the exact method."
+    )
+    parser.add_argument("--timeframes", type=int, default=60)
+    parser.add_argument(
+        "--instruments", type=int, nargs="+", default=[2000, 5000, 10000]
+    )
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--threshold", type=float, nargs="+", default=[0.7, 0.9])
+    parser.add_argument("--recall", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("instruments threshold pairs exact_s approximate_s recall")
+    for instruments in args.instruments:
+        values = make_values(
+            args.timeframes, instruments, args.clusters, seed=args.seed
+        )
+        for threshold in args.threshold:
+            start = time.perf_counter()
+            expected = exact_pairs(values, threshold)
+            exact_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            left, right = correlated_pairs(
+                values, threshold=threshold, recall=args.recall, random_state=0
+            )
+            approximate_seconds = time.perf_counter() - start
+
+            found = set(zip(left.tolist(), right.tolist()))
+            recall = len(found & expected) / len(expected) if expected else 1.0
+            print(
+                f"{instruments} {threshold} {len(expected)} {exact_seconds:.2f} "
+                f"{approximate_seconds:.2f} {recall:.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
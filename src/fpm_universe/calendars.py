@@ -0,0 +1,340 @@
+import csv
+import hashlib
+import json
+from datetime import datetime, time
+from math import ceil
+from os.path import dirname, isabs
+from os.path import join as fsjoin
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+DEFAULT_WEEKMASK = "Mon Tue Wed Thu Fri"
+
+
+class SessionCalendar:
+    """
+    Session calendar.
+
+    The calendar defines the trading sessions of an exchange by the
+    weekdays, the holidays and the trading hours, so that the datetime
+    ranges contain only the trading timestamps instead of every timestamp
+    of a pandas frequency.
+    """
+
+    def __init__(
+        self,
+        weekmask: str = DEFAULT_WEEKMASK,
+        holidays: Optional[Iterable[Union[str, datetime, pd.Timestamp]]] = None,
+        open_time: Optional[Union[str, time]] = None,
+        close_time: Optional[Union[str, time]] = None,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        weekmask : str
+            The weekdays of the sessions, e.g. "Mon Tue Wed Thu Fri".
+        holidays : Optional[Iterable[Union[str, datetime, pd.Timestamp]]]
+            The dates without sessions.
+        open_time : Optional[Union[str, time]]
+            The open time of the sessions, e.g. "09:30". Default is None
+            which means the start of the day.
+        close_time : Optional[Union[str, time]]
+            The close time of the sessions, e.g. "16:00", in the same
+            timezone of the open time. Default is None which means the end
+            of the day.
+        """
+        self._weekmask = weekmask
+        self._holidays = pd.DatetimeIndex(
+            sorted(pd.Timestamp(holiday).normalize() for holiday in holidays or [])
+        )
+        self._open = SessionCalendar._to_timedelta(open_time, pd.Timedelta(0))
+        self._close = SessionCalendar._to_timedelta(close_time, pd.Timedelta(days=1))
+        if self._open >= self._close:
+            raise ValueError(
+                f"Open time {open_time} must be before close time {close_time}"
+            )
+        self._offset = pd.offsets.CustomBusinessDay(
+            weekmask=weekmask, holidays=self._holidays.to_pydatetime().tolist()
+        )
+
+    def __repr__(self) -> str:
+        # The holidays are represented by their digest to keep the
+        # representation short but distinct across calendars
+        holidays = hashlib.blake2b(
+            self._holidays.asi8.tobytes(), digest_size=8
+        ).hexdigest()
+        return (
+            f"SessionCalendar(weekmask={self._weekmask!r}, "
+            f"holidays={holidays}, open={self._open}, close={self._close})"
+        )
+
+    @property
+    def offset(self) -> pd.offsets.CustomBusinessDay:
+        """
+        Return the business day offset of the sessions.
+        """
+        return self._offset
+
+    @property
+    def holidays(self) -> pd.DatetimeIndex:
+        """
+        Return the holidays.
+        """
+        return self._holidays
+
+    @classmethod
+    def from_config(
+        cls, config: Dict[str, Any], directory: str = ""
+    ) -> "SessionCalendar":
+        """
+        Create the calendar from a configuration dictionary.
+
+        The holidays can be either a list of dates, or a path to a text or
+        csv file with a date in the first column of each line. A relative
+        path is resolved from the directory.
+
+        Parameters
+        ----------
+        config : Dict[str, Any]
+            The configuration with the keys `weekmask`, `holidays`,
+            `open_time` and `close_time`, all of which are optional.
+        directory : str
+            The directory to resolve the relative paths of the holidays.
+        """
+        holidays = config.get("holidays")
+        if isinstance(holidays, str):
+            path = holidays if isabs(holidays) else fsjoin(directory, holidays)
+            holidays = SessionCalendar._read_holidays(path)
+
+        return cls(
+            weekmask=config.get("weekmask", DEFAULT_WEEKMASK),
+            holidays=holidays,
+            open_time=config.get("open_time"),
+            close_time=config.get("close_time"),
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "SessionCalendar":
+        """
+        Load the calendar from a yaml or json file of the configuration.
+
+        See `from_config` for the configuration keys.
+
+        Parameters
+        ----------
+        path : str
+            The path of the calendar file.
+        """
+        with open(path) as fp:
+            if path.endswith(".json"):
+                config = json.load(fp)
+            else:
+                config = yaml.safe_load(fp)
+
+        return cls.from_config(config or {}, directory=dirname(path))
+
+    def sessions(
+        self,
+        start_datetime: Union[str, datetime, pd.Timestamp],
+        last_datetime: Union[str, datetime, pd.Timestamp],
+    ) -> pd.DatetimeIndex:
+        """
+        Return the session dates between the start and last datetimes.
+
+        Parameters
+        ----------
+        start_datetime : Union[str, datetime, pd.Timestamp]
+            The start datetime (inclusive).
+        last_datetime : Union[str, datetime, pd.Timestamp]
+            The last datetime (inclusive).
+        """
+        return pd.date_range(
+            start=pd.Timestamp(start_datetime).normalize(),
+            end=pd.Timestamp(last_datetime).normalize(),
+            freq=self._offset,
+        )
+
+    def datetime_range(
+        self,
+        start_datetime: Union[str, datetime, pd.Timestamp],
+        last_datetime: Union[str, datetime, pd.Timestamp],
+        frequency: str,
+        name: Optional[str] = None,
+    ) -> pd.DatetimeIndex:
+        """
+        Return the trading timestamps between the start and last datetimes.
+
+        For a daily frequency, e.g. "B" or "D", the timestamps are the
+        session dates with the frequency of the sessions. For an intraday
+        frequency, e.g. "5min", the timestamps are every frequency from the
+        open time to the close time (both inclusive) of each session, and
+        the range has no frequency.
+
+        Parameters
+        ----------
+        start_datetime : Union[str, datetime, pd.Timestamp]
+            The start datetime (inclusive).
+        last_datetime : Union[str, datetime, pd.Timestamp]
+            The last datetime (inclusive).
+        frequency : str
+            The daily or intraday frequency string supported in pandas.
+        name : Optional[str]
+            The name of the datetime range.
+        """
+        start_datetime = pd.Timestamp(start_datetime)
+        last_datetime = pd.Timestamp(last_datetime)
+        step = SessionCalendar._intraday_step(frequency)
+        sessions = self.sessions(start_datetime, last_datetime)
+        if step is None:
+            first = sessions.searchsorted(start_datetime)
+            sessions = sessions[first:]
+            sessions.name = name
+            return sessions
+
+        bar_offsets = self._bar_offsets(step)
+        timestamps = (sessions.values[:, None] + bar_offsets[None, :]).ravel()
+        result = pd.DatetimeIndex(timestamps, name=name)
+        return result[(result >= start_datetime) & (result <= last_datetime)]
+
+    def shift(
+        self, datetime_range: pd.DatetimeIndex, periods: int, frequency: str
+    ) -> pd.DatetimeIndex:
+        """
+        Shift the trading timestamps by a number of trading timeframes.
+
+        Parameters
+        ----------
+        datetime_range : pd.DatetimeIndex
+            The trading timestamps of the calendar.
+        periods : int
+            The number of timeframes to shift, which is negative to shift
+            backward.
+        frequency : str
+            The daily or intraday frequency string supported in pandas.
+        """
+        if len(datetime_range) == 0 or periods == 0:
+            return datetime_range
+
+        step = SessionCalendar._intraday_step(frequency)
+        bars = 1 if step is None else len(self._bar_offsets(step))
+        sessions = ceil(abs(periods) / bars) + 1
+        extended = self.datetime_range(
+            start_datetime=(
+                datetime_range[0] - sessions * self._offset
+                if periods < 0
+                else datetime_range[0]
+            ),
+            last_datetime=(
+                datetime_range[-1] + sessions * self._offset
+                if periods > 0
+                else datetime_range[-1]
+            ),
+            frequency=frequency,
+        )
+        positions = extended.get_indexer(datetime_range)
+        if (positions < 0).any():
+            raise ValueError("Datetime range to shift contains non-trading timestamps")
+        return pd.DatetimeIndex(extended[positions + periods], name=datetime_range.name)
+
+    def _bar_offsets(self, step: pd.Timedelta) -> np.ndarray:
+        """
+        Return the offsets of the intraday timestamps from the start of the
+        session dates, from the open time to the close time inclusively but
+        before the next day.
+        """
+        stop = min(self._close.value + 1, pd.Timedelta(days=1).value)
+        return np.arange(self._open.value, stop, step.value).astype("timedelta64[ns]")
+
+    @staticmethod
+    def _intraday_step(frequency: str) -> Optional[pd.Timedelta]:
+        """
+        Return the step of an intraday frequency, or None if the frequency
+        is daily.
+        """
+        offset = pd.tseries.frequencies.to_offset(frequency)
+        if isinstance(offset, pd.offsets.Tick) and offset < pd.offsets.Day():
+            return pd.Timedelta(offset)
+        if (
+            isinstance(
+                offset,
+                (pd.offsets.Day, pd.offsets.BusinessDay, pd.offsets.CustomBusinessDay),
+            )
+            and offset.n == 1
+        ):
+            return None
+        raise ValueError(
+            f"Frequency {frequency} is not supported by the session calendar, "
+            "which supports only daily and intraday frequencies"
+        )
+
+    @staticmethod
+    def _to_timedelta(
+        value: Optional[Union[str, time]], default: pd.Timedelta
+    ) -> pd.Timedelta:
+        """
+        Convert the time of day to the timedelta since the start of the day.
+        """
+        if value is None:
+            return default
+        if isinstance(value, time):
+            value = value.strftime("%H:%M:%S.%f")
+        elif len(str(value).split(":")) == 2:
+            value = f"{value}:00"
+        return pd.Timedelta(str(value))
+
+    @staticmethod
+    def _read_holidays(path: str) -> List[pd.Timestamp]:
+        """
+        Read the holidays from the first column of a text or csv file.
+        """
+        holidays = []
+        with open(path) as fp:
+            for row in csv.reader(fp):
+                if not row or row[0].lstrip().startswith("#"):
+                    continue
+                try:
+                    holidays.append(pd.Timestamp(row[0].strip()))
+                except ValueError:
+                    # Header of the csv file
+                    continue
+        return holidays
+
+
+class CalendarFrequency(str):
+    """
+    Calendar frequency.
+
+    The frequency string bound to a session calendar. It is passed to the
+    pipelines as the frequency, so that the datetime ranges created by
+    `make_datetime_range` contain only the trading timestamps of the
+    calendar. As a string, it is still accepted by the pipelines creating
+    the datetime ranges by pandas.
+    """
+
+    def __new__(cls, frequency: str, calendar: SessionCalendar):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        frequency : str
+            The daily or intraday frequency string supported in pandas.
+        calendar : SessionCalendar
+            The session calendar.
+        """
+        # Validate the frequency on construction
+        SessionCalendar._intraday_step(frequency)
+        instance = super().__new__(cls, frequency)
+        instance.calendar = calendar
+        return instance
+
+    def __repr__(self) -> str:
+        return f"CalendarFrequency({str(self)!r}, {self.calendar!r})"
+
+    def __reduce__(self):
+        return (CalendarFrequency, (str(self), self.calendar))
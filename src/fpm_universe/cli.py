@@ -1,11 +1,21 @@
 import logging
+import time
 from os import makedirs
+from os.path import basename, getsize
 from os.path import join as fsjoin
+from os.path import splitext
+from typing import Dict
 
 import click
 import pandas as pd
 
 from .config import Configuration, DataStore, PipelineExecutor
+from .dataset import PartitionedDataset
+from .events import EventLog
+from .mapping import LazyDataMapping
+from .metrics import MetricsRecorder
+from .reader import write_universe_index
+from .universe import IntervalUniverse, ValidityCombiner
 
 LOGGER = logging.getLogger(__name__)
 
@@ -18,7 +28,12 @@ LOGGER = logging.getLogger(__name__)
     multiple=True,
     help="Parameters to be formatted in the configuration.",
 )
-def main(config, parameter):
+@click.option(
+    "--metrics-file",
+    help="OpenMetrics textfile path to write the run performance metrics.",
+    default=None,
+)
+def main(config, parameter, metrics_file):
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s",
@@ -38,29 +53,65 @@ def main(config, parameter):
         parsed_parameters[key] = value
     LOGGER.info(f"Parsed parameters: {parsed_parameters}")
 
+    metrics = MetricsRecorder(
+        labels={
+            "config": splitext(basename(config))[0],
+            **{f"parameter_{key}": value for key, value in parsed_parameters.items()},
+        }
+    )
+    success = False
+    try:
+        with metrics.timer("run_duration_seconds", "Duration of the run"):
+            _run(config=config, parameters=parsed_parameters, metrics=metrics)
+        success = True
+    finally:
+        if metrics_file is not None:
+            metrics.set("run_success", success, "Whether the run succeeded")
+            metrics.set(
+                "run_timestamp_seconds", time.time(), "Unix time the run finished"
+            )
+            metrics.record_peak_memory()
+            metrics.write(metrics_file)
+
+
+def _run(config: str, parameters: Dict[str, str], metrics: MetricsRecorder) -> None:
+    """
+    Run the pipelines of the configuration and export the results.
+    """
     LOGGER.info("Loading configuration")
     with open(config) as fp:
-        config = Configuration(stream=fp.read(), parameters=parsed_parameters)
+        config = Configuration(stream=fp.read(), parameters=parameters)
 
     LOGGER.info("Loading data store")
-    data_store = DataStore(config=config)
+    data_store = DataStore(config=config, metrics=metrics)
 
     LOGGER.info("Loading pipeline executor")
     pipeline_executor = PipelineExecutor(config=config)
 
     LOGGER.info("Executing the pipelines")
-    pipeline_results = {}
-    final_result = None
+    combiner = ValidityCombiner()
     makedirs(config.intermediate_directory, exist_ok=True)
-    for name, result in pipeline_executor.execute_all(data_store=data_store):
-        if not isinstance(result, pd.DataFrame):
-            raise TypeError(f"Pipeline {name} does not return a DataFrame")
-        pipeline_results[name] = result
-        result.to_parquet(fsjoin(config.intermediate_directory, f"{name}.parquet"))
-        if final_result is None:
-            final_result = result
-        else:
-            final_result &= result
+    bytes_written = 0
+    results = pipeline_executor.execute_all(data_store=data_store)
+    for pipeline in config.pipelines:
+        # The duration includes loading the data first used by the pipeline
+        with metrics.timer(
+            "pipeline_duration_seconds",
+            "Duration of executing the pipeline",
+            pipeline=pipeline["name"],
+        ):
+            name, result = next(results)
+        if not isinstance(result, (pd.DataFrame, IntervalUniverse)):
+            raise TypeError(
+                f"Pipeline {name} does not return a DataFrame or IntervalUniverse"
+            )
+        metrics.record_value("pipeline", result, pipeline=name)
+        path = fsjoin(config.intermediate_directory, f"{name}.parquet")
+        result.to_parquet(path)
+        bytes_written += getsize(path)
+        combiner.add(result)
+    final_result = combiner.result
+    metrics.record_value("universe", final_result)
 
     LOGGER.info(
         f"Exporting the data to intermediate directory {config.intermediate_directory}"
@@ -70,9 +121,62 @@ def main(config, parameter):
             path = fsjoin(config.intermediate_directory, f"{obj.name}.parquet")
             LOGGER.info(f"Exporting data {obj.name} to {path}")
             obj.values.to_parquet(path)
+            bytes_written += getsize(path)
 
-    LOGGER.info(
-        f"Exporting the final pipeline results to output filename {config.output_filename}"
+    if config.output_filename is not None:
+        LOGGER.info(
+            f"Exporting the final pipeline results to output filename {config.output_filename}"
+        )
+        final_result.to_parquet(config.output_filename)
+        bytes_written += getsize(config.output_filename)
+
+    if config.output_dataset is not None:
+        LOGGER.info("Writing the final pipeline results to the output dataset")
+        PartitionedDataset.from_config(config.output_dataset).write(final_result)
+
+    if config.event_log_directory is not None:
+        LOGGER.info(
+            f"Appending the universe events to event log {config.event_log_directory}"
+        )
+        EventLog(config.event_log_directory).append(final_result)
+
+    if config.universe_index_directory is not None:
+        LOGGER.info(f"Writing the universe index to {config.universe_index_directory}")
+        write_universe_index(final_result, config.universe_index_directory)
+
+    _record_io(metrics, data_store=data_store, bytes_written=bytes_written)
+    metrics.record_cache(
+        "data_registry", data_store.registry.hits, data_store.registry.misses
+    )
+    metrics.record_cache(
+        "pipeline_registry",
+        pipeline_executor.registry.hits,
+        pipeline_executor.registry.misses,
     )
-    final_result.to_parquet(config.output_filename)
     LOGGER.info("Completed")
+
+
+def _record_io(
+    metrics: MetricsRecorder, data_store: DataStore, bytes_written: int
+) -> None:
+    """
+    Record the bytes read from the data files, the hits of the lazy data
+    mappings and the bytes written to the intermediate and output files.
+    """
+    bytes_read = hits = misses = 0
+    for _, obj in data_store.items():
+        try:
+            values = obj.values
+        except KeyError:
+            continue
+        if isinstance(values, LazyDataMapping):
+            bytes_read += values.bytes_read
+            hits += values.hits
+            misses += values.misses
+    metrics.set("bytes_read", bytes_read, "Bytes read from the data files")
+    metrics.set(
+        "bytes_written",
+        bytes_written,
+        "Bytes written to the intermediate and output files",
+    )
+    metrics.record_cache("data_files", hits, misses)
@@ -0,0 +1,78 @@
+import bz2
+import gzip
+import io
+import lzma
+from os.path import splitext
+from typing import IO, Optional
+
+import pyarrow as pa
+
+# Compression codecs keyed by the file extensions
+COMPRESSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+
+
+def file_compression(file_name: str) -> Optional[str]:
+    """
+    Return the compression codec of a file by its extension, or None if the
+    file is not compressed.
+
+    Parameters
+    ----------
+    file_name : str
+        The file name or path.
+    """
+    return COMPRESSIONS.get(splitext(file_name)[1].lower())
+
+
+def strip_compression(file_name: str) -> str:
+    """
+    Return the file name without the compression extension.
+
+    Parameters
+    ----------
+    file_name : str
+        The file name or path.
+    """
+    if file_compression(file_name) is None:
+        return file_name
+    return splitext(file_name)[0]
+
+
+def open_file(path: str, binary: bool = False) -> IO:
+    """
+    Open a file for reading, decompressing it as a stream if its extension
+    is a compression extension.
+
+    The gzip, bz2 and xz files are decompressed by the standard library and
+    the zstd files by pyarrow. The decompression is done while the stream is
+    read, so the compressed file is never inflated in full on disk or in
+    memory.
+
+    Parameters
+    ----------
+    path : str
+        The file path.
+    binary : bool
+        Indicates to open the file in binary mode instead of text mode.
+        Default is False.
+    """
+    compression = file_compression(path)
+    mode = "rb" if binary else "rt"
+    if compression is None:
+        return open(path, mode)
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "bz2":
+        return bz2.open(path, mode)
+    if compression == "xz":
+        return lzma.open(path, mode)
+
+    stream = pa.input_stream(path, compression=compression)
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream)
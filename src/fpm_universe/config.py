@@ -1,8 +1,23 @@
-import importlib
-from typing import Any, Callable, Dict, Optional
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
 
+import pandas as pd
 import yaml
 
+from .calendars import CalendarFrequency, SessionCalendar
+from .dtypes import DtypePolicy
+from .metrics import MetricsRecorder
+from .registry import (
+    DATA_ENTRY_POINT_GROUP,
+    PIPELINE_ENTRY_POINT_GROUP,
+    FunctionRegistry,
+)
+from .shared import SharedHandle, SharedMemoryStore
+from .universe import IntervalUniverse
+from .utils import make_datetime_range
+
+LOGGER = logging.getLogger(__name__)
+
 
 class DelayedDataObject:
     """
@@ -120,9 +135,13 @@ class Configuration:
         config = yaml.load(stream, Loader=yaml.Loader)
         config = Configuration._resolve_parameters(config, parameters)
         self._config = config
-        self.output_filename = Configuration._get_config(
-            self._config, "output_filename"
-        )
+        self.output_dataset = self._config.get("output_dataset")
+        if self.output_dataset is None:
+            self.output_filename = Configuration._get_config(
+                self._config, "output_filename"
+            )
+        else:
+            self.output_filename = self._config.get("output_filename")
         self.intermediate_directory = Configuration._get_config(
             self._config, "intermediate_directory"
         )
@@ -131,6 +150,14 @@ class Configuration:
         self.frequency = Configuration._get_config(self._config, "frequency")
         self.pipelines = Configuration._get_config(self._config, "pipeline")
         self.datas = Configuration._get_config(self._config, "data")
+        self.chunk_timeframes = self._config.get("chunk_timeframes")
+        self.calendar = Configuration._load_calendar(self._config.get("calendar"))
+        self.dtype_policy = DtypePolicy.from_config(self._config.get("dtype_policy"))
+        self.backend = self._config.get("backend", "pandas")
+        self.event_log_directory = self._config.get("event_log_directory")
+        self.universe_index_directory = self._config.get("universe_index_directory")
+        if self.calendar is not None:
+            self.frequency = CalendarFrequency(self.frequency, self.calendar)
 
     @classmethod
     def _resolve_parameters(
@@ -174,6 +201,25 @@ class Configuration:
 
         return items
 
+    @classmethod
+    def _load_calendar(
+        cls, calendar: Optional[Union[str, Dict[str, Any]]]
+    ) -> Optional[SessionCalendar]:
+        """
+        Load the session calendar.
+
+        Parameters
+        ----------
+        calendar : Optional[Union[str, Dict[str, Any]]]
+            Either the path of the calendar file, or the calendar
+            configuration. Default is None which means no calendar.
+        """
+        if not calendar:
+            return None
+        if isinstance(calendar, str):
+            return SessionCalendar.from_file(calendar)
+        return SessionCalendar.from_config(calendar)
+
     @classmethod
     def _get_config(cls, config: Dict[str, Any], key: str) -> Any:
         """
@@ -195,28 +241,93 @@ class Configuration:
             )
 
 
+def _refers_to(parameter: Any, name: str) -> bool:
+    """
+    Return whether the parameter refers to the data object of the name.
+    """
+    if isinstance(parameter, DelayedDataObject):
+        return parameter.name == name
+    if isinstance(parameter, dict):
+        return any(_refers_to(value, name) for value in parameter.values())
+    if isinstance(parameter, list):
+        return any(_refers_to(value, name) for value in parameter)
+    return False
+
+
+def _verifies_dtypes(config: Configuration) -> bool:
+    """
+    Return whether any pipeline verifies its result under the dtype policy.
+    """
+    for pipeline in config.pipelines:
+        dtype_policy = DtypePolicy.from_config(
+            pipeline.get("dtype_policy"), base=config.dtype_policy
+        )
+        if dtype_policy is not None and dtype_policy.max_mismatch is not None:
+            return True
+    return False
+
+
 class DataStore:
     """
     DataStore.
     """
 
+    # Data functions consuming only the specified columns of the dataframes
+    # in the parameter `data`, and the parameter names of the columns
+    _COLUMN_CONSUMERS = {
+        "concat": "column",
+        "concat_columns": "columns",
+    }
+
     def __init__(
         self,
         config: Configuration,
         custom_functions: Optional[Dict[str, Callable]] = None,
+        backend: Optional[SharedMemoryStore] = None,
+        metrics: Optional[MetricsRecorder] = None,
     ):
         """
         Parameters:
         -----------
         config: Configuration
             Configuration object.
+        custom_functions: Optional[Dict[str, Callable]]
+            Custom functions of data.
+        backend: Optional[SharedMemoryStore]
+            Shared memory store of the dataframe and array values, which
+            are then read-only and passed to the worker processes by their
+            handles. Default is None which means keeping the values in the
+            process memory.
+        metrics: Optional[MetricsRecorder]
+            Recorder of the duration and the size of each data. Default is
+            None which means no metrics.
         """
         self._config_datas = config.datas
+        self._config_pipelines = config.pipelines
+        self._dtype_policy = config.dtype_policy
+        # The data in their original dtypes are kept only if a pipeline
+        # verifies its result against them
+        self._originals = {} if _verifies_dtypes(config) else None
         self._data_store = {
             name: DelayedDataObject(name=f"{id(self)}-{name}")
             for name in config.datas.keys()
         }
         self._custom_functions = custom_functions
+        self._backend = backend
+        self._metrics = metrics
+        self._handles = {}
+        self._registry = FunctionRegistry(
+            module="fpm_universe.data",
+            entry_point_group=DATA_ENTRY_POINT_GROUP,
+            custom_functions=custom_functions,
+        )
+
+    @property
+    def registry(self) -> FunctionRegistry:
+        """
+        Return the registry of the data functions.
+        """
+        return self._registry
 
     def items(self):
         """
@@ -291,12 +402,145 @@ class DataStore:
 
                 parameters[param_name] = parameter_values
 
-            values = self._run_function(
-                function_name=function_name, parameters=parameters
+            if function_name == "load_all_data" and "columns" not in parameters:
+                columns = self._infer_columns(name=name)
+                if columns is not None:
+                    parameters["columns"] = columns
+
+            if self._metrics is None:
+                values = self._run_function(
+                    function_name=function_name, parameters=parameters
+                )
+            else:
+                # The duration excludes the data of the parameters, which are
+                # loaded above and recorded by themselves
+                with self._metrics.timer(
+                    "data_duration_seconds",
+                    "Duration of loading the data",
+                    data=name,
+                ):
+                    values = self._run_function(
+                        function_name=function_name, parameters=parameters
+                    )
+                self._metrics.record_value("data", values, data=name)
+            dtype_policy = DtypePolicy.from_config(
+                data_config.get("dtype_policy"), base=self._dtype_policy
             )
+            if dtype_policy is not None:
+                converted = dtype_policy.apply(values)
+                if self._originals is not None and converted is not values:
+                    self._originals[name] = values
+                values = converted
+            if self._backend is not None:
+                values = self._share(name=name, values=values)
             self.update_values(name, values)
             return values
 
+    def get_original(self, name: str) -> Any:
+        """
+        Get a data object in its dtypes before the dtype policy, which are
+        kept only if a pipeline verifies its result under the policy.
+
+        Parameters
+        ----------
+        name: string
+            Name of the data object.
+        """
+        values = self.get(name)
+        if self._originals is None:
+            return values
+        return self._originals.get(name, values)
+
+    def handle(self, name: str) -> Optional[SharedHandle]:
+        """
+        Return the shared memory handle of a data object with a reference
+        for the caller, which must release it by `release_handle`.
+
+        Parameters
+        ----------
+        name: string
+            Name of the data object.
+
+        Returns
+        -------
+        Optional[SharedHandle]
+            The handle, or None if the values are not in shared memory.
+        """
+        self.get(name)
+        handle = self._handles.get(name)
+        if handle is None:
+            return None
+        return self._backend.acquire(handle)
+
+    def release_handle(self, handle: SharedHandle) -> None:
+        """
+        Release the reference of a handle returned by `handle`.
+
+        Parameters
+        ----------
+        handle: SharedHandle
+            The handle of the data object.
+        """
+        self._backend.release(handle)
+
+    def _share(self, name: str, values: Any) -> Any:
+        """
+        Move the values into the shared memory, and return the read-only
+        values attached from it.
+        """
+        handle = self._backend.put(values)
+        if handle is None:
+            return values
+
+        previous_handle = self._handles.pop(name, None)
+        if previous_handle is not None:
+            self._backend.release(previous_handle)
+        self._handles[name] = handle
+        return handle.attach()
+
+    def _infer_columns(self, name: str) -> Optional[List[str]]:
+        """
+        Infer the columns of the data object required by its consumers.
+
+        The columns are inferred only if all the consumers are data
+        functions consuming specified columns, e.g. `concat`, and refer to
+        the data object in their parameter `data`.
+
+        Parameters
+        ----------
+        name: string
+            Name of the data object.
+
+        Returns
+        -------
+        Optional[List[str]]
+            The required columns, or None if they cannot be inferred.
+        """
+        columns = []
+        for data_config in self._config_datas.values():
+            parameters = data_config.get("parameters", {})
+            for param_name, parameter in parameters.items():
+                if not _refers_to(parameter, name):
+                    continue
+                column_param_name = self._COLUMN_CONSUMERS.get(data_config["function"])
+                if (
+                    column_param_name is None
+                    or param_name != "data"
+                    or not isinstance(parameter, DelayedDataObject)
+                    or column_param_name not in parameters
+                ):
+                    return None
+                consumed_columns = parameters[column_param_name]
+                if isinstance(consumed_columns, str):
+                    consumed_columns = [consumed_columns]
+                columns.extend(consumed_columns)
+
+        for pipeline in self._config_pipelines:
+            if _refers_to(pipeline.get("parameters", {}), name):
+                return None
+
+        return list(dict.fromkeys(columns)) or None
+
     def _run_function(self, function_name: str, parameters: Dict[str, Any]) -> Any:
         """
         Run a function.
@@ -308,28 +552,17 @@ class DataStore:
         parameters: Dict[str, Any]
             Parameters to run the function with.
         """
-        data_module = importlib.import_module("fpm_universe.data")
-        try:
-            function = getattr(data_module, function_name)
-        except AttributeError:
-            try:
-                function = self._custom_functions[function_name]
-            except KeyError:
-                raise ValueError(
-                    f"Callable name {function_name} cannot be found "
-                    "neither in the data module nor the customized functions"
-                )
-
-        if function is None:
-            raise RuntimeError(
-                "Failed to catch the exception to locate the "
-                f"function {function_name}"
-            )
-
-        return function(**parameters)
+        return self._registry.call(function_name, parameters)
 
 
 class PipelineExecutor:
+    # Modules of the built-in pipeline functions of the backends, searched in
+    # order so that the functions missing in a backend fall back to pandas
+    _BACKEND_MODULES = {
+        "pandas": ("fpm_universe.pipeline",),
+        "polars": ("fpm_universe.polars_pipeline", "fpm_universe.pipeline"),
+    }
+
     def __init__(
         self,
         config: Configuration,
@@ -345,6 +578,45 @@ class PipelineExecutor:
         """
         self._config = config
         self._custom_functions = custom_functions
+        self._registry = PipelineExecutor.create_registry(
+            custom_functions=custom_functions, backend=config.backend
+        )
+
+    @property
+    def registry(self) -> FunctionRegistry:
+        """
+        Return the registry of the pipeline functions.
+        """
+        return self._registry
+
+    @staticmethod
+    def create_registry(
+        custom_functions: Optional[Dict[str, Callable]] = None,
+        backend: str = "pandas",
+    ) -> FunctionRegistry:
+        """
+        Create the registry of the pipeline functions.
+
+        Parameters
+        ----------
+        custom_functions: Optional[Dict[str, Callable]]
+            Custom functions of pipelines.
+        backend: str
+            Backend of the built-in pipeline functions, either "pandas" or
+            "polars". Default is "pandas".
+        """
+        try:
+            modules = PipelineExecutor._BACKEND_MODULES[backend]
+        except KeyError:
+            raise ValueError(
+                f"Backend {backend} is not supported. Supported backends are "
+                f"{list(PipelineExecutor._BACKEND_MODULES)}"
+            )
+        return FunctionRegistry(
+            module=modules,
+            entry_point_group=PIPELINE_ENTRY_POINT_GROUP,
+            custom_functions=custom_functions,
+        )
 
     @staticmethod
     def execute(
@@ -352,6 +624,7 @@ class PipelineExecutor:
         config: Configuration,
         pipeline: Dict[str, Any],
         custom_functions: Optional[Dict[str, Callable]] = None,
+        registry: Optional[FunctionRegistry] = None,
     ) -> Any:
         """
         Execute a single pipeline.
@@ -366,38 +639,171 @@ class PipelineExecutor:
             Pipeline configuration.
         custom_functions: Optional[Dict[str, Callable]]
             Custom functions of pipelines.
+        registry: Optional[FunctionRegistry]
+            Registry of the pipeline functions, which memoizes the results
+            of the memoized functions across the pipelines. Default is None
+            which means creating a registry of the custom functions.
         """
         name = pipeline["name"]
         function_name = pipeline["function"]
         parameters = pipeline.get("parameters", {})
+        dtype_policy = DtypePolicy.from_config(
+            pipeline.get("dtype_policy"), base=config.dtype_policy
+        )
+        verify = dtype_policy is not None and dtype_policy.max_mismatch is not None
+        original_parameters = dict(parameters)
         for param_name, param in parameters.copy().items():
             if not isinstance(param, DelayedDataObject):
                 continue
             parameters[param_name] = data_store.get(param.name)
-        data_module = importlib.import_module("fpm_universe.pipeline")
-        try:
-            function = getattr(data_module, function_name)
-        except AttributeError:
-            try:
-                function = custom_functions[function_name]
-            except KeyError:
-                raise ValueError(
-                    f"Callable name {function_name} cannot be found "
-                    "neither in the pipeline module nor the customized functions"
-                )
+            if verify:
+                original_parameters[param_name] = data_store.get_original(param.name)
+        if registry is None:
+            registry = PipelineExecutor.create_registry(
+                custom_functions=custom_functions, backend=config.backend
+            )
 
-        if function is None:
-            raise RuntimeError(
-                "Failed to catch the exception to locate the "
-                f"function {function_name}"
+        chunk_timeframes = pipeline.get("chunk_timeframes", config.chunk_timeframes)
+        result = PipelineExecutor._call(
+            registry=registry,
+            function_name=function_name,
+            config=config,
+            parameters=parameters,
+            chunk_timeframes=chunk_timeframes,
+        )
+        if verify and any(
+            original_parameters[param_name] is not parameters[param_name]
+            for param_name in parameters
+        ):
+            # The pipeline is executed on the original data too, since the
+            # tolerance of the downcast data does not cover its result
+            dtype_policy.mismatch(
+                expected=PipelineExecutor._call(
+                    registry=registry,
+                    function_name=function_name,
+                    config=config,
+                    parameters=original_parameters,
+                    chunk_timeframes=chunk_timeframes,
+                ),
+                result=result,
+                name=name,
             )
 
-        return name, function(
+        if dtype_policy is not None:
+            result = dtype_policy.apply_validity(result)
+        return name, result
+
+    @staticmethod
+    def _call(
+        registry: FunctionRegistry,
+        function_name: str,
+        config: Configuration,
+        parameters: Dict[str, Any],
+        chunk_timeframes: Optional[int],
+    ) -> Any:
+        """
+        Call a pipeline function on the datetime range of the configuration,
+        in chunks if the function declares its lookback.
+        """
+        if chunk_timeframes and registry.get(function_name).lookback is not None:
+            return PipelineExecutor._execute_chunks(
+                registry=registry,
+                function_name=function_name,
+                config=config,
+                parameters=parameters,
+                chunk_timeframes=chunk_timeframes,
+            )
+        return registry.call(
+            function_name,
+            {
+                "start_datetime": config.start_datetime,
+                "last_datetime": config.last_datetime,
+                "frequency": config.frequency,
+                **parameters,
+            },
+        )
+
+    @staticmethod
+    def _execute_chunks(
+        registry: FunctionRegistry,
+        function_name: str,
+        config: Configuration,
+        parameters: Dict[str, Any],
+        chunk_timeframes: int,
+    ) -> Any:
+        """
+        Execute a pipeline in chunks of the datetime range.
+
+        Each chunk is executed from the lookback timeframes before the
+        chunk, but not before the start datetime, and the result is trimmed
+        to the chunk. As the function declaring its lookback slices its
+        inputs to the executed range, the memory is bounded by the chunk
+        size and the concatenated results are the same as the result of the
+        whole range.
+
+        Parameters
+        ----------
+        registry: FunctionRegistry
+            Registry of the pipeline functions.
+        function_name: str
+            Name of the pipeline function.
+        config: Configuration
+            Configuration object.
+        parameters: Dict[str, Any]
+            Parameters of the pipeline.
+        chunk_timeframes: int
+            Number of timeframes in each chunk.
+        """
+        if chunk_timeframes <= 0:
+            raise ValueError(f"Chunk timeframes {chunk_timeframes} must be positive")
+
+        datetime_range = make_datetime_range(
             start_datetime=config.start_datetime,
             last_datetime=config.last_datetime,
             frequency=config.frequency,
-            **parameters,
         )
+        arguments = {
+            "start_datetime": config.start_datetime,
+            "last_datetime": config.last_datetime,
+            "frequency": config.frequency,
+            **parameters,
+        }
+        spec = registry.get(function_name)
+        lookback = spec.lookback_periods(**arguments)
+
+        results = []
+        for start in range(0, len(datetime_range), chunk_timeframes):
+            stop = min(start + chunk_timeframes, len(datetime_range))
+            first_datetime = datetime_range[start]
+            last_datetime = datetime_range[stop - 1]
+            LOGGER.info(
+                f"Executing pipeline function {function_name} from "
+                f"{first_datetime} to {last_datetime}"
+            )
+            # The chunks bypass the memoization of the registry, which would
+            # fingerprint the whole inputs on each chunk and keep the chunk
+            # results alive
+            result = spec.function(
+                **{
+                    **arguments,
+                    "start_datetime": datetime_range[max(start - lookback, 0)],
+                    "last_datetime": last_datetime,
+                }
+            )
+            if isinstance(result, IntervalUniverse):
+                result = result.slice(first_datetime, last_datetime)
+            elif isinstance(result, (pd.DataFrame, pd.Series)):
+                result = result.loc[first_datetime:last_datetime]
+            else:
+                raise TypeError(
+                    f"Chunked results of pipeline function {function_name} must "
+                    "be either dataframes or interval universes"
+                )
+            results.append(result)
+
+        if all(isinstance(result, IntervalUniverse) for result in results):
+            return IntervalUniverse.concat(results)
+        return pd.concat(results)
 
     def execute_all(self, data_store: DataStore) -> Dict[str, Any]:
         """
@@ -420,4 +826,5 @@ class PipelineExecutor:
                 pipeline=pipeline,
                 data_store=data_store,
                 custom_functions=self._custom_functions,
+                registry=self._registry,
             )
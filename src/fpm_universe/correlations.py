@@ -0,0 +1,224 @@
+import logging
+from os import makedirs
+from os.path import exists
+from os.path import join as fsjoin
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import atomic_path, fingerprint, read_versioned_json, write_json
+
+LOGGER = logging.getLogger(__name__)
+
+CORRELATION_CACHE_VERSION = 1
+
+# Name of the metadata file in each entry of the cache
+_METADATA_FILE_NAME = "metadata.json"
+
+# Name of the memory mapped array of the upper triangles of the correlations
+_TRIANGLES_FILE_NAME = "triangles.npy"
+
+
+class CorrelationEntry:
+    """
+    Correlation entry.
+
+    The correlation matrices of the instruments on the datetimes, kept as
+    their upper triangles, excluding the diagonals, in float32. The
+    triangles are memory mapped, so only the triangles of the datetimes
+    looked up are read.
+    """
+
+    def __init__(
+        self, datetimes: pd.DatetimeIndex, columns: List[str], triangles: np.ndarray
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        datetimes : pd.DatetimeIndex
+            The datetimes of the correlation matrices.
+        columns : List[str]
+            The instruments of the correlation matrices.
+        triangles : np.ndarray
+            The upper triangles of the correlation matrices in the row major
+            order, in the shape of the number of datetimes and the number of
+            pairs.
+        """
+        self.datetimes = datetimes
+        self.columns = columns
+        self.triangles = triangles
+
+    def pairs(self, datetime: Any, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the pairs of the instruments whose absolute correlations are
+        above the threshold on the datetime.
+
+        Parameters
+        ----------
+        datetime : Any
+            The datetime of the correlation matrix.
+        threshold : float
+            The threshold of the absolute correlation.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The columns of the first and second instruments of the pairs,
+            where the first column is smaller than the second one.
+        """
+        triangle = self.triangles[self.datetimes.get_loc(datetime)]
+        # The threshold is compared in float64 instead of being rounded to
+        # float32
+        positions = np.flatnonzero(np.abs(triangle.astype(np.float64)) > threshold)
+        return _triangle_pairs(len(self.columns), positions)
+
+
+class CorrelationCache:
+    """
+    Correlation cache.
+
+    The cache persists the rolling correlation matrices, keyed by the
+    fingerprint of the values, the datetimes and the rolling window, so the
+    runs changing only the threshold or the rankings screen the cached
+    correlations instead of recomputing them. Each entry is written into a
+    temporary directory and renamed once it is complete, so the concurrent
+    runs never read a partial entry.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the cache, which is created if it does not
+            exist.
+        """
+        self._directory = directory
+        makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(
+        values: pd.DataFrame, datetime_range: pd.DatetimeIndex, rolling_window: int
+    ) -> str:
+        """
+        Return the key of the correlations of the values.
+
+        Parameters
+        ----------
+        values : pd.DataFrame
+            The values of the correlations.
+        datetime_range : pd.DatetimeIndex
+            The datetimes of the correlation matrices.
+        rolling_window : int
+            The number of rolling timeframes.
+        """
+        return fingerprint((values, datetime_range, rolling_window))
+
+    def get(self, key: str) -> Optional[CorrelationEntry]:
+        """
+        Return the cached correlations of the key, or None if they are not
+        cached.
+
+        Parameters
+        ----------
+        key : str
+            The key of the correlations.
+        """
+        path = fsjoin(self._directory, key)
+        if not exists(fsjoin(path, _METADATA_FILE_NAME)):
+            return None
+
+        try:
+            metadata = read_versioned_json(
+                fsjoin(path, _METADATA_FILE_NAME),
+                version=CORRELATION_CACHE_VERSION,
+                description="Correlation cache",
+            )
+        except ValueError as e:
+            LOGGER.info(f"Ignoring the correlation cache {key}: {e}")
+            return None
+        return CorrelationEntry(
+            datetimes=pd.DatetimeIndex(metadata["datetimes"]),
+            columns=metadata["columns"],
+            triangles=np.load(fsjoin(path, _TRIANGLES_FILE_NAME), mmap_mode="r"),
+        )
+
+    def put(
+        self,
+        key: str,
+        datetimes: pd.DatetimeIndex,
+        columns: Iterable[str],
+        correlations: Callable[[int], np.ndarray],
+    ) -> CorrelationEntry:
+        """
+        Write the correlations of the key into the cache.
+
+        The correlation matrices are written one by one into the memory
+        mapped array, so only a single matrix is in memory at once.
+
+        Parameters
+        ----------
+        key : str
+            The key of the correlations.
+        datetimes : pd.DatetimeIndex
+            The datetimes of the correlation matrices.
+        columns : Iterable[str]
+            The instruments of the correlation matrices.
+        correlations : Callable[[int], np.ndarray]
+            The function returning the correlation matrix of the position of
+            the datetime.
+
+        Returns
+        -------
+        CorrelationEntry
+            The cached correlations.
+        """
+        columns = [str(column) for column in columns]
+        path = fsjoin(self._directory, key)
+        upper = np.triu_indices(len(columns), k=1)
+        try:
+            with atomic_path(path) as temporary_path:
+                makedirs(temporary_path)
+                triangles = np.lib.format.open_memmap(
+                    fsjoin(temporary_path, _TRIANGLES_FILE_NAME),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(len(datetimes), len(upper[0])),
+                )
+                for i in range(len(datetimes)):
+                    triangles[i] = correlations(i)[upper]
+                triangles.flush()
+                del triangles
+
+                write_json(
+                    fsjoin(temporary_path, _METADATA_FILE_NAME),
+                    {
+                        "version": CORRELATION_CACHE_VERSION,
+                        "datetimes": [datetime.isoformat() for datetime in datetimes],
+                        "columns": columns,
+                    },
+                )
+        except OSError:
+            # Another run has written the same entry
+            if not exists(fsjoin(path, _METADATA_FILE_NAME)):
+                raise
+
+        LOGGER.info(f"Cached the correlations of {len(datetimes)} datetimes in {path}")
+        return self.get(key)
+
+
+def _triangle_pairs(size: int, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the rows and columns of the positions in the upper triangle,
+    excluding the diagonal, of a square matrix in the row major order.
+    """
+    # Position of the first pair of each row
+    starts = np.arange(size) * (2 * size - np.arange(size) - 1) // 2
+    rows = np.searchsorted(starts, positions, side="right") - 1
+    columns = positions - starts[rows] + rows + 1
+    return rows, columns
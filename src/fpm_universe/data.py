@@ -1,4 +1,5 @@
 import csv
+import io
 import json
 from enum import Enum
 from functools import partial
@@ -6,10 +7,20 @@ from os import listdir
 from os.path import basename
 from os.path import join as fsjoin
 from os.path import splitext
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import jq
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from pyarrow import feather as pa_feather
+from pyarrow import parquet as pa_parquet
+
+from .compression import file_compression, open_file, strip_compression
+from .manifest import MANIFEST_FILE_NAME, DirectoryManifest, file_symbol
+from .mapping import LazyDataMapping
+from .registry import declare
 
 
 class FileFormat(str, Enum):
@@ -19,6 +30,19 @@ class FileFormat(str, Enum):
 
     json = "json"
     csv = "csv"
+    parquet = "parquet"
+    feather = "feather"
+    arrow = "arrow"
+    npy = "npy"
+
+
+# File formats read by memory mapping instead of parsing text
+_BINARY_FORMATS = (
+    FileFormat.parquet,
+    FileFormat.feather,
+    FileFormat.arrow,
+    FileFormat.npy,
+)
 
 
 class ReturnFormat(str, Enum):
@@ -41,64 +65,377 @@ class ReturnFormat(str, Enum):
         return super().__eq__(__x)
 
 
+class CsvEngine(str, Enum):
+    """
+    Supported csv parsing engines.
+    """
+
+    pandas = "pandas"
+    pyarrow = "pyarrow"
+
+
+@declare(io_bound=True)
 def load_all_data(
     directory: str,
     from_format: FileFormat,
     to_format: ReturnFormat,
     includes: Optional[List] = None,
-):
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+    engine: Optional[CsvEngine] = None,
+    manifest: Union[bool, str] = False,
+    lazy: bool = False,
+    cache_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Union[Dict[str, Any], LazyDataMapping]:
     """
     Load all data from a directory.
-    """
-    file_names = listdir(directory)
 
-    if includes:
-        file_names = [
-            name for name in file_names if basename(splitext(name)[0]) in includes
-        ]
-
-    if ReturnFormat.dict == to_format:
+    Parameters
+    ----------
+    directory: str
+        The directory of the files. The files compressed in gzip, bz2, xz
+        or zstd, e.g. `AAPL.csv.gz`, are decompressed as streams by their
+        extensions and keyed by their symbols, e.g. `AAPL`. The files of
+        the other file formats are skipped, and an error is raised if
+        several files have the same symbol.
+    from_format: FileFormat
+        The file format.
+    to_format: ReturnFormat
+        The return format of each file. The dataframe return format can
+        be a dictionary of the parameters passed to the pandas reader. For
+        the binary formats, only the parameter `index_col` is supported,
+        and the default return format returns the memory mapped pyarrow
+        table, or numpy array for the npy format.
+    includes: Optional[List]
+        The file names, without extensions, to load. Default is None
+        which means loading all the files.
+    columns: Optional[List[str]]
+        The columns to load, in addition to the index column. Only
+        applicable to the dataframe return format. Default is None which
+        means loading all the columns.
+    dtypes: Optional[Dict[str, str]]
+        The dtypes of the columns. Only applicable to the dataframe return
+        format. Default is None which means inferring the dtypes.
+    engine: Optional[CsvEngine]
+        The engine to parse csv files into dataframes. The pyarrow engine
+        parses the files in multiple threads, and supports only the
+        `index_col` and `parse_dates` reader parameters. Default is None
+        which means the pandas engine.
+    manifest: Union[bool, str]
+        Indicates to look up the files by the manifest of the directory,
+        which is generated and refreshed automatically, instead of listing
+        the directory. The manifest file name can be passed instead of
+        True. Default is False.
+    lazy: bool
+        Indicates to return a lazy mapping, which parses each file on the
+        first access, instead of a dictionary. Default is False.
+    cache_size: Optional[int]
+        The maximum number of parsed files cached in the lazy mapping.
+        Default is None which means caching all the parsed files.
+    max_workers: Optional[int]
+        The number of threads to parse the files, or to prefetch the files
+        in the lazy mapping. Default is None which means parsing the files
+        sequentially.
+    """
+    directory_manifest = None
+    if manifest:
+        directory_manifest = DirectoryManifest(
+            directory=directory,
+            file_name=manifest if isinstance(manifest, str) else MANIFEST_FILE_NAME,
+        )
+        file_names = directory_manifest.file_names(includes=includes or None)
+    else:
+        file_names = [name for name in listdir(directory) if name != MANIFEST_FILE_NAME]
+        if includes:
+            includes = set(includes)
+            file_names = [name for name in file_names if file_symbol(name) in includes]
+
+    if from_format in _BINARY_FORMATS:
+        reader = partial(
+            _read_binary,
+            file_format=FileFormat(from_format),
+            to_format=to_format,
+            columns=columns,
+            dtypes=dtypes,
+        )
+    elif ReturnFormat.dict == to_format:
         if from_format == FileFormat.json:
-            reader = json.load
+            reader = partial(_read_file, reader=json.load)
         elif from_format == FileFormat.csv:
-            reader = csv.DictReader
+            reader = partial(_read_file, reader=csv.DictReader)
         else:
             raise ValueError(f"Unknown file format: {from_format}")
     elif ReturnFormat.dataframe == to_format:
+        options = (
+            {}
+            if not isinstance(to_format, dict)
+            else dict(to_format[ReturnFormat.dataframe.value])
+        )
         if from_format == FileFormat.json:
             reader = partial(
-                pd.read_json,
-                **(
-                    {}
-                    if not isinstance(to_format, dict)
-                    else to_format[ReturnFormat.dataframe.value]
-                ),
+                _read_file,
+                reader=partial(_read_json, columns=columns, dtypes=dtypes, **options),
             )
+        elif from_format == FileFormat.csv and engine == CsvEngine.pyarrow:
+            reader = partial(_read_csv_arrow, columns=columns, dtypes=dtypes, **options)
+        elif from_format == FileFormat.csv and engine in (None, CsvEngine.pandas):
+            if dtypes is not None:
+                options["dtype"] = dtypes
+            reader = partial(_read_csv_pandas, columns=columns, **options)
         elif from_format == FileFormat.csv:
-            reader = partial(
-                pd.read_csv,
-                **(
-                    {}
-                    if not isinstance(to_format, dict)
-                    else to_format[ReturnFormat.dataframe.value]
-                ),
-            )
+            raise ValueError(f"Unknown csv engine: {engine}")
         else:
             raise ValueError(f"Unknown file format: {from_format}")
     else:
         raise ValueError(f"Unknown return format: {to_format}")
 
-    result = {}
+    result = LazyDataMapping(
+        paths=_symbol_paths(
+            directory=directory, file_names=file_names, file_format=from_format
+        ),
+        reader=reader,
+        cache_size=cache_size,
+        max_workers=max_workers,
+        manifest=directory_manifest,
+    )
+    if lazy:
+        return result
+
+    return result.to_dict()
+
+
+def _symbol_paths(
+    directory: str, file_names: List[str], file_format: FileFormat
+) -> Dict[str, str]:
+    """
+    Return the paths of the data files keyed by their symbols.
+
+    The files of the other supported formats, e.g. `AAPL.json` when loading
+    csv files, are skipped. The symbols of several files, e.g. `AAPL.csv`
+    and `AAPL.csv.gz`, are ambiguous, so an error is raised instead of
+    loading one of them.
+    """
+    other_extensions = {
+        f".{other_format.value}"
+        for other_format in FileFormat
+        if other_format != file_format
+    }
+    paths = {}
     for file_name in file_names:
-        key_name = file_name.replace("." + from_format, "")
-        path = fsjoin(directory, file_name)
-        with open(path) as f:
-            data = reader(f)
-            result[key_name] = data
+        if splitext(strip_compression(file_name))[1].lower() in other_extensions:
+            continue
+        symbol = file_symbol(file_name)
+        if symbol in paths:
+            raise ValueError(
+                f"Files {basename(paths[symbol])} and {file_name} in the "
+                f"directory {directory} have the same symbol {symbol}"
+            )
+        paths[symbol] = fsjoin(directory, file_name)
+    return paths
 
-    return result
+
+def _read_file(path: str, reader: Callable) -> Any:
+    """
+    Open the file, decompressing it if compressed, and read it with the
+    reader of file objects.
+    """
+    with open_file(path) as f:
+        return reader(f)
+
+
+def _with_index_column(columns: List[str], index_col: Any) -> List[str]:
+    """
+    Return the columns including the index column name.
+    """
+    if isinstance(index_col, str) and index_col not in columns:
+        return [index_col, *columns]
+    return list(columns)
+
+
+def _read_csv_pandas(
+    path: str,
+    columns: Optional[List[str]] = None,
+    index_col: Any = None,
+    **options,
+) -> pd.DataFrame:
+    """
+    Read a csv file into a dataframe by the pandas parser, projecting the
+    columns and the index column.
+
+    The positions of `index_col` are relative to the projected columns in
+    pandas, so the index column of a position is projected by its name in
+    the header instead.
+    """
+    if columns is not None:
+        if isinstance(index_col, int):
+            with open_file(path) as f:
+                index_col = pd.read_csv(f, nrows=0, **options).columns[index_col]
+        options["usecols"] = _with_index_column(columns, index_col)
+    with open_file(path) as f:
+        return pd.read_csv(f, index_col=index_col, **options)
+
+
+def _read_json(
+    f,
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+    **options,
+) -> pd.DataFrame:
+    """
+    Read a json file into a dataframe, and project and cast its columns.
+    """
+    df = pd.read_json(f, **options)
+    if columns is not None:
+        df = df[list(columns)]
+    if dtypes is not None:
+        df = df.astype(dtypes)
+    return df
+
+
+def _read_csv_arrow(
+    path: str,
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+    index_col: Optional[Union[int, str]] = None,
+    parse_dates: Union[bool, List[str]] = False,
+    **options,
+) -> pd.DataFrame:
+    """
+    Read a csv file into a dataframe by the multi-threaded pyarrow parser.
+
+    As the pandas parser, the index column is kept in strings unless it is
+    requested in `parse_dates`. The other columns are inferred by pyarrow.
+    """
+    if options:
+        raise ValueError(
+            f"Parameters {list(options.keys())} are not supported by the "
+            "pyarrow csv engine"
+        )
+
+    if isinstance(index_col, int):
+        with open_file(path) as f:
+            index_col = next(csv.reader(f))[index_col]
+
+    if parse_dates is True:
+        date_columns = [index_col] if index_col is not None else []
+    else:
+        date_columns = list(parse_dates or [])
+
+    column_types = {
+        name: _to_arrow_type(dtype) for name, dtype in (dtypes or {}).items()
+    }
+    if index_col is not None and index_col not in date_columns:
+        column_types.setdefault(index_col, pa.string())
+
+    read_csv = partial(
+        pa_csv.read_csv,
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=(
+                None if columns is None else _with_index_column(columns, index_col)
+            ),
+            column_types=column_types,
+        ),
+    )
+    if file_compression(path) is None:
+        table = read_csv(path)
+    else:
+        with open_file(path, binary=True) as f:
+            table = read_csv(f)
+    df = table.to_pandas()
+    for name in date_columns:
+        if not pd.api.types.is_datetime64_any_dtype(df[name]):
+            df[name] = pd.to_datetime(df[name])
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
+
+
+def _to_arrow_type(dtype: str) -> pa.DataType:
+    """
+    Convert a pandas dtype name to the pyarrow data type.
+    """
+    if dtype in ("str", "string", "object"):
+        return pa.string()
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+
+def _read_binary(
+    path: str,
+    file_format: FileFormat,
+    to_format: ReturnFormat,
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+) -> Any:
+    """
+    Read a binary columnar file by memory mapping.
+
+    The default return format returns the pyarrow table, or the numpy
+    array for the npy format, without conversion. A compressed file cannot
+    be memory mapped, so it is decompressed into memory instead.
+    """
+    options = (
+        dict(to_format[ReturnFormat.dataframe.value])
+        if ReturnFormat.dataframe == to_format and isinstance(to_format, dict)
+        else {}
+    )
+    index_col = options.pop("index_col", None)
+    if options:
+        raise ValueError(
+            f"Parameters {list(options.keys())} are not supported by the "
+            f"{file_format.value} reader"
+        )
+
+    if file_format == FileFormat.npy:
+        if file_compression(path) is None:
+            values = np.load(path, mmap_mode="r")
+        else:
+            with open_file(path, binary=True) as f:
+                values = np.load(io.BytesIO(f.read()))
+        if ReturnFormat.default == to_format:
+            return values
+        if not ReturnFormat.dataframe == to_format:
+            raise ValueError(f"Unknown return format {to_format} for npy files")
+        df = pd.DataFrame(values)
+        if columns is not None:
+            df = df[_with_index_column(columns, index_col)]
+    else:
+        read_columns = (
+            None if columns is None else _with_index_column(columns, index_col)
+        )
+        source = path
+        if file_compression(path) is not None:
+            with open_file(path, binary=True) as f:
+                source = pa.BufferReader(f.read())
+
+        if file_format == FileFormat.parquet:
+            table = pa_parquet.read_table(
+                source,
+                columns=read_columns,
+                memory_map=True,
+                use_pandas_metadata=True,
+            )
+        else:
+            table = pa_feather.read_table(source, columns=read_columns, memory_map=True)
+
+        if ReturnFormat.default == to_format:
+            return table
+        if ReturnFormat.dict == to_format:
+            return table.to_pydict()
+        if not ReturnFormat.dataframe == to_format:
+            raise ValueError(f"Unknown return format: {to_format}")
+        df = table.to_pandas()
+
+    if dtypes is not None:
+        df = df.astype(dtypes)
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
 
 
+@declare(io_bound=True)
 def jq_compile(
     pattern: str,
     json_filename: Optional[str] = None,
@@ -170,6 +507,7 @@ def jq_compile(
     raise ValueError(f"Invalid return format: {to_format}. ")
 
 
+@declare(pure=True)
 def concat(
     data: Dict[str, pd.DataFrame],
     column: str,
@@ -184,7 +522,127 @@ def concat(
     column: str
         The column name in the values of dataframes.
     """
-    return pd.DataFrame({key: df[column] for key, df in data.items()})
+    return concat_columns(data=data, columns=[column])[column]
+
+
+@declare(pure=True)
+def concat_columns(
+    data: Dict[str, pd.DataFrame],
+    columns: List[str],
+) -> Dict[str, pd.DataFrame]:
+    """
+    Concatenate a dict of dataframe into a single dataframe per column.
+
+    The union of the dataframe indexes is computed once for all the
+    columns, and the values of each column are filled into a preallocated
+    array in a single pass over the dataframes. The datetimes missing in
+    a dataframe are filled with missing values.
+
+    Parameters
+    ----------
+    data: Dict[str, pd.DataFrame]
+        The data frame.
+    columns: List[str]
+        The column names in the values of dataframes.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Dictionary of column names and the concatenated dataframes, whose
+        columns are the keys of the data.
+    """
+    keys = list(data.keys())
+    frames = list(data.values())
+    if not frames:
+        return {column: pd.DataFrame() for column in columns}
+
+    index = _union_index([df.index for df in frames])
+    positions = [
+        None if df.index.equals(index) else index.get_indexer(df.index) for df in frames
+    ]
+    fill_missing = any(position is not None for position in positions)
+    blocks = {
+        column: _allocate_block(
+            shape=(len(index), len(frames)),
+            dtypes=[df.dtypes[column] for df in frames],
+            fill_missing=fill_missing,
+        )
+        for column in columns
+    }
+    for number, (df, position) in enumerate(zip(frames, positions)):
+        for column, block in blocks.items():
+            values = df[column].to_numpy()
+            if position is None:
+                block[:, number] = values
+            else:
+                block[position, number] = values
+
+    return {
+        column: pd.DataFrame(block, index=index, columns=keys)
+        for column, block in blocks.items()
+    }
+
+
+def _union_index(indexes: List[pd.Index]) -> pd.Index:
+    """
+    Return the sorted union of the indexes, or the first index if all the
+    indexes are equal.
+    """
+    first = indexes[0]
+    if all(index.equals(first) for index in indexes[1:]):
+        return first
+
+    names = {index.name for index in indexes}
+    try:
+        values = np.unique(np.concatenate([index.to_numpy() for index in indexes]))
+    except TypeError:
+        # Labels which are not comparable with each other
+        union = first
+        for index in indexes[1:]:
+            union = union.union(index)
+        return union
+
+    return pd.Index(values, name=names.pop() if len(names) == 1 else None)
+
+
+def _allocate_block(shape, dtypes: List[np.dtype], fill_missing: bool) -> np.ndarray:
+    """
+    Allocate a column-major block for the values of the dtypes, which can
+    hold missing values if `fill_missing` is True.
+    """
+    try:
+        dtype = np.result_type(*dtypes)
+    except TypeError:
+        # Extension dtypes which cannot be combined by numpy
+        dtype = np.dtype(object)
+
+    if not fill_missing:
+        return np.empty(shape, dtype=dtype, order="F")
+    if dtype.kind in "iu":
+        dtype = np.dtype(np.float64)
+    elif dtype.kind == "b":
+        dtype = np.dtype(object)
+
+    fill_value = np.datetime64("NaT") if dtype.kind in "mM" else np.nan
+    return np.full(shape, fill_value, dtype=dtype, order="F")
+
+
+@declare(pure=True)
+def get_item(data: Dict[str, Any], key: str) -> Any:
+    """
+    Get an item from a dictionary.
+
+    Parameters
+    ----------
+    data: Dict[str, Any]
+        The dictionary, e.g. the dataframes returned from `concat_columns`.
+    key: str
+        The key of the item.
+    """
+    try:
+        return data[key]
+    except KeyError:
+        raise KeyError(f"Key {key} is not found in the keys {list(data.keys())}")
 
 
 def dataframe_operator(
@@ -210,6 +668,7 @@ def dataframe_operator(
     return getattr(df, operator)(**parameters)
 
 
+@declare(pure=True)
 def flatten(
     values: List[List[Any]],
     ascending: Optional[bool] = None,
@@ -236,19 +695,33 @@ def flatten(
     return result
 
 
-def convert_str_index_to_date(df: pd.DataFrame) -> pd.DataFrame:
+@declare(pure=True, column_separable=True)
+def convert_str_index_to_date(
+    df: pd.DataFrame, format: Optional[str] = None
+) -> pd.DataFrame:
     """
     Convert a string index to a date index.
 
+    The dates, i.e. the first 10 characters of the index, are parsed in a
+    single call. The returned dataframe shares the values with the input
+    dataframe, which is not modified.
+
     Parameters
     ----------
     df: pd.DataFrame
         Dataframe with a datetime formatted string index.
+    format: Optional[str]
+        The format of the dates, e.g. "%Y-%m-%d". Default is None which
+        means the format is inferred once from the first date.
 
     Returns
     -------
     pd.DataFrame
         Dataframe with a pandas datetime index.
     """
-    df.index = df.index.map(lambda x: pd.to_datetime(x[:10]))
-    return df
+    dates = df.index.astype(str).str.slice(0, 10)
+    result = df.copy(deep=False)
+    result.index = pd.to_datetime(
+        dates, format=format, infer_datetime_format=format is None
+    )
+    return result
@@ -0,0 +1,431 @@
+import logging
+import os
+from os import makedirs
+from os.path import exists
+from os.path import join as fsjoin
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .universe import IntervalUniverse, _to_validity_array
+from .utils import (
+    atomic_path,
+    fingerprint,
+    prefixed_directories,
+    read_versioned_json,
+    write_json,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+DATASET_MANIFEST_FILE_NAME = "_manifest.json"
+DATASET_VERSION = 1
+
+# Formats of the partition keys by the partition granularities
+PARTITION_FORMATS = {
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+    "year": "%Y",
+}
+
+# Prefix of the partition directories
+_PARTITION_PREFIX = "date="
+
+# File name of the data in each partition
+_PARTITION_FILE_NAME = "part-0.parquet"
+
+
+class PartitionedDataset:
+    """
+    Partitioned dataset.
+
+    The dataset keeps the universe in a single parquet dataset partitioned
+    by the dates, instead of a file of the full history on every run. Each
+    partition holds the members of its datetimes in the long format, i.e.
+    a row of datetime and symbol for each valid instrument, sorted by the
+    datetime and the symbol. The symbols are dictionary encoded, and the
+    row groups have the min/max statistics, so the readers skip the row
+    groups outside the datetime range.
+
+    The fingerprints of the partitions are kept in the manifest of the
+    dataset, and a write overwrites only the partitions whose contents
+    change, so the storage and the write cost grow linearly in the number
+    of the datetimes.
+
+    The timezone of the datetimes is kept in the manifest, and all the
+    writes of a dataset must be in the same timezone.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        partition: str = "month",
+        row_group_size: int = 1024 * 1024,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the dataset, which is created if it does not
+            exist.
+        partition : str
+            The granularity of the partitions, either "day", "month" or
+            "year". Default is "month".
+        row_group_size : int
+            The maximum number of rows in each row group. Default is 1M
+            rows, e.g. a month of 2,000 daily members in a row group.
+        """
+        if partition not in PARTITION_FORMATS:
+            raise ValueError(
+                f"Partition {partition} is not supported. Supported partitions "
+                f"are {list(PARTITION_FORMATS)}"
+            )
+        if row_group_size <= 0:
+            raise ValueError(f"Row group size {row_group_size} must be positive")
+
+        self._directory = directory
+        self._partition = partition
+        self._row_group_size = row_group_size
+        self._manifest_path = fsjoin(directory, DATASET_MANIFEST_FILE_NAME)
+        makedirs(directory, exist_ok=True)
+        self._manifest = self._read_manifest()
+
+    @classmethod
+    def from_config(cls, config: Union[str, Dict[str, Any]]) -> "PartitionedDataset":
+        """
+        Create the dataset from the configuration.
+
+        Parameters
+        ----------
+        config : Union[str, Dict[str, Any]]
+            The directory of the dataset, or the configuration with the key
+            `directory` and the optional keys `partition` and
+            `row_group_size`.
+        """
+        if isinstance(config, str):
+            return cls(directory=config)
+        return cls(**config)
+
+    @property
+    def partitions(self) -> List[str]:
+        """
+        Return the keys of the partitions, sorted.
+        """
+        return sorted(self._manifest["partitions"].keys())
+
+    def write(self, validity: Union[pd.DataFrame, IntervalUniverse]) -> List[str]:
+        """
+        Write the validity into the partitions of its datetimes.
+
+        The partitions of the datetimes out of the validity are kept as
+        they are. A partition covered partially by the validity keeps the
+        members of its other datetimes, and only the members of the
+        datetimes in the validity are replaced. The partitions with the
+        same contents are not rewritten.
+
+        Parameters
+        ----------
+        validity : Union[pd.DataFrame, IntervalUniverse]
+            The validity, e.g. the combined result of the pipelines.
+
+        Returns
+        -------
+        List[str]
+            The keys of the written partitions.
+        """
+        if isinstance(validity, IntervalUniverse):
+            validity = validity.to_dense()
+
+        tz = None if validity.index.tz is None else str(validity.index.tz)
+        if self._manifest["partitions"] and tz != self._tz:
+            raise ValueError(
+                f"Timezone {tz} of the validity differs from the timezone "
+                f"{self._tz} of the dataset {self._directory}"
+            )
+        self._manifest["tz"] = tz
+
+        keys = validity.index.strftime(PARTITION_FORMATS[self._partition])
+        values = _to_validity_array(validity)
+        symbols = validity.columns.astype(str)
+        written = []
+        for key in pd.unique(keys):
+            rows = np.flatnonzero(keys == key)
+            datetimes = validity.index[rows]
+            member_rows, member_columns = np.nonzero(values[rows])
+            member_datetimes = datetimes[member_rows]
+            member_symbols = symbols[member_columns]
+
+            # The members of the datetimes in the partition but out of the
+            # validity, e.g. the earlier days of the month, are kept
+            kept_datetimes = self._datetimes(key).difference(datetimes)
+            if len(kept_datetimes) > 0 and exists(self._partition_path(key)):
+                kept = self._read_partition(key)
+                kept = kept[kept["datetime"].isin(kept_datetimes)]
+                datetimes = datetimes.append(kept_datetimes)
+                member_datetimes = member_datetimes.append(
+                    pd.DatetimeIndex(kept["datetime"])
+                )
+                member_symbols = member_symbols.append(
+                    pd.Index(kept["symbol"].astype(str))
+                )
+
+            datetimes = datetimes.sort_values()
+            order = np.lexsort((member_symbols, member_datetimes))
+            member_datetimes = member_datetimes[order]
+            member_symbols = member_symbols[order]
+            # The fingerprint covers only the datetimes and the members, so
+            # the symbols never valid in the partition do not change it
+            partition_fingerprint = fingerprint(
+                (datetimes, member_datetimes, member_symbols)
+            )
+            previous_fingerprint = self._manifest["partitions"].get(key)
+            if previous_fingerprint == partition_fingerprint and exists(
+                self._partition_path(key)
+            ):
+                continue
+
+            self._write_partition(
+                key=key,
+                table=self._to_table(
+                    datetimes=member_datetimes, symbols=member_symbols
+                ),
+            )
+            self._manifest["partitions"][key] = partition_fingerprint
+            self._manifest["datetimes"][key] = [
+                datetime.isoformat() for datetime in datetimes
+            ]
+            written.append(key)
+
+        self._write_manifest()
+        LOGGER.info(
+            f"Wrote {len(written)} of {len(pd.unique(keys))} partitions to the "
+            f"dataset {self._directory}"
+        )
+        return written
+
+    def read(
+        self,
+        start_datetime: Optional[Union[str, pd.Timestamp]] = None,
+        last_datetime: Optional[Union[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the members between the start and last datetimes, both
+        inclusive, in the long format.
+
+        Only the partitions and the row groups in the range are read. The
+        naive datetimes of the range are in the timezone of the dataset.
+
+        Parameters
+        ----------
+        start_datetime : Optional[Union[str, pd.Timestamp]]
+            The start datetime. Default is None which means the first
+            datetime.
+        last_datetime : Optional[Union[str, pd.Timestamp]]
+            The last datetime. Default is None which means the last datetime.
+
+        Returns
+        -------
+        pd.DataFrame
+            The members with the columns `datetime` and `symbol`.
+        """
+        start_datetime = (
+            None if start_datetime is None else self._timestamp(start_datetime)
+        )
+        last_datetime = (
+            None if last_datetime is None else self._timestamp(last_datetime)
+        )
+        date_format = PARTITION_FORMATS[self._partition]
+        filters = []
+        if start_datetime is not None:
+            filters.append(("datetime", ">=", start_datetime))
+        if last_datetime is not None:
+            filters.append(("datetime", "<=", last_datetime))
+
+        tables = []
+        for key in self.partitions:
+            if start_datetime is not None and key < start_datetime.strftime(
+                date_format
+            ):
+                continue
+            if last_datetime is not None and key > last_datetime.strftime(date_format):
+                continue
+            tables.append(self._read_partition(key, filters=filters or None))
+
+        if not tables:
+            return pd.DataFrame(
+                {
+                    "datetime": pd.DatetimeIndex([], tz=self._tz),
+                    "symbol": pd.Series([], dtype=object),
+                }
+            )
+        members = pd.concat(tables, ignore_index=True)
+        members["symbol"] = members["symbol"].astype(str)
+        return members
+
+    def read_validity(
+        self,
+        start_datetime: Optional[Union[str, pd.Timestamp]] = None,
+        last_datetime: Optional[Union[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the validity between the start and last datetimes, both
+        inclusive, in a dense dataframe.
+
+        Parameters
+        ----------
+        start_datetime : Optional[Union[str, pd.Timestamp]]
+            The start datetime. Default is None which means the first
+            datetime.
+        last_datetime : Optional[Union[str, pd.Timestamp]]
+            The last datetime. Default is None which means the last datetime.
+
+        Returns
+        -------
+        pd.DataFrame
+            Boolean dataframe. The index is the datetimes of the written
+            validities, and the columns are the symbols of the members,
+            sorted.
+        """
+        index = pd.DatetimeIndex([], tz=self._tz).append(
+            [self._datetimes(key) for key in self.partitions]
+        )
+        index.name = "datetime"
+        if start_datetime is not None:
+            index = index[index >= self._timestamp(start_datetime)]
+        if last_datetime is not None:
+            index = index[index <= self._timestamp(last_datetime)]
+
+        members = self.read(start_datetime=start_datetime, last_datetime=last_datetime)
+        symbols = pd.Index(sorted(members["symbol"].unique()))
+        rows = index.get_indexer(members["datetime"])
+        if (rows < 0).any():
+            raise ValueError(
+                f"Dataset {self._directory} has {(rows < 0).sum()} members of "
+                "the datetimes missing in its manifest"
+            )
+        validity = np.zeros((len(index), len(symbols)), dtype=bool)
+        validity[rows, symbols.get_indexer(members["symbol"])] = True
+        return pd.DataFrame(validity, index=index, columns=symbols)
+
+    @property
+    def _tz(self) -> Optional[str]:
+        """
+        Return the timezone of the datetimes, or None if they are naive.
+        """
+        return self._manifest.get("tz")
+
+    def _timestamp(self, value: Union[str, pd.Timestamp]) -> pd.Timestamp:
+        """
+        Return the timestamp of the value in the timezone of the dataset,
+        where a naive value is regarded as in the timezone.
+        """
+        timestamp = pd.Timestamp(value)
+        if self._tz is None:
+            return timestamp
+        if timestamp.tz is None:
+            return timestamp.tz_localize(self._tz)
+        return timestamp.tz_convert(self._tz)
+
+    def _datetimes(self, key: str) -> pd.DatetimeIndex:
+        """
+        Return the datetimes of a partition in the manifest.
+        """
+        datetimes = self._manifest["datetimes"].get(key, [])
+        if self._tz is None:
+            return pd.DatetimeIndex(datetimes)
+        # The offsets of the datetimes differ across the daylight saving
+        # time, so they are parsed in UTC
+        return pd.DatetimeIndex(pd.to_datetime(datetimes, utc=True)).tz_convert(
+            self._tz
+        )
+
+    def _read_partition(self, key: str, filters: Optional[list] = None) -> pd.DataFrame:
+        """
+        Read the members of a partition in the timezone of the dataset.
+        """
+        members = pq.read_table(self._partition_path(key), filters=filters).to_pandas()
+        if self._tz is not None:
+            members["datetime"] = members["datetime"].dt.tz_convert(self._tz)
+        return members
+
+    def _to_table(self, datetimes: pd.DatetimeIndex, symbols: pd.Index) -> pa.Table:
+        """
+        Convert the members of a partition to a table sorted by the datetime
+        and the symbol, with the dictionary encoded symbols.
+        """
+        order = np.lexsort((symbols, datetimes))
+        return pa.table(
+            {
+                # The timezone is kept on the column, where the aware
+                # datetimes are stored in UTC
+                "datetime": pa.array(
+                    datetimes[order].asi8, pa.timestamp("ns", tz=self._tz)
+                ),
+                "symbol": pa.array(
+                    symbols[order].to_numpy(dtype=object), pa.string()
+                ).dictionary_encode(),
+            }
+        )
+
+    def _partition_path(self, key: str) -> str:
+        """
+        Return the path of the data file of a partition.
+        """
+        return fsjoin(
+            self._directory, f"{_PARTITION_PREFIX}{key}", _PARTITION_FILE_NAME
+        )
+
+    def _write_partition(self, key: str, table: pa.Table) -> None:
+        """
+        Write the table of a partition, replacing the previous file
+        atomically.
+        """
+        path = self._partition_path(key)
+        makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_path(path) as temporary_path:
+            pq.write_table(
+                table,
+                temporary_path,
+                row_group_size=self._row_group_size,
+                use_dictionary=["symbol"],
+                write_statistics=True,
+            )
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """
+        Read the manifest of the dataset, or return an empty manifest if the
+        dataset is new.
+        """
+        if not exists(self._manifest_path):
+            if prefixed_directories(self._directory, _PARTITION_PREFIX):
+                raise ValueError(
+                    f"Dataset {self._directory} has partitions but no manifest"
+                )
+            return {
+                "version": DATASET_VERSION,
+                "partition": self._partition,
+                "tz": None,
+                "partitions": {},
+                "datetimes": {},
+            }
+
+        manifest = read_versioned_json(
+            self._manifest_path, version=DATASET_VERSION, description="Dataset"
+        )
+        if manifest["partition"] != self._partition:
+            raise ValueError(
+                f"Dataset {self._directory} is partitioned by "
+                f"{manifest['partition']} instead of {self._partition}"
+            )
+        return manifest
+
+    def _write_manifest(self) -> None:
+        """
+        Write the manifest atomically.
+        """
+        write_json(self._manifest_path, self._manifest)
@@ -0,0 +1,313 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .universe import IntervalUniverse, _to_validity_array
+
+LOGGER = logging.getLogger(__name__)
+
+# Supported dtypes of the policy fields
+_VALUES_DTYPES = ("float16", "float32", "float64")
+_VALIDITY_DTYPES = ("bool",)
+_SYMBOLS_DTYPES = ("category",)
+
+
+class DtypePolicy:
+    """
+    Dtype policy.
+
+    The policy defines the dtypes of the data and pipeline results, so that
+    the panels are kept in the narrower dtypes through the data functions
+    and pipelines:
+
+    - values: The float dtype of the numeric columns, e.g. prices, volumes
+      and market caps. The wider float and integer columns are downcast
+      only if the downcast values are within the tolerance of the original
+      values.
+    - validity: The dtype of the pipeline results, where the missing values
+      are regarded as invalid.
+    - symbols: The dtype of the string columns, e.g. symbols and exchanges.
+
+    A field of None keeps the dtypes as they are.
+
+    The tolerance covers only the downcast data, while the rankings and
+    thresholds of the pipelines can still flip on the ties and roundings
+    introduced by the narrower dtype. Set `max_mismatch` to execute each
+    pipeline on the data in their original dtypes too, and fail the
+    pipelines whose results differ in more than the fraction.
+    """
+
+    def __init__(
+        self,
+        values: Optional[str] = None,
+        validity: Optional[str] = None,
+        symbols: Optional[str] = None,
+        rtol: float = 1e-6,
+        atol: float = 0.0,
+        max_mismatch: Optional[float] = None,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        values : Optional[str]
+            The float dtype of the numeric columns, e.g. "float32".
+        validity : Optional[str]
+            The dtype of the pipeline results, i.e. "bool".
+        symbols : Optional[str]
+            The dtype of the string columns, i.e. "category".
+        rtol : float
+            The relative tolerance of the downcast values. Default is 1e-6.
+        atol : float
+            The absolute tolerance of the downcast values. Default is 0.
+        max_mismatch : Optional[float]
+            The maximum fraction of the validities of a pipeline result
+            which differ from the result on the original data, e.g. 0 to
+            allow no flips. Default is None which means the results are not
+            verified.
+        """
+        for name, value, supported in (
+            ("values", values, _VALUES_DTYPES),
+            ("validity", validity, _VALIDITY_DTYPES),
+            ("symbols", symbols, _SYMBOLS_DTYPES),
+        ):
+            if value is not None and value not in supported:
+                raise ValueError(
+                    f"Dtype {value} of {name} is not supported. Supported dtypes "
+                    f"are {list(supported)}"
+                )
+        if max_mismatch is not None and not 0 <= max_mismatch <= 1:
+            raise ValueError(f"Maximum mismatch {max_mismatch} must be in [0, 1]")
+
+        self.values = values
+        self.validity = validity
+        self.symbols = symbols
+        self.rtol = rtol
+        self.atol = atol
+        self.max_mismatch = max_mismatch
+
+    def __repr__(self) -> str:
+        return (
+            f"DtypePolicy(values={self.values!r}, validity={self.validity!r}, "
+            f"symbols={self.symbols!r}, rtol={self.rtol}, atol={self.atol}, "
+            f"max_mismatch={self.max_mismatch})"
+        )
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Optional[Dict[str, Any]],
+        base: Optional["DtypePolicy"] = None,
+    ) -> Optional["DtypePolicy"]:
+        """
+        Create the policy from the configuration.
+
+        Parameters
+        ----------
+        config : Optional[Dict[str, Any]]
+            The configuration with the keys `values`, `validity`, `symbols`,
+            `rtol`, `atol` and `max_mismatch`, all of which are optional.
+        base : Optional[DtypePolicy]
+            The policy overridden by the configuration, e.g. the policy of
+            the whole configuration overridden by a node.
+
+        Returns
+        -------
+        Optional[DtypePolicy]
+            The policy, or None if neither the configuration nor the base
+            policy is given.
+        """
+        if config is None:
+            return base
+
+        fields = {} if base is None else dict(vars(base))
+        fields.update(config)
+        return cls(**fields)
+
+    def apply(self, value: Any) -> Any:
+        """
+        Apply the values and symbols dtypes to the data.
+
+        The dataframes and series, including the ones in dictionaries and
+        lists, are converted. Other values are returned as they are.
+
+        Parameters
+        ----------
+        value : Any
+            The data.
+        """
+        if isinstance(value, pd.DataFrame):
+            return self._apply_frame(value)
+        if isinstance(value, pd.Series):
+            return self._apply_frame(value.to_frame()).iloc[:, 0]
+        if isinstance(value, dict):
+            return {key: self.apply(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.apply(item) for item in value]
+        return value
+
+    def apply_validity(self, value: Any) -> Any:
+        """
+        Apply the validity dtype to the pipeline result.
+
+        Parameters
+        ----------
+        value : Any
+            The pipeline result. Only dataframes are converted.
+        """
+        if self.validity is None or not isinstance(value, pd.DataFrame):
+            return value
+        if all(dtype == self.validity for dtype in value.dtypes):
+            return value
+
+        return pd.DataFrame(
+            _to_validity_array(value), index=value.index, columns=value.columns
+        )
+
+    def verify(self, function: Callable, **parameters: Any) -> float:
+        """
+        Compare the results of a pipeline function on the data converted by
+        the policy with its results on the original data, e.g. on a sample
+        of the history before the policy is adopted.
+
+        Parameters
+        ----------
+        function : Callable
+            The pipeline function, e.g. `ranking`.
+        parameters : Any
+            The parameters of the function, where the data are in their
+            original dtypes.
+
+        Returns
+        -------
+        float
+            The fraction of the validities which differ between the results.
+        """
+        return self.mismatch(
+            expected=function(**parameters),
+            result=function(**self.apply(parameters)),
+            name=getattr(function, "__name__", function),
+        )
+
+    def mismatch(self, expected: Any, result: Any, name: Any) -> float:
+        """
+        Return the fraction of the validities which differ between the
+        pipeline results on the original and the converted data, with a
+        warning if any differs.
+
+        Parameters
+        ----------
+        expected : Any
+            The result on the data in their original dtypes.
+        result : Any
+            The result on the data converted by the policy.
+        name : Any
+            The name of the pipeline in the messages.
+
+        Raises
+        ------
+        ValueError
+            If the fraction is above the maximum mismatch of the policy.
+        """
+        expected = _to_validity_array(_to_dense(expected))
+        result = _to_validity_array(_to_dense(result))
+        if expected.shape != result.shape:
+            raise ValueError(
+                f"Results of the shapes {expected.shape} and {result.shape} "
+                "cannot be compared"
+            )
+
+        mismatches = int(np.count_nonzero(expected != result))
+        fraction = mismatches / expected.size if expected.size else 0.0
+        if mismatches > 0:
+            LOGGER.warning(
+                f"Results of {name} differ in {mismatches} of {expected.size} "
+                f"validities in {self.values}"
+            )
+        if self.max_mismatch is not None and fraction > self.max_mismatch:
+            raise ValueError(
+                f"Results of {name} differ in {fraction:.2%} of the validities "
+                f"in {self.values}, above the maximum mismatch "
+                f"{self.max_mismatch:.2%}"
+            )
+        return fraction
+
+    def _apply_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the columns of the dataframe.
+        """
+        dtypes = {}
+        if self.values is not None:
+            target = np.dtype(self.values)
+            numeric_columns = [
+                column
+                for column, dtype in df.dtypes.items()
+                if isinstance(dtype, np.dtype)
+                and (
+                    (dtype.kind == "f" and dtype.itemsize > target.itemsize)
+                    or dtype.kind in "iu"
+                )
+            ]
+            if numeric_columns and self._within_tolerance(df, numeric_columns, target):
+                dtypes.update({column: target for column in numeric_columns})
+
+        if self.symbols is not None:
+            dtypes.update(
+                {
+                    column: self.symbols
+                    for column, dtype in df.dtypes.items()
+                    if dtype == object
+                    and pd.api.types.infer_dtype(df[column], skipna=True) == "string"
+                }
+            )
+
+        if not dtypes:
+            return df
+        if (
+            len(dtypes) == df.shape[1]
+            and len(set(dtypes.values())) == 1
+            and isinstance(next(iter(dtypes.values())), np.dtype)
+        ):
+            # Convert the panel in a single block instead of column by column
+            return pd.DataFrame(
+                df.to_numpy(dtype=next(iter(dtypes.values()))),
+                index=df.index,
+                columns=df.columns,
+            )
+        return df.astype(dtypes)
+
+    def _within_tolerance(
+        self, df: pd.DataFrame, columns: list, target: np.dtype
+    ) -> bool:
+        """
+        Return whether the columns downcast to the target dtype are within
+        the tolerance of the original values.
+        """
+        original = (df if len(columns) == df.shape[1] else df[columns]).to_numpy(
+            dtype=np.float64
+        )
+        with np.errstate(over="ignore"):
+            downcast = original.astype(target)
+        if np.allclose(
+            downcast, original, rtol=self.rtol, atol=self.atol, equal_nan=True
+        ):
+            return True
+
+        LOGGER.warning(
+            f"Values are kept in their dtypes since they are not within the "
+            f"tolerance (rtol={self.rtol}, atol={self.atol}) in {target}"
+        )
+        return False
+
+
+def _to_dense(value: Any) -> Any:
+    """
+    Return the dense dataframe of an interval universe, or the value as it
+    is.
+    """
+    if isinstance(value, IntervalUniverse):
+        return value.to_dense()
+    return value
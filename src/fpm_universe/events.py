@@ -0,0 +1,376 @@
+import logging
+from os import listdir, makedirs
+from os.path import exists
+from os.path import join as fsjoin
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .universe import IntervalUniverse, _to_validity_array
+from .utils import atomic_path, prefixed_directories, read_versioned_json, write_json
+
+LOGGER = logging.getLogger(__name__)
+
+ENTRY = "entry"
+EXIT = "exit"
+
+# Name of the file holding the high-water mark of the event log
+WATERMARK_FILE_NAME = "_watermark.json"
+EVENT_LOG_VERSION = 1
+
+# Prefix of the partition directories, which are partitioned by the months
+# of the events
+_PARTITION_PREFIX = "month="
+
+
+def validity_events(
+    validity: Union[pd.DataFrame, IntervalUniverse],
+    members: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Derive the entry and exit events from a validity.
+
+    An entry event is emitted on the datetime a symbol becomes valid, and
+    an exit event on the datetime it becomes invalid, both in a single
+    vectorized pass over the differences of the consecutive datetimes.
+
+    Parameters
+    ----------
+    validity : Union[pd.DataFrame, IntervalUniverse]
+        The validity, e.g. the combined result of the pipelines. Missing
+        values are regarded as invalid.
+    members : Optional[Iterable[str]]
+        The symbols valid before the first datetime of the validity. The
+        members missing in the validity columns exit on its first datetime.
+        Default is None which means no members.
+
+    Returns
+    -------
+    pd.DataFrame
+        The events with the columns `datetime`, `symbol` and `event`,
+        sorted by the datetime and then the symbol.
+    """
+    if isinstance(validity, IntervalUniverse):
+        validity = validity.to_dense()
+
+    members = pd.Index(list(members or []), dtype=object)
+    columns = validity.columns.append(members[~members.isin(validity.columns)])
+    values = np.zeros((len(validity.index) + 1, len(columns)), dtype=bool)
+    values[0] = columns.isin(members)
+    values[1:, : validity.shape[1]] = _to_validity_array(validity)
+
+    rows, symbols = np.nonzero(values[1:] != values[:-1])
+    order = np.lexsort((columns[symbols].astype(str), rows))
+    rows, symbols = rows[order], symbols[order]
+    return pd.DataFrame(
+        {
+            "datetime": validity.index[rows],
+            "symbol": columns[symbols].astype(str),
+            "event": np.where(values[rows + 1, symbols], ENTRY, EXIT),
+        }
+    )
+
+
+class EventLog:
+    """
+    Event log.
+
+    The log is an append-only directory of the entry and exit events of a
+    universe, partitioned by the months of the events. Each append writes
+    only the events after the high-water mark, i.e. the last appended
+    datetime, into new files of the partitions, so the files written by the
+    previous appends are never rewritten and can be shipped incrementally.
+
+    The membership at any datetime is reconstructed by replaying the
+    events up to the datetime.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the event log, which is created if it does
+            not exist.
+        """
+        self._directory = directory
+        self._watermark_path = fsjoin(directory, WATERMARK_FILE_NAME)
+        makedirs(directory, exist_ok=True)
+        self._watermark = self._read_watermark()
+
+    @property
+    def last_datetime(self) -> Optional[pd.Timestamp]:
+        """
+        Return the high-water mark, i.e. the last appended datetime, or None
+        if nothing is appended.
+        """
+        last_datetime = self._watermark["last_datetime"]
+        if last_datetime is None:
+            return None
+        return _to_timestamp(last_datetime, self._tz)
+
+    @property
+    def current_members(self) -> List[str]:
+        """
+        Return the members at the high-water mark.
+        """
+        return list(self._watermark["members"])
+
+    @property
+    def _tz(self) -> Optional[str]:
+        """
+        Return the timezone of the datetimes of the events, or None if they
+        are naive.
+        """
+        return self._watermark.get("tz")
+
+    def append(self, validity: Union[pd.DataFrame, IntervalUniverse]) -> pd.DataFrame:
+        """
+        Append the events of the validity after the high-water mark.
+
+        The datetimes of the validity up to the high-water mark are skipped,
+        as the log is append-only and the appended events are never revised.
+
+        Parameters
+        ----------
+        validity : Union[pd.DataFrame, IntervalUniverse]
+            The validity, e.g. the combined result of the pipelines.
+
+        Returns
+        -------
+        pd.DataFrame
+            The appended events.
+        """
+        if isinstance(validity, IntervalUniverse):
+            validity = validity.to_dense()
+
+        tz = None if validity.index.tz is None else str(validity.index.tz)
+        if self._watermark["sequence"] > 0 and tz != self._tz:
+            raise ValueError(
+                f"Timezone {tz} of the validity differs from the timezone "
+                f"{self._tz} of the event log {self._directory}"
+            )
+
+        last_datetime = self.last_datetime
+        if last_datetime is not None:
+            skipped = validity.index <= last_datetime
+            if skipped.any():
+                LOGGER.info(
+                    f"Skipping {skipped.sum()} datetimes up to the high-water "
+                    f"mark {last_datetime}"
+                )
+            validity = validity.loc[~skipped]
+        if len(validity.index) == 0:
+            return validity_events(validity)
+
+        events = validity_events(validity, members=self.current_members)
+        sequence = self._watermark["sequence"] + 1
+        months = events["datetime"].dt.strftime("%Y-%m")
+        for month, partition in events.groupby(months, sort=True):
+            self._write_partition(month=month, events=partition, sequence=sequence)
+
+        final = _to_validity_array(validity.iloc[-1:])[0]
+        self._write_watermark(
+            {
+                "version": EVENT_LOG_VERSION,
+                "sequence": sequence,
+                "tz": tz,
+                "last_datetime": validity.index[-1].isoformat(),
+                "members": validity.columns[final].astype(str).tolist(),
+            }
+        )
+        LOGGER.info(
+            f"Appended {len(events)} events up to {validity.index[-1]} to the "
+            f"event log {self._directory}"
+        )
+        return events
+
+    def read(
+        self,
+        start_datetime: Optional[Union[str, pd.Timestamp]] = None,
+        last_datetime: Optional[Union[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the events between the start and last datetimes, both inclusive.
+
+        Only the partitions of the months in the range are read. The naive
+        datetimes of the range are in the timezone of the events.
+
+        Parameters
+        ----------
+        start_datetime : Optional[Union[str, pd.Timestamp]]
+            The start datetime. Default is None which means the first event.
+        last_datetime : Optional[Union[str, pd.Timestamp]]
+            The last datetime. Default is None which means the last event.
+
+        Returns
+        -------
+        pd.DataFrame
+            The events with the columns `datetime`, `symbol` and `event`,
+            sorted by the datetime and then the symbol.
+        """
+        start_datetime = (
+            None if start_datetime is None else _to_timestamp(start_datetime, self._tz)
+        )
+        last_datetime = (
+            None if last_datetime is None else _to_timestamp(last_datetime, self._tz)
+        )
+        tables = []
+        for month in self._partitions():
+            if start_datetime is not None and month < start_datetime.strftime("%Y-%m"):
+                continue
+            if last_datetime is not None and month > last_datetime.strftime("%Y-%m"):
+                continue
+            partition = fsjoin(self._directory, f"{_PARTITION_PREFIX}{month}")
+            for file_name in sorted(listdir(partition)):
+                if not file_name.endswith(".parquet"):
+                    continue
+                tables.append(pq.read_table(fsjoin(partition, file_name)))
+
+        if not tables:
+            return validity_events(
+                pd.DataFrame(index=pd.DatetimeIndex([], tz=self._tz))
+            )
+
+        events = pa.concat_tables(tables).to_pandas()
+        if self._tz is not None:
+            events["datetime"] = events["datetime"].dt.tz_convert(self._tz)
+        events["symbol"] = events["symbol"].astype(str)
+        events["event"] = events["event"].astype(str)
+        mask = np.ones(len(events), dtype=bool)
+        if start_datetime is not None:
+            mask &= events["datetime"] >= start_datetime
+        if last_datetime is not None:
+            mask &= events["datetime"] <= last_datetime
+        return events.loc[mask].sort_values(
+            ["datetime", "symbol"], kind="stable", ignore_index=True
+        )
+
+    def members(self, datetime: Union[str, pd.Timestamp]) -> List[str]:
+        """
+        Return the members at the datetime by replaying the events.
+
+        Parameters
+        ----------
+        datetime : Union[str, pd.Timestamp]
+            The datetime.
+        """
+        events = self.read(last_datetime=datetime)
+        # The last event of each symbol decides its membership
+        last_events = events.drop_duplicates("symbol", keep="last")
+        return sorted(last_events.loc[last_events["event"] == ENTRY, "symbol"])
+
+    def to_validity(self, index: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Reconstruct the validity on the datetime index by replaying the
+        events.
+
+        Parameters
+        ----------
+        index : pd.DatetimeIndex
+            The sorted datetime index of the validity. The naive datetimes
+            are in the timezone of the events.
+
+        Returns
+        -------
+        pd.DataFrame
+            Boolean dataframe. The index is the datetime index and the
+            columns are the symbols of the events, sorted.
+        """
+        index = pd.DatetimeIndex(index)
+        positions = index
+        if self._tz is not None:
+            positions = (
+                index.tz_localize(self._tz)
+                if index.tz is None
+                else index.tz_convert(self._tz)
+            )
+        events = self.read(last_datetime=positions[-1] if len(index) else None)
+        symbols = pd.Index(sorted(events["symbol"].unique()))
+        changes = np.zeros((len(index) + 1, len(symbols)), dtype=np.int8)
+        # Each event changes the membership from the first datetime of the
+        # index on or after it
+        rows = positions.searchsorted(events["datetime"], side="left")
+        columns = symbols.get_indexer(events["symbol"])
+        np.add.at(
+            changes,
+            (rows, columns),
+            np.where(events["event"] == ENTRY, 1, -1).astype(np.int8),
+        )
+        validity = np.cumsum(changes[:-1], axis=0, dtype=np.int8) > 0
+        return pd.DataFrame(validity, index=index, columns=symbols)
+
+    def _partitions(self) -> List[str]:
+        """
+        Return the months of the partitions, sorted.
+        """
+        return prefixed_directories(self._directory, _PARTITION_PREFIX)
+
+    def _write_partition(self, month: str, events: pd.DataFrame, sequence: int) -> None:
+        """
+        Write the events of a month into a new file of the partition.
+        """
+        partition = fsjoin(self._directory, f"{_PARTITION_PREFIX}{month}")
+        makedirs(partition, exist_ok=True)
+        datetimes = pd.DatetimeIndex(events["datetime"])
+        tz = None if datetimes.tz is None else str(datetimes.tz)
+        table = pa.table(
+            {
+                # The timezone is kept on the column, where the aware
+                # datetimes are stored in UTC
+                "datetime": pa.array(datetimes.asi8, pa.timestamp("ns", tz=tz)),
+                "symbol": pa.array(
+                    events["symbol"].to_numpy(), pa.string()
+                ).dictionary_encode(),
+                "event": pa.array(
+                    events["event"].to_numpy(), pa.string()
+                ).dictionary_encode(),
+            }
+        )
+        path = fsjoin(partition, f"part-{sequence:08d}.parquet")
+        with atomic_path(path) as temporary_path:
+            pq.write_table(table, temporary_path)
+
+    def _read_watermark(self) -> Dict[str, Any]:
+        """
+        Read the high-water mark, or return the initial one if the log is
+        empty.
+        """
+        if not exists(self._watermark_path):
+            return {
+                "version": EVENT_LOG_VERSION,
+                "sequence": 0,
+                "tz": None,
+                "last_datetime": None,
+                "members": [],
+            }
+
+        return read_versioned_json(
+            self._watermark_path, version=EVENT_LOG_VERSION, description="Event log"
+        )
+
+    def _write_watermark(self, watermark: Dict[str, Any]) -> None:
+        """
+        Write the high-water mark atomically, after the event files, so the
+        events are never appended twice.
+        """
+        write_json(self._watermark_path, watermark)
+        self._watermark = watermark
+
+
+def _to_timestamp(value: Any, tz: Optional[str]) -> pd.Timestamp:
+    """
+    Return the timestamp of the value in the timezone, where a naive value
+    is regarded as in the timezone.
+    """
+    timestamp = pd.Timestamp(value)
+    if tz is None:
+        return timestamp
+    if timestamp.tz is None:
+        return timestamp.tz_localize(tz)
+    return timestamp.tz_convert(tz)
@@ -0,0 +1,355 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def top_rank_validity(values: np.ndarray, threshold_pct: float) -> np.ndarray:
+    """
+    Select the top ranked values in each row.
+
+    The selection is equivalent to ranking the values in descending order
+    with the average method on ties, i.e. `DataFrame.rank(axis=1,
+    ascending=False)`, and comparing the ranks with the number of valid
+    values multiplied by the threshold percentage. Missing values are never
+    selected and are not counted as valid values.
+
+    Instead of ranking every value, the k-th largest value of each row is
+    located by a partial selection (`numpy.partition`), so only the values
+    tied with it have to be inspected to resolve the average ranks.
+
+    :param values: Two dimensional array of values. The rows are the
+      timeframes and the columns are the instruments. Float values are
+      ranked in their precision, and other values in float64.
+    :type values: `numpy.ndarray`.
+    :param threshold_pct: The threshold percentage which should be between
+      0 and 1.
+    :type threshold_pct: `float`.
+    :return: A boolean array in the same shape of the values indicating
+      whether the value is ranked within the threshold.
+    :rtype: `numpy.ndarray`.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind != "f":
+        values = values.astype(np.float64)
+    if values.ndim != 2:
+        raise ValueError(f"Values must be two dimensional, but got {values.ndim}")
+
+    valid = ~np.isnan(values)
+    threshold = valid.sum(axis=1) * threshold_pct
+    # The values ranked within the threshold must be greater than or equal to
+    # the k-th largest value, where k is the floor of the threshold
+    kth = np.floor(threshold).astype(np.int64)
+    kth_values = np.full(values.shape[0], np.inf)
+
+    # Negate the values so that the partition is ascending and move the
+    # missing values to the end of each row
+    negated = np.where(valid, -values, np.inf)
+    for k in np.unique(kth[kth > 0]):
+        rows = np.flatnonzero(kth == k)
+        kth_values[rows] = -np.partition(negated[rows], k - 1, axis=1)[:, k - 1]
+
+    kth_values = kth_values[:, None]
+    greater = values > kth_values
+    tied = values == kth_values
+    # The values tied with the k-th largest value share the average rank
+    # of the positions they occupy
+    tied_rank = greater.sum(axis=1) + (tied.sum(axis=1) + 1) / 2
+    return greater | (tied & (tied_rank <= threshold)[:, None])
+
+
+def hold_validity(
+    validity: np.ndarray,
+    tolerance_timeframes: int,
+    holdable: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Keep the validity for a number of timeframes after the condition lapses.
+
+    The result is valid on a timeframe if the validity is true on the
+    timeframe or on any of the previous `tolerance_timeframes` timeframes.
+    It is equivalent to replacing the invalid values with missing values
+    and forward filling them with the limit of `tolerance_timeframes`, but
+    computed directly on the boolean array without upcasting it to hold
+    the missing values.
+
+    :param validity: Boolean array of validity. The first axis is the
+      timeframes.
+    :type validity: `numpy.ndarray`.
+    :param tolerance_timeframes: The number of timeframes to keep the
+      validity after the condition lapses.
+    :type tolerance_timeframes: `int`.
+    :param holdable: Optional boolean array broadcastable to the shape of
+      the validity, indicating the timeframes where the validity can be held.
+      The validity is not held through the timeframes which are invalid and
+      not holdable. Default is None, which means all the timeframes are
+      holdable.
+    :type holdable: `numpy.ndarray`.
+    :return: A boolean array in the same shape of the validity.
+    :rtype: `numpy.ndarray`.
+    """
+    validity = np.asarray(validity, dtype=bool)
+    if tolerance_timeframes <= 0 or validity.shape[0] == 0:
+        return validity.copy()
+
+    (result,) = hold_validity_sweep(
+        validity=validity,
+        tolerance_timeframes=[tolerance_timeframes],
+        holdable=holdable,
+    )
+    return result
+
+
+def hold_validity_sweep(
+    validity: np.ndarray,
+    tolerance_timeframes: Sequence[int],
+    holdable: Optional[np.ndarray] = None,
+) -> List[np.ndarray]:
+    """
+    Keep the validity for each of the numbers of timeframes after the
+    condition lapses.
+
+    The result of each number of timeframes is the same as
+    :func:`hold_validity`, but the positions of the last valid timeframes,
+    and of the last timeframes which break the holding, are accumulated only
+    once for all of them.
+
+    :param validity: Boolean array of validity. The first axis is the
+      timeframes.
+    :type validity: `numpy.ndarray`.
+    :param tolerance_timeframes: The numbers of timeframes to keep the
+      validity after the condition lapses.
+    :type tolerance_timeframes: `Sequence[int]`.
+    :param holdable: Optional boolean array broadcastable to the shape of
+      the validity. See :func:`hold_validity`.
+    :type holdable: `numpy.ndarray`.
+    :return: A list of boolean arrays in the same shape of the validity, in
+      the order of the numbers of timeframes.
+    :rtype: `list[numpy.ndarray]`.
+    """
+    validity = np.asarray(validity, dtype=bool)
+    if validity.shape[0] == 0:
+        return [validity.copy() for _ in tolerance_timeframes]
+
+    dtype = np.int32 if validity.shape[0] < np.iinfo(np.int32).max else np.int64
+    positions = np.arange(validity.shape[0], dtype=dtype).reshape(
+        (-1,) + (1,) * (validity.ndim - 1)
+    )
+    # Position of the last valid timeframe
+    last_valid = np.where(validity, positions, -1)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    # Number of timeframes since the last valid timeframe, or -1 if the
+    # validity cannot be held
+    elapsed = np.where(last_valid >= 0, positions - last_valid, -1)
+
+    if holdable is not None:
+        # Position of the last timeframe which breaks the holding
+        last_break = np.where(validity | holdable, -1, positions)
+        np.maximum.accumulate(last_break, axis=0, out=last_break)
+        elapsed[last_valid <= last_break] = -1
+
+    return [
+        (elapsed >= 0) & (elapsed <= max(tolerance, 0))
+        for tolerance in tolerance_timeframes
+    ]
+
+
+# Cost of verifying a candidate pair relative to hashing an instrument into
+# a signature bit, which are both linear in the timeframes, as measured on
+# the cross sections of 10,000 instruments
+_VERIFICATION_COST = 16
+
+
+def _lsh_bands(size: int, threshold: float, recall: float) -> Tuple[int, int]:
+    """
+    Return the number of bits in each band, and the number of bands, of the
+    signatures to find the pairs correlated above the threshold with the
+    probability of the recall.
+
+    Two signature bits of the instruments with correlation rho collide with
+    the probability `1 - arccos(rho) / pi`, so a pair collides in any band
+    with the probability `1 - (1 - p ** bits) ** bands`. The bits in each
+    band minimize the cost of hashing the instruments, which is linear in
+    the bits, and verifying the uncorrelated pairs colliding by chance.
+    """
+    probability = 1 - np.arccos(threshold) / np.pi
+    best = None
+    for bits in range(1, 63):
+        band_probability = probability**bits
+        if band_probability >= 1:
+            bands = 1
+        elif band_probability <= 0:
+            break
+        else:
+            bands = int(np.ceil(np.log1p(-recall) / np.log1p(-band_probability)))
+        # The uncorrelated pairs collide with the probability 0.5 ** bits in
+        # each band, for both the signatures and the complemented ones
+        cost = bands * (bits * size + _VERIFICATION_COST * size * size * 0.5**bits)
+        if best is None or cost < best[0]:
+            best = (cost, bits, max(bands, 1))
+    return best[1], best[2]
+
+
+def _bucket_pairs(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the positions of all the pairs of the equal keys.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    group_ends = np.repeat(
+        np.append(boundaries, len(keys)),
+        np.diff(np.concatenate([[0], boundaries, [len(keys)]])),
+    )
+    # Each position is paired with the following positions of its group
+    counts = group_ends - np.arange(len(keys)) - 1
+    left = np.repeat(np.arange(len(keys)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    right = left + 1 + offsets
+    return order[left], order[right]
+
+
+def pair_correlations(
+    values: np.ndarray,
+    left: np.ndarray,
+    right: np.ndarray,
+    chunk_size: int = 1 << 22,
+) -> np.ndarray:
+    """
+    Compute the Pearson correlations of the pairs of the columns.
+
+    The correlation of each pair is computed over the rows both values
+    exist, which is the same as `DataFrame.corr`. The correlation is missing
+    if the pair has less than two rows or no variance.
+
+    :param values: Two dimensional array of values. The rows are the
+      timeframes and the columns are the instruments.
+    :type values: `numpy.ndarray`.
+    :param left: The columns of the first instruments of the pairs.
+    :type left: `numpy.ndarray`.
+    :param right: The columns of the second instruments of the pairs.
+    :type right: `numpy.ndarray`.
+    :param chunk_size: The maximum number of values of each instrument
+      gathered at once.
+    :type chunk_size: `int`.
+    :return: The correlations of the pairs.
+    :rtype: `numpy.ndarray`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    correlations = np.empty(len(left), dtype=np.float64)
+    step = max(chunk_size // max(values.shape[0], 1), 1)
+    for start in range(0, len(left), step):
+        stop = start + step
+        mask = valid[:, left[start:stop]] & valid[:, right[start:stop]]
+        x = np.where(mask, values[:, left[start:stop]], 0)
+        y = np.where(mask, values[:, right[start:stop]], 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            counts = mask.sum(axis=0)
+            x = np.where(mask, x - x.sum(axis=0) / counts, 0)
+            y = np.where(mask, y - y.sum(axis=0) / counts, 0)
+            correlation = (x * y).sum(axis=0) / np.sqrt(
+                (x * x).sum(axis=0) * (y * y).sum(axis=0)
+            )
+        correlation[counts < 2] = np.nan
+        correlations[start:stop] = correlation
+    return correlations
+
+
+def correlated_pairs(
+    values: np.ndarray,
+    threshold: float,
+    recall: float = 0.99,
+    random_state: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the pairs of the columns whose absolute correlations are above the
+    threshold, without computing the correlations of all the pairs.
+
+    The standardized values of each instrument are hashed into the sign bits
+    of the random projections (SimHash), where the bits collide with the
+    probability increasing with the correlation. The bits are split into
+    bands, and the pairs sharing any band are the candidates. The pairs of
+    the negative correlations share the complemented bands instead. The
+    correlations of the candidates are then verified exactly, so the pairs
+    returned are never false positives, while each pair above the threshold
+    is missed with the probability of at most `1 - recall` if the values are
+    complete. Missing values are regarded as the means in the hashing.
+
+    :param values: Two dimensional array of values. The rows are the
+      timeframes and the columns are the instruments.
+    :type values: `numpy.ndarray`.
+    :param threshold: The threshold of the absolute correlation, which should
+      be between 0 and 1.
+    :type threshold: `float`.
+    :param recall: The target probability to find each pair above the
+      threshold, which should be between 0 and 1 exclusive. The cost
+      increases with the recall.
+    :type recall: `float`.
+    :param random_state: The seed of the random projections.
+    :type random_state: `int`.
+    :return: The columns of the first and second instruments of the pairs,
+      where the first column is smaller than the second one, sorted.
+    :rtype: `tuple[numpy.ndarray, numpy.ndarray]`.
+    """
+    if not (0 <= threshold <= 1):
+        raise ValueError(f"Threshold {threshold} must be between 0 and 1")
+    if not (0 < recall < 1):
+        raise ValueError(f"Recall {recall} must be between 0 and 1 exclusive")
+
+    values = np.asarray(values, dtype=np.float64)
+    empty = np.empty(0, dtype=np.int64)
+    valid = ~np.isnan(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        counts = valid.sum(axis=0)
+        means = np.where(valid, values, 0).sum(axis=0) / counts
+        centered = np.where(valid, values - means, 0)
+        scales = np.sqrt((centered * centered).sum(axis=0))
+    # The instruments without variance are never correlated
+    columns = np.flatnonzero((counts >= 2) & (scales > 0))
+    if len(columns) < 2:
+        return empty, empty
+    # The standardized values of each instrument are contiguous, so the
+    # values of the instruments of the pairs are gathered by rows
+    standardized = np.ascontiguousarray((centered[:, columns] / scales[columns]).T)
+
+    bits, bands = _lsh_bands(len(columns), threshold, recall)
+    projections = np.random.default_rng(random_state).standard_normal(
+        (values.shape[0], bits * bands)
+    )
+    signs = (standardized @ projections > 0).reshape(len(columns), bands, bits)
+    keys = signs.astype(np.int64) @ (np.int64(1) << np.arange(bits, dtype=np.int64))
+    complements = ~keys & ((np.int64(1) << bits) - 1)
+
+    size = len(columns)
+    ids = np.tile(np.arange(size, dtype=np.int64), 2)
+    candidates = []
+    for band in range(bands):
+        left, right = _bucket_pairs(
+            np.concatenate([keys[:, band], complements[:, band]])
+        )
+        left, right = ids[left], ids[right]
+        distinct = left != right
+        left, right = left[distinct], right[distinct]
+        candidates.append(np.minimum(left, right) * size + np.maximum(left, right))
+    candidates = np.unique(np.concatenate(candidates))
+    left, right = candidates // size, candidates % size
+
+    # The correlations of the complete instruments are the inner products of
+    # the standardized values, and the others are computed over the rows
+    # both values exist
+    correlations = np.empty(len(left), dtype=np.float64)
+    step = max((1 << 22) // max(values.shape[0], 1), 1)
+    for start in range(0, len(left), step):
+        stop = start + step
+        correlations[start:stop] = np.einsum(
+            "ij,ij->i",
+            standardized[left[start:stop]],
+            standardized[right[start:stop]],
+        )
+    incomplete = counts[columns] < values.shape[0]
+    incomplete = np.flatnonzero(incomplete[left] | incomplete[right])
+    correlations[incomplete] = pair_correlations(
+        values, left=columns[left[incomplete]], right=columns[right[incomplete]]
+    )
+    above = np.abs(correlations) > threshold
+    return columns[left[above]], columns[right[above]]
@@ -0,0 +1,216 @@
+import json
+import logging
+from os import listdir, stat
+from os.path import basename, exists
+from os.path import join as fsjoin
+from os.path import splitext
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .compression import strip_compression
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".fpm_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_symbol(file_name: str) -> str:
+    """
+    Return the symbol of a data file, i.e. the file name without the
+    compression extension, if any, and the file format extension.
+
+    Parameters
+    ----------
+    file_name : str
+        The data file name.
+    """
+    return basename(splitext(strip_compression(file_name))[0])
+
+
+class DirectoryManifest:
+    """
+    Directory manifest.
+
+    The manifest is a json file in a data directory, indexing the data files
+    by their symbols with their sizes, modification times, row counts and
+    date ranges. Loading the files of the symbols by the manifest requires
+    only hashed lookups instead of scanning the directory.
+
+    The manifest is regenerated from the directory listing when the
+    modification time of the directory changes, i.e. files are added,
+    removed or renamed. The statistics of a file are refreshed when the file
+    is loaded and its size or modification time changes.
+    """
+
+    def __init__(self, directory: str, file_name: str = MANIFEST_FILE_NAME):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        directory : str
+            The data directory.
+        file_name : str
+            The manifest file name in the directory.
+        """
+        self._directory = directory
+        self._file_name = file_name
+        self._path = fsjoin(directory, file_name)
+        self._modified = False
+        self._directory_mtime_ns = stat(directory).st_mtime_ns
+
+        manifest = self._read()
+        if (
+            manifest is None
+            or manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("directory_mtime_ns") != self._directory_mtime_ns
+        ):
+            manifest = self._generate(manifest)
+        self._files = manifest["files"]
+        self._symbols = {}
+        for name in self._files.keys():
+            self._symbols.setdefault(file_symbol(name), []).append(name)
+        # The generated manifest is saved at once, so it is persisted even
+        # if the files are only accessed lazily afterwards
+        self.save()
+
+    @property
+    def path(self) -> str:
+        """
+        Return the path of the manifest file.
+        """
+        return self._path
+
+    @property
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the file entries keyed by the file names.
+        """
+        return self._files
+
+    def file_names(self, includes: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Return the data file names.
+
+        Parameters
+        ----------
+        includes : Optional[Iterable[str]]
+            The symbols to include. Default is None which means all the
+            data files.
+        """
+        if includes is None:
+            return list(self._files.keys())
+
+        return [
+            name
+            for symbol in dict.fromkeys(includes)
+            for name in self._symbols.get(symbol, [])
+        ]
+
+    def record(self, file_name: str, data: Any) -> None:
+        """
+        Record the statistics of a loaded data file if they are changed.
+
+        Parameters
+        ----------
+        file_name : str
+            The data file name.
+        data : Any
+            The loaded data of the file.
+        """
+        file_stat = stat(fsjoin(self._directory, file_name))
+        entry = self._files.get(file_name, {})
+        if (
+            entry.get("size") == file_stat.st_size
+            and entry.get("mtime_ns") == file_stat.st_mtime_ns
+            and "rows" in entry
+        ):
+            return
+
+        entry = {
+            "symbol": file_symbol(file_name),
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+            **DirectoryManifest._data_statistics(data),
+        }
+        self._files[file_name] = entry
+        self._symbols.setdefault(entry["symbol"], [])
+        if file_name not in self._symbols[entry["symbol"]]:
+            self._symbols[entry["symbol"]].append(file_name)
+        self._modified = True
+
+    def save(self) -> None:
+        """
+        Save the manifest if it is modified.
+
+        The manifest is rewritten in place, so only its first creation
+        changes the modification time of the directory.
+        """
+        if not self._modified:
+            return
+
+        try:
+            if not exists(self._path):
+                open(self._path, "a").close()
+                self._directory_mtime_ns = stat(self._directory).st_mtime_ns
+            with open(self._path, "r+") as fp:
+                json.dump(
+                    {
+                        "version": MANIFEST_VERSION,
+                        "directory_mtime_ns": self._directory_mtime_ns,
+                        "files": self._files,
+                    },
+                    fp,
+                )
+                fp.truncate()
+        except OSError as e:
+            LOGGER.warning(f"Failed to save the manifest {self._path}: {e}")
+            return
+
+        self._modified = False
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the manifest file, or return None if it is missing or corrupted.
+        """
+        try:
+            with open(self._path) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def _generate(self, manifest: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate the manifest from the directory listing, and keep the
+        entries of the existing manifest for the files still in place.
+        """
+        LOGGER.info(f"Generating the manifest of directory {self._directory}")
+        previous_files = (manifest or {}).get("files", {})
+        self._modified = True
+        return {
+            "files": {
+                name: previous_files.get(name, {"symbol": file_symbol(name)})
+                for name in listdir(self._directory)
+                if name != self._file_name
+            }
+        }
+
+    @staticmethod
+    def _data_statistics(data: Any) -> Dict[str, Any]:
+        """
+        Return the row count and date range of the loaded data.
+        """
+        if not isinstance(data, (pd.DataFrame, pd.Series)):
+            return {"rows": None, "start": None, "last": None}
+
+        statistics = {"rows": len(data), "start": None, "last": None}
+        if len(data) > 0:
+            try:
+                statistics["start"] = str(data.index.min())
+                statistics["last"] = str(data.index.max())
+            except TypeError:
+                # Index labels which are not comparable with each other
+                pass
+        return statistics
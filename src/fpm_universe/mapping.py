@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from os.path import basename, getsize
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .manifest import DirectoryManifest
+
+
+class LazyDataMapping(Mapping):
+    """
+    Lazy data mapping.
+
+    The mapping of keys to data files, which are parsed on the first access
+    instead of on construction. The parsed values are cached, either
+    without a bound or in a least recently used cache of a bounded size,
+    where the evicted values are parsed again on the next access.
+    """
+
+    def __init__(
+        self,
+        paths: Dict[str, str],
+        reader: Callable[[str], Any],
+        cache_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        manifest: Optional[DirectoryManifest] = None,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        paths : Dict[str, str]
+            Dictionary of keys and the file paths.
+        reader : Callable[[str], Any]
+            Function to parse a file path into a value.
+        cache_size : Optional[int]
+            The maximum number of parsed values to cache. Default is None
+            which means caching all the parsed values.
+        max_workers : Optional[int]
+            The number of threads to parse the files in `prefetch`. Default
+            is None which means parsing the files sequentially.
+        manifest : Optional[DirectoryManifest]
+            The manifest of the directory to record the parsed files. It is
+            saved after each prefetch and `to_dict`.
+        """
+        if cache_size is not None and cache_size <= 0:
+            raise ValueError(f"Cache size {cache_size} must be positive")
+
+        self._paths = paths
+        self._reader = reader
+        self._cache_size = cache_size
+        self._max_workers = max_workers
+        self._manifest = manifest
+        self._cache = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        try:
+            path = self._paths[key]
+        except KeyError:
+            raise KeyError(f"Key {key} is not found in the data mapping")
+
+        value = self._reader(path)
+        self._store(key, value)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._paths
+
+    def is_loaded(self, key: str) -> bool:
+        """
+        Return whether the value of the key is parsed and cached.
+
+        Parameters
+        ----------
+        key : str
+            The key of the value.
+        """
+        with self._lock:
+            return key in self._cache
+
+    def prefetch(self, keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Parse the values of the keys which are not cached yet.
+
+        Parameters
+        ----------
+        keys : Optional[Iterable[str]]
+            The keys to parse. Default is None which means all the keys.
+        """
+        keys = [
+            key
+            for key in (self._paths.keys() if keys is None else keys)
+            if not self.is_loaded(key)
+        ]
+        for _ in self._parse(keys):
+            pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Parse the values which are not cached yet, and return all the values
+        in a dictionary.
+
+        The values are collected as they are parsed, so each file is parsed
+        once even if the cache is bounded.
+        """
+        with self._lock:
+            values = {
+                key: self._cache[key] for key in self._paths if key in self._cache
+            }
+        values.update(self._parse([key for key in self._paths if key not in values]))
+        return {key: values[key] for key in self._paths}
+
+    def _parse(self, keys: List[str]) -> Iterator[Tuple[str, Any]]:
+        """
+        Parse and cache the values of the keys, and yield the keys and the
+        parsed values. The manifest is saved once all the values are parsed.
+        """
+        missing_keys = [key for key in keys if key not in self._paths]
+        if missing_keys:
+            raise KeyError(f"Keys {missing_keys} are not found in the data mapping")
+
+        if self._max_workers is None or len(keys) <= 1:
+            for key in keys:
+                value = self._reader(self._paths[key])
+                self._store(key, value)
+                yield key, value
+        else:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                values = executor.map(self._reader, [self._paths[key] for key in keys])
+                for key, value in zip(keys, values):
+                    self._store(key, value)
+                    yield key, value
+
+        if self._manifest is not None:
+            self._manifest.save()
+
+    def _store(self, key: str, value: Any) -> None:
+        """
+        Cache the parsed value and evict the least recently used values.
+        """
+        try:
+            size = getsize(self._paths[key])
+        except OSError:
+            size = 0
+        with self._lock:
+            self.misses += 1
+            self.bytes_read += size
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            if self._cache_size is not None:
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        if self._manifest is not None:
+            self._manifest.record(file_name=basename(self._paths[key]), data=value)
@@ -0,0 +1,248 @@
+import logging
+import re
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .universe import IntervalUniverse
+from .utils import atomic_path
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+LOGGER = logging.getLogger(__name__)
+
+METRIC_PREFIX = "fpm_universe"
+
+# Characters not allowed in the label names of OpenMetrics
+_INVALID_LABEL_CHARACTERS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class MetricsRecorder:
+    """
+    Metrics recorder.
+
+    The recorder collects the gauges of a run, e.g. the durations, the sizes
+    of the results and the cache hit rates, and writes them in the
+    OpenMetrics text format, which is collected by the textfile collector
+    of the Prometheus node exporter. The common labels, e.g. the name of
+    the configuration and the parameters, are added to every sample.
+    """
+
+    def __init__(self, labels: Optional[Dict[str, Any]] = None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        labels : Optional[Dict[str, Any]]
+            The common labels of the samples. The invalid characters of the
+            label names are replaced with underscores.
+        """
+        self._labels = {
+            _label_name(name): str(value) for name, value in (labels or {}).items()
+        }
+        # Descriptions and samples of the metrics in the order recorded
+        self._descriptions: Dict[str, str] = {}
+        self._samples: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+
+    def set(self, name: str, value: float, description: str, **labels: Any) -> None:
+        """
+        Set the value of a gauge.
+
+        Parameters
+        ----------
+        name : str
+            The name of the metric without the prefix `fpm_universe_`.
+        value : float
+            The value of the sample.
+        description : str
+            The description of the metric.
+        labels : Any
+            The labels of the sample in addition to the common labels.
+        """
+        name = f"{METRIC_PREFIX}_{name}"
+        self._descriptions.setdefault(name, description)
+        key = tuple(
+            sorted(
+                {
+                    **self._labels,
+                    **{_label_name(k): str(v) for k, v in labels.items()},
+                }.items()
+            )
+        )
+        self._samples.setdefault(name, {})[key] = float(value)
+
+    @contextmanager
+    def timer(self, name: str, description: str, **labels: Any) -> Iterator[None]:
+        """
+        Record the duration of the block in seconds, even if it raises.
+
+        Parameters
+        ----------
+        name : str
+            The name of the metric without the prefix `fpm_universe_`.
+        description : str
+            The description of the metric.
+        labels : Any
+            The labels of the sample in addition to the common labels.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.set(name, time.perf_counter() - start, description, **labels)
+
+    def record_value(self, kind: str, value: Any, **labels: Any) -> None:
+        """
+        Record the rows, columns and bytes of a value, e.g. a data or a
+        pipeline result. The values other than the dataframes, series,
+        interval universes and numpy arrays are skipped.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of the value, e.g. `data` or `pipeline`, which is the
+            prefix of the metrics.
+        value : Any
+            The value.
+        labels : Any
+            The labels of the samples in addition to the common labels.
+        """
+        size = _value_size(value)
+        if size is None:
+            return
+        rows, columns, nbytes = size
+        self.set(f"{kind}_rows", rows, f"Number of rows of the {kind}", **labels)
+        self.set(
+            f"{kind}_columns", columns, f"Number of columns of the {kind}", **labels
+        )
+        self.set(f"{kind}_bytes", nbytes, f"Memory size of the {kind}", **labels)
+
+    def record_cache(self, cache: str, hits: int, misses: int) -> None:
+        """
+        Record the hits, misses and hit ratio of a cache.
+
+        Parameters
+        ----------
+        cache : str
+            The name of the cache.
+        hits : int
+            The number of hits.
+        misses : int
+            The number of misses.
+        """
+        self.set("cache_hits", hits, "Number of cache hits", cache=cache)
+        self.set("cache_misses", misses, "Number of cache misses", cache=cache)
+        self.set(
+            "cache_hit_ratio",
+            hits / (hits + misses) if hits + misses else 0.0,
+            "Ratio of the cache hits to the lookups",
+            cache=cache,
+        )
+
+    def record_peak_memory(self) -> None:
+        """
+        Record the peak resident set size of the process, if supported by
+        the platform.
+        """
+        if resource is None:  # pragma: no cover
+            return
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # The size is in kilobytes on Linux and in bytes on macOS
+        if sys.platform != "darwin":
+            peak *= 1024
+        self.set("peak_rss_bytes", peak, "Peak resident set size of the process")
+
+    def to_text(self) -> str:
+        """
+        Return the metrics in the OpenMetrics text format.
+        """
+        lines = []
+        for name, samples in self._samples.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"# HELP {name} {_escape(self._descriptions[name])}")
+            for labels, value in samples.items():
+                label_text = ",".join(
+                    f'{label}="{_escape(label_value)}"' for label, label_value in labels
+                )
+                if label_text:
+                    label_text = f"{{{label_text}}}"
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write the metrics into the file atomically, so the collector never
+        reads a partial file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the metrics file.
+        """
+        with atomic_path(path) as temporary_path:
+            with open(temporary_path, "w") as fp:
+                fp.write(self.to_text())
+        LOGGER.info(f"Wrote the metrics to {path}")
+
+
+def _label_name(name: str) -> str:
+    """
+    Return the valid label name of OpenMetrics.
+    """
+    name = _INVALID_LABEL_CHARACTERS.sub("_", str(name))
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    return name
+
+
+def _escape(value: str) -> str:
+    """
+    Escape the label value or the description.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    """
+    Format the sample value, where the integers are formatted without the
+    decimal places.
+    """
+    if np.isnan(value):
+        return "NaN"
+    if np.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _value_size(value: Any) -> Optional[Tuple[int, int, int]]:
+    """
+    Return the rows, columns and bytes of the value, or None if the value is
+    not supported.
+    """
+    if isinstance(value, pd.DataFrame):
+        return (
+            value.shape[0],
+            value.shape[1],
+            int(value.memory_usage(index=True).sum()),
+        )
+    if isinstance(value, pd.Series):
+        return len(value), 1, int(value.memory_usage(index=True))
+    if isinstance(value, IntervalUniverse):
+        rows, columns = value.shape
+        return rows, columns, int(value.intervals.memory_usage(index=True).sum())
+    if isinstance(value, np.ndarray):
+        rows = value.shape[0] if value.ndim > 0 else 1
+        columns = int(np.prod(value.shape[1:])) if value.ndim > 1 else 1
+        return rows, columns, value.nbytes
+    return None
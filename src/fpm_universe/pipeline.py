@@ -1,21 +1,76 @@
 import logging
 from datetime import datetime
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from numpy import nan
 
-from .utils import to_timestamp
+from .correlations import CorrelationCache
+from .kernels import correlated_pairs, hold_validity, top_rank_validity
+from .registry import declare
+from .universe import IntervalUniverse, ValidityCombiner
+from .utils import (
+    lookback_window,
+    make_datetime_range,
+    shift_datetime_range,
+    to_timestamp,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _float_dtype(values: pd.DataFrame) -> np.dtype:
+    """
+    Return the float dtype to compute the values in, which keeps the
+    precision of float values, e.g. float32 by the dtype policy.
+    """
+    dtypes = set(values.dtypes)
+    if len(dtypes) == 1:
+        dtype = dtypes.pop()
+        if isinstance(dtype, np.dtype) and dtype.kind == "f":
+            return dtype
+    return np.dtype(np.float64)
+
+
+def _valid_ranges(
+    values: List[Dict[str, str]],
+    start_datetime: pd.Timestamp,
+    last_datetime: pd.Timestamp,
+) -> Dict[str, Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Return the valid datetime ranges of the instruments, both inclusive,
+    clipped to the universe start and last datetimes.
+    """
+    ranges = {}
+    for value in values:
+        symbol = value["symbol"]
+        valid_start_datetime = to_timestamp(value.get("valid_start_datetime"))
+        valid_last_datetime = to_timestamp(value.get("valid_last_datetime"))
+        if not valid_start_datetime:
+            raise ValueError(f"Missing 'valid_start_datetime' key in value {value}")
+
+        if valid_start_datetime <= start_datetime:
+            valid_start_datetime = start_datetime
+        if valid_last_datetime is None or valid_last_datetime >= last_datetime:
+            valid_last_datetime = last_datetime
+        if valid_start_datetime >= valid_last_datetime:
+            LOGGER.warning(
+                f"No valid range is found between {start_datetime} and {last_datetime} "
+                f"for {symbol}"
+            )
+        ranges[symbol] = (valid_start_datetime, valid_last_datetime)
+    return ranges
+
+
+@declare(pure=True, column_separable=True)
 def range_validity(
     values: List[Dict[str, str]],
     start_datetime: Union[str, datetime, pd.Timestamp],
     last_datetime: Union[str, datetime, pd.Timestamp],
     frequency: str,
-) -> pd.DataFrame:
+    sparse: bool = False,
+) -> Union[pd.DataFrame, IntervalUniverse]:
     """
     Include the instrument into universe by the datetime range of validity.
 
@@ -26,47 +81,40 @@ def range_validity(
     :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
     :param last_datetime: The universe last datetime.
     :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
-    :param frequency: The frequency string supported in pandas. For further
+    :param frequency: The frequency string supported in pandas, or the
+        calendar frequency of the trading timestamps. For further
         details, please refer to
         [link](https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases)
     :type frequency: `str`
-    :return: A dataframe indicating whether the instrument is included in
-      the universe.
-    :rtype: `pd.DataFrame`.
+    :param sparse: Indicates to return the universe in intervals instead of
+      a dense dataframe. Default is False.
+    :type sparse: `bool`
+    :return: A dataframe, or an interval universe if `sparse` is True,
+      indicating whether the instrument is included in the universe.
+    :rtype: `pd.DataFrame` or :class:`fpm_universe.universe.IntervalUniverse`.
     """
     start_datetime = to_timestamp(start_datetime)
     last_datetime = to_timestamp(last_datetime)
-    datetime_range = pd.date_range(
-        start=start_datetime,
-        end=last_datetime,
-        freq=frequency,
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
         name="datetime",
     )
-    default_validity = pd.Series(False, index=datetime_range)
-    universe = {}
-    for value in values:
-        symbol = value["symbol"]
-        valid_start_datetime = to_timestamp(value.get("valid_start_datetime"))
-        valid_last_datetime = to_timestamp(value.get("valid_last_datetime"))
-        if not valid_start_datetime:
-            raise ValueError(f"Missing 'valid_start_datetime' key in value {value}")
-
-        instrument_validity = default_validity.copy()
-        if valid_start_datetime <= start_datetime:
-            valid_start_datetime = start_datetime
-        if valid_last_datetime is None or valid_last_datetime >= last_datetime:
-            valid_last_datetime = last_datetime
-        if valid_start_datetime >= valid_last_datetime:
-            LOGGER.warning(
-                f"No valid range is found between {start_datetime} and {last_datetime} "
-                f"for {symbol}"
-            )
-        instrument_validity.loc[valid_start_datetime:valid_last_datetime] = True
-        universe[symbol] = instrument_validity
+    universe = IntervalUniverse.from_ranges(
+        index=datetime_range,
+        ranges=_valid_ranges(
+            values=values, start_datetime=start_datetime, last_datetime=last_datetime
+        ),
+    )
+    if sparse:
+        return universe
 
-    return pd.DataFrame(universe)
+    return universe.to_dense()
 
 
+@declare(pure=True)
+@lookback_window(lambda tolerance_timeframes, **_: tolerance_timeframes)
 def ranking(
     values: pd.DataFrame,
     threshold_pct: float,
@@ -102,7 +150,8 @@ def ranking(
     :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
     :param last_datetime: The universe last datetime.
     :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
-    :param frequency: The frequency string supported in pandas. For further
+    :param frequency: The frequency string supported in pandas, or the
+        calendar frequency of the trading timestamps. For further
         details, please refer to
         [link](https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases)
     :type frequency: `str`
@@ -112,27 +161,40 @@ def ranking(
         raise ValueError(
             f"Threshold percentage {threshold_pct} must be between 0 and 1"
         )
-    datetime_range = pd.date_range(
-        start=start_datetime,
-        end=last_datetime,
-        freq=frequency,
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
         name="datetime",
     )
-    rank_values = values.rank(axis=1, ascending=False)
-    num_instruments = values.notnull().sum(axis=1)
-    threshold = num_instruments * threshold_pct
-    result = (
-        rank_values.le(threshold, axis=0)
-        .replace(False, nan)
-        .reindex(index=datetime_range)
-    )
+    result = pd.DataFrame(
+        top_rank_validity(
+            values=values.to_numpy(dtype=_float_dtype(values), na_value=nan),
+            threshold_pct=threshold_pct,
+        ),
+        index=values.index,
+        columns=values.columns,
+    ).reindex(index=datetime_range, fill_value=False)
 
     if tolerance_timeframes > 0:
-        result = result.ffill(limit=tolerance_timeframes)
+        result = pd.DataFrame(
+            hold_validity(
+                validity=result.to_numpy(),
+                tolerance_timeframes=tolerance_timeframes,
+            ),
+            index=result.index,
+            columns=result.columns,
+        )
 
-    return result.fillna(False)
+    return result
 
 
+@declare(pure=True, column_separable=True)
+@lookback_window(
+    lambda rolling_window, tolerance_timeframes, **_: (
+        rolling_window + tolerance_timeframes
+    )
+)
 def rolling_validity(
     values: pd.DataFrame,
     threshold_pct: float,
@@ -165,57 +227,108 @@ def rolling_validity(
     :return: A dataframe indicating whether the instrument is included in
       the universe.
     :param tolerance_timeframes: The number of timeframes to allow the
-      instrument stays in the universe even its values is outside of the
-      threshold percentage. Default is 21.
+      instrument stays in the universe on the timeframes missing in the
+      values. Default is 21.
     :type tolerance_timeframes: `int`.
     :param start_datetime: The universe start datetime.
     :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
     :param last_datetime: The universe last datetime.
     :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
-    :param frequency: The frequency string supported in pandas. For further
+    :param frequency: The frequency string supported in pandas, or the
+        calendar frequency of the trading timestamps. For further
         details, please refer to
         [link](https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases)
     :type frequency: `str`
     :rtype: `pd.DataFrame`.
     """
-    datetime_range = pd.date_range(
-        start=start_datetime,
-        end=last_datetime,
-        freq=frequency,
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
         name="datetime",
     )
-    result = (
+    validity = (
         values.notnull().rolling(window=rolling_window, min_periods=1).sum()
         >= threshold_pct * rolling_window
-    ).reindex(index=datetime_range)
+    )
+    result = validity.reindex(index=datetime_range, fill_value=False)
 
     if tolerance_timeframes > 0:
-        result = result.ffill(limit=tolerance_timeframes)
+        # The validity is held only through the timeframes missing in the
+        # values, and not through the ones failing the threshold
+        result = pd.DataFrame(
+            hold_validity(
+                validity=result.to_numpy(),
+                tolerance_timeframes=tolerance_timeframes,
+                holdable=~datetime_range.isin(validity.index)[:, None],
+            ),
+            index=result.index,
+            columns=result.columns,
+        )
 
     return result
 
 
-def combine_validity(*args: List[pd.DataFrame]) -> pd.DataFrame:
+@declare(pure=True, column_separable=True)
+def combine_validity(
+    *args: List[Union[pd.DataFrame, IntervalUniverse]]
+) -> Union[pd.DataFrame, IntervalUniverse]:
     """
     Combine validity.
 
+    If all the validities are interval universes, the result is their
+    intersection in an interval universe. Otherwise, the validities are
+    intersected into a new boolean dataframe on the index and columns of
+    the first validity, where the datetimes, symbols and values missing in
+    any validity are regarded as invalid.
+
     Parameters
     ----------
-    args : List[pd.DataFrame]
-      List of validity dataframes, each of which is produced by
-      a single pipeline.
+    args : List[Union[pd.DataFrame, IntervalUniverse]]
+      List of validity dataframes or interval universes, each of which is
+      produced by a single pipeline.
     """
-    final_validity = None
+    if args and all(isinstance(validity, IntervalUniverse) for validity in args):
+        return args[0].intersection(*args[1:])
 
+    combiner = ValidityCombiner()
     for validity in args:
-        if final_validity is None:
-            final_validity = validity
-        else:
-            final_validity &= validity
+        combiner.add(validity)
 
-    return final_validity
+    return combiner.result
 
 
+def _cached_validity(
+    t_ranks: pd.Series, pairs: Tuple[np.ndarray, np.ndarray], columns: pd.Index
+) -> pd.Series:
+    """
+    Exclude the lower ranked instruments of the pairs correlated above the
+    threshold, which are screened from the cached correlations.
+    """
+    if t_ranks.isnull().all():
+        return pd.Series(nan, index=t_ranks.index)
+    t_ranks = t_ranks.sort_values()
+    t_validity = t_ranks.notnull()
+    # Positions of the instruments in the rank order, or missing if they are
+    # not ranked
+    positions = (
+        pd.Series(np.arange(len(t_ranks)), index=t_ranks.index, dtype=np.float64)
+        .where(t_validity)
+        .reindex(columns)
+        .to_numpy()
+    )
+    left, right = pairs
+    left_positions, right_positions = positions[left], positions[right]
+    ranked = ~np.isnan(left_positions) & ~np.isnan(right_positions)
+    lower_ranked = np.where(left_positions < right_positions, right, left)[ranked]
+    t_validity[columns[np.unique(lower_ranked)]] = False
+    return t_validity
+
+
+@declare(pure=True)
+@lookback_window(
+    lambda rolling_window, **_: rolling_window, inputs=("values", "rankings")
+)
 def rolling_correlation_rank_validity(
     values: pd.DataFrame,
     rankings: pd.DataFrame,
@@ -224,6 +337,10 @@ def rolling_correlation_rank_validity(
     start_datetime: Union[str, datetime, pd.Timestamp],
     last_datetime: Union[str, datetime, pd.Timestamp],
     frequency: str,
+    method: str = "exact",
+    recall: float = 0.99,
+    random_state: int = 0,
+    cache_directory: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Exclude instruments if the correlations are too high and only the higher
@@ -245,14 +362,40 @@ def rolling_correlation_rank_validity(
     :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
     :param last_datetime: The universe last datetime.
     :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
-    :param frequency: The frequency string supported in pandas. For further
+    :param frequency: The frequency string supported in pandas, or the
+        calendar frequency of the trading timestamps. For further
         details, please refer to
         [link](https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases)
     :type frequency: `str`.
+    :param method: The method to find the pairs above the threshold, either
+      "exact" to compute the correlations of all the pairs, or "approximate"
+      to verify only the candidate pairs screened by random projections,
+      which scales to large cross sections. See
+      :func:`fpm_universe.kernels.correlated_pairs`.
+    :type method: `str`.
+    :param recall: The target recall of the pairs above the threshold in the
+      approximate method.
+    :type recall: `float`.
+    :param random_state: The seed of the random projections in the
+      approximate method.
+    :type random_state: `int`.
+    :param cache_directory: The directory to cache the correlation matrices
+      in the exact method, keyed by the values, the datetimes and the
+      rolling window. The runs with the other thresholds or rankings screen
+      the cached correlations, which are in float32, instead of recomputing
+      them. Default is None which means no cache.
+    :type cache_directory: `str`.
     :return: A dataframe indicating whether the instrument is included in
       the universe.
     :rtype: `pd.DataFrame`.
     """
+    if method not in ("exact", "approximate"):
+        raise ValueError(
+            f"Method {method} is not supported. Supported methods are "
+            "exact and approximate"
+        )
+    if cache_directory is not None and method != "exact":
+        raise ValueError("Correlation cache is only supported in the exact method")
 
     def _validity(
         t_ranks,
@@ -263,6 +406,18 @@ def rolling_correlation_rank_validity(
             return pd.Series(nan, index=t_ranks.index)
         t_ranks = t_ranks.sort_values()
         t_validity = t_ranks.notnull()
+        if method == "approximate":
+            # The instruments are in the rank order, so the second instrument
+            # of each pair is the lower ranked one
+            ranked = t_ranks.index[t_validity]
+            _, lower_ranked = correlated_pairs(
+                t_values.loc[:, ranked].to_numpy(dtype=np.float64, na_value=nan),
+                threshold=threshold_pct,
+                recall=recall,
+                random_state=random_state,
+            )
+            t_validity[ranked[np.unique(lower_ranked)]] = False
+            return t_validity
         t_ranks = {index: r for r, index in enumerate(t_ranks.index)}
         t_corr = t_values.loc[:, t_validity].corr().stack()
         cp_t_ranks = t_corr.index.get_level_values(0).map(
@@ -273,14 +428,41 @@ def rolling_correlation_rank_validity(
         t_validity[too_correlated_index] = False
         return t_validity
 
-    datetime_range = pd.date_range(
-        start=start_datetime,
-        end=last_datetime,
-        freq=frequency,
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
         name="datetime",
     )
-    start_window_datetime_range = datetime_range.shift(-rolling_window)
+    start_window_datetime_range = shift_datetime_range(
+        datetime_range=datetime_range, periods=-rolling_window, frequency=frequency
+    )
     validity = {}
+    if cache_directory is not None:
+        cache = CorrelationCache(cache_directory)
+        key = CorrelationCache.key(
+            values=values, datetime_range=datetime_range, rolling_window=rolling_window
+        )
+        entry = cache.get(key)
+        if entry is None:
+            entry = cache.put(
+                key=key,
+                datetimes=datetime_range,
+                columns=values.columns,
+                correlations=lambda i: values.loc[
+                    start_window_datetime_range[i] : datetime_range[i]  # noqa: E203
+                ]
+                .corr()
+                .to_numpy(),
+            )
+        for et in datetime_range:
+            validity[et] = _cached_validity(
+                t_ranks=rankings.loc[et],
+                pairs=entry.pairs(et, threshold=threshold),
+                columns=values.columns,
+            )
+        return pd.concat(validity, axis=1).T
+
     for i in range(len(datetime_range)):
         st = start_window_datetime_range[i]
         et = datetime_range[i]
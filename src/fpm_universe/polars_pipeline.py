@@ -0,0 +1,338 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+from numpy import nan
+
+from . import pipeline
+from .registry import declare
+from .universe import IntervalUniverse, _to_validity_array
+from .utils import lookback_window, make_datetime_range, to_timestamp
+
+try:
+    import polars as pl
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "Polars backend requires the package polars, which can be installed "
+        "by the extra, i.e. `pip install factor-pricing-model-universe[polars]`"
+    ) from e
+
+LOGGER = logging.getLogger(__name__)
+
+# Internal column names, which never clash with the positional column names
+# of the instruments
+_DATETIME = "__datetime"
+_POSITION = "__position"
+_HOLDABLE = "__holdable"
+
+
+def _column_names(n: int) -> List[str]:
+    """
+    Return the positional column names of the instruments, as the columns of
+    the pandas dataframes are not necessarily strings.
+    """
+    return [f"c{i}" for i in range(n)]
+
+
+def _to_polars(
+    values: pd.DataFrame, dtype: np.dtype, cross_sections: bool = False
+) -> pl.DataFrame:
+    """
+    Convert the values to a Polars frame with the positional column names,
+    where the missing values are null. If `cross_sections` is True, the
+    columns of the frame are the cross sections of the datetimes instead.
+    """
+    array = values.to_numpy(dtype=dtype, na_value=nan)
+    if cross_sections:
+        frame = pl.from_numpy(
+            array, schema=_column_names(values.shape[0]), orient="col"
+        )
+    else:
+        frame = pl.from_numpy(
+            array, schema=_column_names(values.shape[1]), orient="row"
+        )
+    if dtype.kind == "f":
+        frame = frame.fill_nan(None)
+    return frame
+
+
+def _to_pandas(frame: pl.DataFrame, index: pd.Index, columns: pd.Index) -> pd.DataFrame:
+    """
+    Convert the boolean Polars frame of the positional column names back to
+    a pandas dataframe.
+    """
+    if frame.width == 0:
+        return pd.DataFrame(
+            np.zeros((len(index), len(columns)), dtype=bool),
+            index=index,
+            columns=columns,
+        )
+    return pd.DataFrame(frame.to_numpy(), index=index, columns=columns)
+
+
+def _hold_validity(
+    column: str, tolerance_timeframes: int, holdable: bool = False
+) -> pl.Expr:
+    """
+    Return the expression keeping the validity for a number of timeframes
+    after the condition lapses.
+
+    The expression is the counterpart of :func:`fpm_universe.kernels.hold_validity`.
+    The invalid timeframes are replaced with nulls and forward filled with
+    the limit of the tolerance timeframes. If the frame has the column of
+    the holdable timeframes, the invalid timeframes which are not holdable
+    are kept invalid, so that the validity is never filled through them.
+    """
+    validity = pl.col(column)
+    held = pl.when(validity).then(True)
+    if holdable:
+        held = held.when(~pl.col(_HOLDABLE)).then(False)
+    return (
+        held.otherwise(None)
+        .fill_null(strategy="forward", limit=tolerance_timeframes)
+        .fill_null(False)
+        .alias(column)
+    )
+
+
+def _reindex(
+    validity: pl.DataFrame,
+    index: pd.Index,
+    datetime_range: pd.DatetimeIndex,
+) -> pl.DataFrame:
+    """
+    Reindex the validity on the index to the datetime range, where the
+    datetimes missing in the index are invalid.
+    """
+    if validity.width == 0:
+        return validity
+    return (
+        pl.DataFrame({_DATETIME: datetime_range.to_numpy()})
+        .join(
+            validity.with_columns(pl.Series(_DATETIME, index.to_numpy())),
+            on=_DATETIME,
+            how="left",
+            maintain_order="left",
+        )
+        .drop(_DATETIME)
+        .fill_null(False)
+    )
+
+
+@declare(pure=True, column_separable=True)
+def range_validity(
+    values: List[Dict[str, str]],
+    start_datetime: Union[str, datetime, pd.Timestamp],
+    last_datetime: Union[str, datetime, pd.Timestamp],
+    frequency: str,
+    sparse: bool = False,
+) -> Union[pd.DataFrame, IntervalUniverse]:
+    """
+    Include the instrument into universe by the datetime range of validity.
+
+    See :func:`fpm_universe.pipeline.range_validity` for the parameters. The
+    sparse universe is built by the pandas implementation, as it contains
+    only the intervals.
+    """
+    if sparse:
+        return pipeline.range_validity(
+            values=values,
+            start_datetime=start_datetime,
+            last_datetime=last_datetime,
+            frequency=frequency,
+            sparse=sparse,
+        )
+
+    start_datetime = to_timestamp(start_datetime)
+    last_datetime = to_timestamp(last_datetime)
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
+        name="datetime",
+    )
+    ranges = pipeline._valid_ranges(
+        values=values, start_datetime=start_datetime, last_datetime=last_datetime
+    )
+    starts = datetime_range.searchsorted([r[0] for r in ranges.values()], side="left")
+    stops = datetime_range.searchsorted([r[1] for r in ranges.values()], side="right")
+    positions = pl.col(_POSITION)
+    frame = pl.DataFrame(
+        {_POSITION: np.arange(len(datetime_range), dtype=np.int64)}
+    ).select(
+        [
+            ((positions >= start) & (positions < stop)).alias(name)
+            for name, start, stop in zip(
+                _column_names(len(ranges)), starts.tolist(), stops.tolist()
+            )
+        ]
+    )
+    return _to_pandas(frame, index=datetime_range, columns=pd.Index(ranges.keys()))
+
+
+@declare(pure=True)
+@lookback_window(lambda tolerance_timeframes, **_: tolerance_timeframes)
+def ranking(
+    values: pd.DataFrame,
+    threshold_pct: float,
+    tolerance_timeframes: int,
+    start_datetime: Union[str, datetime, pd.Timestamp],
+    last_datetime: Union[str, datetime, pd.Timestamp],
+    frequency: str,
+) -> pd.DataFrame:
+    """
+    Include the instrument into the universe by ranking.
+
+    See :func:`fpm_universe.pipeline.ranking` for the parameters.
+    """
+    if not (0 <= threshold_pct <= 1):
+        raise ValueError(
+            f"Threshold percentage {threshold_pct} must be between 0 and 1"
+        )
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
+        name="datetime",
+    )
+    names = _column_names(values.shape[1])
+    if values.empty:
+        validity = pl.DataFrame(
+            np.zeros(values.shape, dtype=bool), schema=names, orient="row"
+        )
+    else:
+        # Rank the cross sections as the columns, which are ranked in
+        # parallel, and transpose the validity back to the instruments
+        cross_sections = _to_polars(
+            values, dtype=pipeline._float_dtype(values), cross_sections=True
+        )
+        validity = cross_sections.select(
+            (
+                pl.all().rank(method="average", descending=True)
+                <= pl.all().count() * threshold_pct
+            ).fill_null(False)
+        ).transpose(column_names=names)
+
+    result = _reindex(validity, index=values.index, datetime_range=datetime_range)
+    if tolerance_timeframes > 0:
+        result = result.select(
+            [_hold_validity(name, tolerance_timeframes) for name in names]
+        )
+    return _to_pandas(
+        result.select(names), index=datetime_range, columns=values.columns
+    )
+
+
+@declare(pure=True, column_separable=True)
+@lookback_window(
+    lambda rolling_window, tolerance_timeframes, **_: (
+        rolling_window + tolerance_timeframes
+    )
+)
+def rolling_validity(
+    values: pd.DataFrame,
+    threshold_pct: float,
+    rolling_window: int,
+    tolerance_timeframes: int,
+    start_datetime: Union[str, datetime, pd.Timestamp],
+    last_datetime: Union[str, datetime, pd.Timestamp],
+    frequency: str,
+) -> pd.DataFrame:
+    """
+    Include the instrument into the universe by rolling validity.
+
+    See :func:`fpm_universe.pipeline.rolling_validity` for the parameters.
+    The rolling counts of the columns are computed in parallel.
+    """
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
+        name="datetime",
+    )
+    names = _column_names(values.shape[1])
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in values.dtypes):
+        frame = _to_polars(values, dtype=pipeline._float_dtype(values))
+        valid = [pl.col(name).is_not_null() for name in names]
+    else:
+        frame = pl.from_numpy(values.notnull().to_numpy(), schema=names, orient="row")
+        valid = [pl.col(name) for name in names]
+    validity = frame.select(
+        [
+            column.cast(pl.UInt32).rolling_sum(
+                window_size=rolling_window, min_samples=1
+            )
+            >= threshold_pct * rolling_window
+            for column in valid
+        ]
+    )
+
+    result = _reindex(validity, index=values.index, datetime_range=datetime_range)
+    if tolerance_timeframes > 0 and names:
+        # The validity is held only through the timeframes missing in the
+        # values, and not through the ones failing the threshold
+        result = result.with_columns(
+            pl.Series(_HOLDABLE, ~datetime_range.isin(values.index))
+        ).select(
+            [
+                _hold_validity(name, tolerance_timeframes, holdable=True)
+                for name in names
+            ]
+        )
+    return _to_pandas(
+        result.select(names), index=datetime_range, columns=values.columns
+    )
+
+
+@declare(pure=True, column_separable=True)
+def combine_validity(
+    *args: List[Union[pd.DataFrame, IntervalUniverse]]
+) -> Union[pd.DataFrame, IntervalUniverse]:
+    """
+    Combine validity.
+
+    See :func:`fpm_universe.pipeline.combine_validity` for the parameters.
+    The interval universes are intersected by the pandas implementation if
+    all the validities are interval universes.
+    """
+    if not args or all(isinstance(validity, IntervalUniverse) for validity in args):
+        return pipeline.combine_validity(*args)
+
+    validities = [
+        validity.to_dense() if isinstance(validity, IntervalUniverse) else validity
+        for validity in args
+    ]
+    index = validities[0].index
+    columns = validities[0].columns
+    names = _column_names(len(columns))
+    positions = pd.Series(names, index=columns)
+    result = pl.DataFrame({_DATETIME: index.to_numpy()})
+    aligned = []
+    for i, validity in enumerate(validities):
+        # Keep only the columns of the combined validity, which are renamed
+        # to their positional names suffixed by the validity
+        mask = validity.columns.isin(columns)
+        frame = pl.from_numpy(
+            _to_validity_array(validity)[:, mask],
+            schema=[f"{name}_{i}" for name in positions[validity.columns[mask]]],
+            orient="row",
+        ).with_columns(pl.Series(_DATETIME, validity.index.to_numpy()))
+        result = result.join(frame, on=_DATETIME, how="left", maintain_order="left")
+        aligned.append(set(frame.columns))
+
+    result = result.select(
+        [
+            pl.all_horizontal(
+                [
+                    pl.col(f"{name}_{i}").fill_null(False)
+                    if f"{name}_{i}" in columns_i
+                    else pl.lit(False)
+                    for i, columns_i in enumerate(aligned)
+                ]
+            ).alias(name)
+            for name in names
+        ]
+    )
+    return _to_pandas(result, index=index, columns=columns)
@@ -0,0 +1,353 @@
+import logging
+import shutil
+from os import makedirs
+from os.path import exists
+from os.path import join as fsjoin
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .universe import IntervalUniverse, _to_validity_array
+from .utils import atomic_path, prefixed_directories, read_versioned_json, write_json
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the file pointing to the current version of the index
+CURRENT_FILE_NAME = "CURRENT"
+INDEX_VERSION = 1
+
+# Name of the metadata file in each version of the index
+_METADATA_FILE_NAME = "metadata.json"
+
+# Prefix of the version directories
+_VERSION_PREFIX = "v"
+
+# Arrays of each version of the index, which are memory mapped by the readers
+_ARRAYS = [
+    "datetimes",
+    "symbols",
+    "datetime_offsets",
+    "datetime_members",
+    "symbol_offsets",
+    "symbol_datetimes",
+]
+
+
+def write_universe_index(
+    validity: Union[pd.DataFrame, IntervalUniverse],
+    directory: str,
+    keep_versions: int = 2,
+) -> str:
+    """
+    Write the validity into a new version of the universe index.
+
+    The index keeps the members of each datetime, and the member datetimes
+    of each symbol, in the compressed sparse row format of the numpy
+    arrays, which are memory mapped by the readers. The new version is
+    published by replacing the pointer file `CURRENT` atomically, so the
+    readers always open a complete version.
+
+    Parameters
+    ----------
+    validity : Union[pd.DataFrame, IntervalUniverse]
+        The validity, e.g. the combined result of the pipelines. Missing
+        values are regarded as invalid.
+    directory : str
+        The directory of the index, which is created if it does not exist.
+    keep_versions : int
+        The number of the latest versions kept in the directory, including
+        the new version. The older versions are removed, while the readers
+        opened them can still read the arrays mapped. Default is 2.
+
+    Returns
+    -------
+    str
+        The name of the new version.
+    """
+    if keep_versions < 1:
+        raise ValueError(f"Number of kept versions {keep_versions} must be positive")
+    if isinstance(validity, IntervalUniverse):
+        validity = validity.to_dense()
+    if not validity.index.is_monotonic_increasing:
+        raise ValueError("Index of the validity must be sorted")
+
+    makedirs(directory, exist_ok=True)
+    versions = _versions(directory)
+    sequence = (
+        int(versions[-1][len(_VERSION_PREFIX) :]) + 1 if versions else 1  # noqa: E203
+    )
+    version = f"{_VERSION_PREFIX}{sequence:08d}"
+
+    values = _to_validity_array(validity)
+    rows, columns = np.nonzero(values)
+    symbol_order = np.argsort(columns, kind="stable")
+    arrays = {
+        "datetimes": validity.index.to_numpy(dtype="datetime64[ns]").view(np.int64),
+        "symbols": validity.columns.astype(str).to_numpy(dtype=str),
+        "datetime_offsets": _offsets(rows, len(validity.index)),
+        "datetime_members": columns.astype(np.int32),
+        "symbol_offsets": _offsets(columns[symbol_order], len(validity.columns)),
+        "symbol_datetimes": rows[symbol_order].astype(np.int32),
+    }
+
+    # Write the version into a temporary directory, which is renamed once
+    # it is complete
+    with atomic_path(fsjoin(directory, version)) as temporary_path:
+        makedirs(temporary_path)
+        for name in _ARRAYS:
+            np.save(fsjoin(temporary_path, f"{name}.npy"), arrays[name])
+        write_json(
+            fsjoin(temporary_path, _METADATA_FILE_NAME),
+            {
+                "version": INDEX_VERSION,
+                "datetimes": len(validity.index),
+                "symbols": len(validity.columns),
+                "members": len(rows),
+            },
+        )
+
+    with atomic_path(fsjoin(directory, CURRENT_FILE_NAME)) as temporary_path:
+        with open(temporary_path, "w") as fp:
+            fp.write(version)
+
+    for stale_version in (versions + [version])[:-keep_versions]:
+        shutil.rmtree(fsjoin(directory, stale_version), ignore_errors=True)
+
+    LOGGER.info(
+        f"Wrote version {version} of the universe index {directory} with "
+        f"{len(rows)} members"
+    )
+    return version
+
+
+class UniverseReader:
+    """
+    Universe reader.
+
+    The reader answers the point-in-time lookups of the universe from the
+    index written by :func:`write_universe_index`. The arrays of the index
+    are memory mapped read-only on open, so a lookup reads only the pages
+    of the datetime or the symbol, and takes microseconds once the pages
+    are cached.
+
+    The reader keeps the version opened, which is never modified, so any
+    number of readers, in threads or processes, can read the index while
+    a new version is written. Call `refresh` to open the new version.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the index.
+        """
+        self._directory = directory
+        self._version: Optional[str] = None
+        self.refresh()
+
+    @property
+    def version(self) -> str:
+        """
+        Return the opened version of the index.
+        """
+        return self._version
+
+    @property
+    def datetimes(self) -> pd.DatetimeIndex:
+        """
+        Return the datetimes of the universe.
+        """
+        return pd.DatetimeIndex(
+            self._index["datetimes"].view("datetime64[ns]"), name="datetime"
+        )
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        Return the symbols of the universe.
+        """
+        return self._index["symbols"].tolist()
+
+    def refresh(self) -> bool:
+        """
+        Open the current version of the index if it is not opened.
+
+        Returns
+        -------
+        bool
+            True if a new version is opened.
+        """
+        current_path = fsjoin(self._directory, CURRENT_FILE_NAME)
+        if not exists(current_path):
+            raise FileNotFoundError(f"Universe index {self._directory} is not found")
+        with open(current_path) as fp:
+            version = fp.read().strip()
+        if version == self._version:
+            return False
+
+        path = fsjoin(self._directory, version)
+        read_versioned_json(
+            fsjoin(path, _METADATA_FILE_NAME),
+            version=INDEX_VERSION,
+            description="Universe index",
+        )
+
+        index = {
+            # The plain array views of the memory maps avoid the overhead of
+            # the memory map subclass on each lookup
+            name: np.load(fsjoin(path, f"{name}.npy"), mmap_mode="r").view(np.ndarray)
+            for name in _ARRAYS
+        }
+        index["symbol_ids"] = {
+            symbol: i for i, symbol in enumerate(index["symbols"].tolist())
+        }
+        # The arrays are swapped at once, so the concurrent lookups never mix
+        # the arrays of two versions
+        self._index = index
+        self._version = version
+        return True
+
+    def members(self, datetime: Any) -> List[str]:
+        """
+        Return the members at the datetime.
+
+        The universe at a datetime between two datetimes of the index is the
+        universe of the earlier one, i.e. the universe is point-in-time.
+
+        Parameters
+        ----------
+        datetime : Any
+            The datetime, which is convertible by pandas `Timestamp`.
+
+        Returns
+        -------
+        List[str]
+            The members, in the order of the symbols of the universe. Empty
+            if the datetime is before the first datetime.
+        """
+        index = self._index
+        row = _row(index, datetime)
+        if row < 0:
+            return []
+        start, stop = index["datetime_offsets"][row : row + 2]  # noqa: E203
+        return index["symbols"][index["datetime_members"][start:stop]].tolist()
+
+    def is_member(
+        self,
+        symbol: str,
+        start_datetime: Any,
+        last_datetime: Any = None,
+    ) -> bool:
+        """
+        Return whether the symbol is a member at the datetime, or at any
+        datetime between the start and last datetimes, both inclusive.
+
+        Parameters
+        ----------
+        symbol : str
+            The symbol.
+        start_datetime : Any
+            The datetime, or the start datetime of the range, which is
+            convertible by pandas `Timestamp`.
+        last_datetime : Any
+            The last datetime of the range. Default is None which means the
+            lookup is on the start datetime only.
+        """
+        index = self._index
+        rows = _rows(index, symbol)
+        if rows is None:
+            return False
+
+        start_row = _row(index, start_datetime)
+        last_row = start_row if last_datetime is None else _row(index, last_datetime)
+        # The range starts from the universe in effect at the start datetime
+        start_row = max(start_row, 0)
+        if last_row < start_row:
+            return False
+        return bool(
+            rows.searchsorted(last_row, side="right")
+            > rows.searchsorted(start_row, side="left")
+        )
+
+    def history(
+        self,
+        symbol: str,
+        start_datetime: Any = None,
+        last_datetime: Any = None,
+    ) -> pd.DatetimeIndex:
+        """
+        Return the datetimes which the symbol is a member.
+
+        Parameters
+        ----------
+        symbol : str
+            The symbol.
+        start_datetime : Any
+            The start datetime, inclusive. Default is None which means the
+            first datetime.
+        last_datetime : Any
+            The last datetime, inclusive. Default is None which means the
+            last datetime.
+
+        Returns
+        -------
+        pd.DatetimeIndex
+            The member datetimes, sorted. Empty if the symbol is not in the
+            universe.
+        """
+        index = self._index
+        rows = _rows(index, symbol)
+        if rows is None:
+            rows = index["symbol_datetimes"][:0]
+        datetimes = index["datetimes"][rows]
+        if start_datetime is not None:
+            datetimes = datetimes[datetimes >= pd.Timestamp(start_datetime).value]
+        if last_datetime is not None:
+            datetimes = datetimes[datetimes <= pd.Timestamp(last_datetime).value]
+        return pd.DatetimeIndex(datetimes.view("datetime64[ns]"), name="datetime")
+
+
+def _row(index: Dict[str, Any], datetime: Any) -> int:
+    """
+    Return the row of the last datetime on or before the datetime, or -1 if
+    the datetime is before the first datetime.
+    """
+    value = pd.Timestamp(datetime).value
+    return int(index["datetimes"].searchsorted(value, side="right")) - 1
+
+
+def _rows(index: Dict[str, Any], symbol: str) -> Optional[np.ndarray]:
+    """
+    Return the sorted member rows of the symbol, or None if the symbol is not
+    in the universe.
+    """
+    column = index["symbol_ids"].get(symbol)
+    if column is None:
+        return None
+    start, stop = index["symbol_offsets"][column : column + 2]  # noqa: E203
+    return index["symbol_datetimes"][start:stop]
+
+
+def _offsets(keys: np.ndarray, size: int) -> np.ndarray:
+    """
+    Return the offsets of the sorted keys, where the entries of key i are in
+    the range between offsets i and i + 1.
+    """
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets
+
+
+def _versions(directory: str) -> List[str]:
+    """
+    Return the versions of the index, sorted.
+    """
+    return [
+        f"{_VERSION_PREFIX}{sequence}"
+        for sequence in prefixed_directories(directory, _VERSION_PREFIX)
+        if sequence.isdigit()
+    ]
@@ -0,0 +1,324 @@
+import importlib
+import logging
+from collections import OrderedDict
+from importlib.metadata import entry_points
+from threading import RLock
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+from .utils import fingerprint
+
+LOGGER = logging.getLogger(__name__)
+
+# Entry point groups to discover the data and pipeline functions of other
+# distributions
+DATA_ENTRY_POINT_GROUP = "fpm_universe.data"
+PIPELINE_ENTRY_POINT_GROUP = "fpm_universe.pipeline"
+
+# Attribute of the functions holding their declared capabilities
+_SPEC_ATTRIBUTE = "__fpm_spec__"
+
+
+class FunctionSpec:
+    """
+    Function specification.
+
+    The specification declares the capabilities of a data or pipeline
+    function, so that the executors can decide whether its results can be
+    memoized, which pool it should run on, and how its inputs can be split.
+    """
+
+    def __init__(
+        self,
+        function: Callable,
+        name: Optional[str] = None,
+        pure: bool = False,
+        deterministic: bool = True,
+        io_bound: bool = False,
+        lookback: Optional[Callable[..., int]] = None,
+        column_separable: bool = False,
+        memoize: bool = False,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        function : Callable
+            The function.
+        name : Optional[str]
+            The name of the function. Default is None which means the name
+            of the function object.
+        pure : bool
+            Indicates the function has no side effects, and neither modifies
+            its inputs nor depends on anything except them, e.g. files.
+            Default is False.
+        deterministic : bool
+            Indicates the function always returns the same result on the
+            same inputs. Default is True.
+        io_bound : bool
+            Indicates the function is bound by I/O instead of CPU, so it can
+            run on a thread pool. Default is False.
+        lookback : Optional[Callable[..., int]]
+            Callable returning the number of timeframes required before the
+            start datetime, given the arguments of the function. Default is
+            None which means the attribute `lookback` of the function, e.g.
+            declared by `lookback_window`, if any.
+        column_separable : bool
+            Indicates the result on a subset of the columns, i.e. the
+            instruments, depends only on the same subset of the input
+            columns, so the inputs can be sharded by columns. Default is
+            False.
+        memoize : bool
+            Indicates to memoize the results of the function if it is pure
+            and deterministic. Memoizing fingerprints the inputs on every
+            call and keeps the results alive in the cache of the registry,
+            so it is enabled only for the functions called repeatedly with
+            the same inputs. Default is False.
+        """
+        self.function = function
+        self.name = name or getattr(function, "__name__", repr(function))
+        self.pure = pure
+        self.deterministic = deterministic
+        self.io_bound = io_bound
+        self.lookback = lookback or getattr(function, "lookback", None)
+        self.column_separable = column_separable
+        self.memoize = memoize
+
+    def __repr__(self) -> str:
+        return (
+            f"FunctionSpec(name={self.name!r}, pure={self.pure}, "
+            f"deterministic={self.deterministic}, io_bound={self.io_bound}, "
+            f"lookback={self.lookback is not None}, "
+            f"column_separable={self.column_separable}, memoize={self.memoize})"
+        )
+
+    @property
+    def cacheable(self) -> bool:
+        """
+        Return whether the results of the function can be memoized.
+        """
+        return self.pure and self.deterministic and self.memoize
+
+    def lookback_periods(self, **arguments) -> Optional[int]:
+        """
+        Return the number of lookback timeframes given the arguments of the
+        function, or None if the lookback is not declared.
+        """
+        if self.lookback is None:
+            return None
+        return self.lookback(**arguments)
+
+    @classmethod
+    def of(cls, function: Callable, name: Optional[str] = None) -> "FunctionSpec":
+        """
+        Return the specification of a function.
+
+        The specification declared by `declare` is returned if any.
+        Otherwise, the function is assumed to be impure, so it is never
+        memoized.
+
+        Parameters
+        ----------
+        function : Callable
+            The function, or the function specification.
+        name : Optional[str]
+            The name of the function.
+        """
+        if isinstance(function, FunctionSpec):
+            return function
+
+        spec = getattr(function, _SPEC_ATTRIBUTE, None)
+        if spec is None:
+            return cls(function=function, name=name)
+        if name is not None and name != spec.name:
+            return cls(
+                function=function,
+                name=name,
+                pure=spec.pure,
+                deterministic=spec.deterministic,
+                io_bound=spec.io_bound,
+                lookback=spec.lookback,
+                column_separable=spec.column_separable,
+                memoize=spec.memoize,
+            )
+        return spec
+
+
+def declare(
+    pure: bool = False,
+    deterministic: bool = True,
+    io_bound: bool = False,
+    lookback: Optional[Callable[..., int]] = None,
+    column_separable: bool = False,
+    memoize: bool = False,
+) -> Callable:
+    """
+    Declare the capabilities of a data or pipeline function.
+
+    The decorator returns the function itself with its specification
+    attached. See `FunctionSpec` for the parameters.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        setattr(
+            function,
+            _SPEC_ATTRIBUTE,
+            FunctionSpec(
+                function=function,
+                pure=pure,
+                deterministic=deterministic,
+                io_bound=io_bound,
+                lookback=lookback,
+                column_separable=column_separable,
+                memoize=memoize,
+            ),
+        )
+        return function
+
+    return decorator
+
+
+class FunctionRegistry:
+    """
+    Function registry.
+
+    The registry locates the functions by their names, in the order of the
+    built-in modules, the custom functions and the entry points of the
+    installed distributions, and calls them with their results memoized if
+    they are declared pure, deterministic and memoized.
+    """
+
+    def __init__(
+        self,
+        module: Union[str, Sequence[str]],
+        entry_point_group: Optional[str] = None,
+        custom_functions: Optional[Dict[str, Callable]] = None,
+        cache_size: Optional[int] = 32,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        module : Union[str, Sequence[str]]
+            The name of the module of the built-in functions, or the names
+            of the modules searched in order, e.g. an alternative backend
+            module followed by the module it falls back to.
+        entry_point_group : Optional[str]
+            The entry point group to discover the functions of the installed
+            distributions. Default is None which means no discovery.
+        custom_functions : Optional[Dict[str, Callable]]
+            Custom functions keyed by their names.
+        cache_size : Optional[int]
+            The maximum number of memoized results. Default is 32, and None
+            means no bound.
+        """
+        self._modules = [module] if isinstance(module, str) else list(module)
+        self._entry_point_group = entry_point_group
+        self._custom_functions = custom_functions or {}
+        self._cache_size = cache_size
+        self._specs = {}
+        self._entry_points = None
+        self._cache = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> FunctionSpec:
+        """
+        Return the specification of the function.
+
+        Parameters
+        ----------
+        name : str
+            Name of the function.
+        """
+        try:
+            return self._specs[name]
+        except KeyError:
+            pass
+
+        function = None
+        for module in self._modules:
+            function = getattr(importlib.import_module(module), name, None)
+            if function is not None:
+                break
+        if function is None:
+            function = self._custom_functions.get(name)
+        if function is None:
+            function = self._load_entry_point(name)
+        if function is None:
+            raise ValueError(
+                f"Callable name {name} cannot be found neither in the modules "
+                f"{', '.join(self._modules)}, the customized functions nor the "
+                "entry points"
+            )
+
+        spec = FunctionSpec.of(function, name=name)
+        self._specs[name] = spec
+        return spec
+
+    def call(self, name: str, parameters: Dict[str, Any]) -> Any:
+        """
+        Call the function with the parameters.
+
+        The result is memoized by the fingerprint of the parameters if the
+        function is cacheable and the parameters can be fingerprinted.
+
+        Parameters
+        ----------
+        name : str
+            Name of the function.
+        parameters : Dict[str, Any]
+            Parameters to call the function with.
+        """
+        spec = self.get(name)
+        if not spec.cacheable:
+            return spec.function(**parameters)
+
+        try:
+            key = (name, fingerprint(parameters))
+        except TypeError as e:
+            LOGGER.debug(f"Function {name} is not memoized: {e}")
+            return spec.function(**parameters)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        result = spec.function(**parameters)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            if self._cache_size is not None:
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _load_entry_point(self, name: str) -> Optional[Callable]:
+        """
+        Load the function of the entry point name, or return None if it is
+        not found.
+        """
+        if self._entry_point_group is None:
+            return None
+
+        if self._entry_points is None:
+            discovered = entry_points()
+            if hasattr(discovered, "select"):
+                discovered = discovered.select(group=self._entry_point_group)
+            else:
+                discovered = discovered.get(self._entry_point_group, [])
+            self._entry_points = {
+                entry_point.name: entry_point for entry_point in discovered
+            }
+
+        try:
+            entry_point = self._entry_points[name]
+        except KeyError:
+            return None
+
+        LOGGER.info(f"Loading function {name} from entry point {entry_point.value}")
+        return entry_point.load()
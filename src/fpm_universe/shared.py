@@ -0,0 +1,524 @@
+import hashlib
+import logging
+import mmap
+import os
+import uuid
+import weakref
+from functools import lru_cache
+from multiprocessing import shared_memory
+from threading import RLock
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "fpm"
+
+# Directory of the shared memory segments on Linux
+_SHARED_MEMORY_DIRECTORY = "/dev/shm"
+
+# Files identifying the boot of the host and the process id namespace, so the
+# process ids in the segment names are only compared in the same namespace
+_BOOT_ID_FILE = "/proc/sys/kernel/random/boot_id"
+_PID_NAMESPACE_FILE = "/proc/self/ns/pid"
+
+# Segments created by the stores of this process, keyed by their names
+_OWNED_SEGMENTS: Dict[str, shared_memory.SharedMemory] = {}
+
+# Segments attached by this process, keyed by their names
+_ATTACHED_SEGMENTS: Dict[str, Any] = {}
+
+# Segments unlinked or detached while their arrays are still referenced,
+# which are kept to be unmapped when the process exits
+_RETAINED_SEGMENTS: List[Any] = []
+
+_LOCK = RLock()
+
+
+class SharedArrayHandle:
+    """
+    Shared array handle.
+
+    The picklable reference to a numpy array in a shared memory segment,
+    which is passed to the worker processes instead of the array.
+    """
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str, order: str):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        name : str
+            The name of the shared memory segment.
+        shape : Tuple[int, ...]
+            The shape of the array.
+        dtype : str
+            The dtype of the array.
+        order : str
+            The memory layout of the array, either "C" or "F".
+        """
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.order = order
+
+    def __repr__(self) -> str:
+        return (
+            f"SharedArrayHandle(name={self.name!r}, shape={self.shape}, "
+            f"dtype={self.dtype!r})"
+        )
+
+    def attach(self) -> np.ndarray:
+        """
+        Attach the array read-only without copying it.
+
+        The segment is mapped once in each process and kept mapped until
+        `detach_all` is called or the process exits.
+        """
+        segment = _OWNED_SEGMENTS.get(self.name)
+        if segment is None:
+            segment = _attach_segment(self.name)
+
+        array = np.ndarray(
+            self.shape, dtype=np.dtype(self.dtype), buffer=segment.buf, order=self.order
+        )
+        array.flags.writeable = False
+        return array
+
+
+class SharedFrameHandle:
+    """
+    Shared frame handle.
+
+    The picklable reference to a dataframe or series, where the values are
+    in a shared memory segment and the index and columns are pickled with
+    the handle.
+    """
+
+    def __init__(
+        self,
+        array: SharedArrayHandle,
+        index: pd.Index,
+        columns: Optional[pd.Index] = None,
+        series_name: Any = None,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        array : SharedArrayHandle
+            The handle of the values.
+        index : pd.Index
+            The index of the dataframe or series.
+        columns : Optional[pd.Index]
+            The columns of the dataframe, or None for a series.
+        series_name : Any
+            The name of the series.
+        """
+        self.array = array
+        self.index = index
+        self.columns = columns
+        self.series_name = series_name
+
+    def __repr__(self) -> str:
+        return f"SharedFrameHandle(array={self.array!r})"
+
+    @property
+    def name(self) -> str:
+        """
+        Return the name of the shared memory segment.
+        """
+        return self.array.name
+
+    def attach(self) -> Union[pd.DataFrame, pd.Series]:
+        """
+        Attach the dataframe or series read-only without copying the values.
+        """
+        values = self.array.attach()
+        if self.columns is None:
+            return pd.Series(
+                values, index=self.index, name=self.series_name, copy=False
+            )
+        return pd.DataFrame(values, index=self.index, columns=self.columns, copy=False)
+
+
+SharedHandle = Union[SharedArrayHandle, SharedFrameHandle]
+
+
+def attach(value: Any) -> Any:
+    """
+    Attach the shared handles in the value, including the ones in
+    dictionaries, lists and tuples. Other values are returned as they are.
+
+    Parameters
+    ----------
+    value : Any
+        The value with the shared handles, e.g. the parameters passed to a
+        worker process.
+    """
+    if isinstance(value, (SharedArrayHandle, SharedFrameHandle)):
+        return value.attach()
+    if isinstance(value, dict):
+        return {key: attach(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(attach(item) for item in value)
+    return value
+
+
+def detach_all() -> None:
+    """
+    Unmap the segments attached by this process.
+
+    The arrays attached from the segments must not be used afterwards.
+    """
+    with _LOCK:
+        while _ATTACHED_SEGMENTS:
+            _, segment = _ATTACHED_SEGMENTS.popitem()
+            _close_segment(segment)
+
+
+def sweep_stale_segments(prefix: str = SEGMENT_PREFIX) -> int:
+    """
+    Unlink the segments left by the crashed processes.
+
+    The segments are named after the boot and the process id namespace of
+    their owners, and the process ids of the owners. Only the segments of
+    the same boot and namespace as this process are checked, so the
+    segments of the other containers sharing /dev/shm are never unlinked,
+    and the ones whose processes no longer exist are stale. The sweep is
+    only supported on the platforms listing the segments in /dev/shm and
+    the namespaces in /proc.
+
+    Parameters
+    ----------
+    prefix : str
+        The name prefix of the segments.
+
+    Returns
+    -------
+    int
+        The number of unlinked segments.
+    """
+    namespace = _namespace_token()
+    if namespace is None:
+        return 0
+    try:
+        names = os.listdir(_SHARED_MEMORY_DIRECTORY)
+    except OSError:
+        return 0
+
+    count = 0
+    for name in names:
+        parts = name.split("_")
+        if (
+            len(parts) != 4
+            or parts[0] != prefix
+            or parts[1] != namespace
+            or not parts[2].isdigit()
+        ):
+            continue
+        if _process_exists(int(parts[2])):
+            continue
+        try:
+            os.unlink(os.path.join(_SHARED_MEMORY_DIRECTORY, name))
+        except OSError:
+            continue
+        LOGGER.info(f"Unlinked the stale shared memory segment {name}")
+        count += 1
+
+    return count
+
+
+class SharedMemoryStore:
+    """
+    Shared memory store.
+
+    The store copies the dataframes, series and numpy arrays into shared
+    memory segments once, and returns the picklable handles, so that the
+    worker processes attach to the values read-only without copying them.
+
+    The lifetime of each segment is reference counted. The segment is
+    unlinked when all the references are released, when the store is
+    closed, garbage collected, or when the process exits. The segments left
+    by a crashed process are unlinked by the resource tracker of the
+    process, or by the stale segment sweep if it is enabled.
+    """
+
+    def __init__(self, prefix: str = SEGMENT_PREFIX, sweep: bool = False):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        prefix : str
+            The name prefix of the segments, which must not contain
+            underscores.
+        sweep : bool
+            Indicates to unlink the stale segments of the prefix on the
+            construction, see `sweep_stale_segments`. Default is False.
+        """
+        if "_" in prefix:
+            raise ValueError(f"Prefix {prefix} must not contain underscores")
+
+        self._prefix = prefix
+        self._references: Dict[str, int] = {}
+        self._lock = RLock()
+        if sweep:
+            sweep_stale_segments(prefix=prefix)
+        # The finalizer references the segments instead of the store, so the
+        # store is not kept alive until the process exits
+        self._finalizer = weakref.finalize(
+            self, _unlink_owned_segments, self._references
+        )
+
+    def __len__(self) -> int:
+        """
+        Return the number of segments.
+        """
+        return len(self._references)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the total size of the segments.
+        """
+        with _LOCK:
+            return sum(_OWNED_SEGMENTS[name].size for name in self._references)
+
+    @staticmethod
+    def is_supported(value: Any) -> bool:
+        """
+        Return whether the value can be stored in shared memory, i.e. a
+        numpy array, or a dataframe or series, of a single numeric, boolean
+        or datetime dtype.
+
+        Parameters
+        ----------
+        value : Any
+            The value to store.
+        """
+        if isinstance(value, np.ndarray):
+            dtype = value.dtype
+        elif isinstance(value, pd.Series):
+            dtype = value.dtype
+        elif isinstance(value, pd.DataFrame):
+            dtypes = set(value.dtypes)
+            if len(dtypes) != 1:
+                return False
+            dtype = dtypes.pop()
+        else:
+            return False
+
+        return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+    def put(self, value: Any) -> Optional[SharedHandle]:
+        """
+        Copy the value into a shared memory segment.
+
+        Parameters
+        ----------
+        value : Any
+            The value to store.
+
+        Returns
+        -------
+        Optional[SharedHandle]
+            The handle of the value with a reference, or None if the value
+            is not supported.
+        """
+        if not SharedMemoryStore.is_supported(value):
+            return None
+
+        if isinstance(value, np.ndarray):
+            return self._put_array(value)
+        if isinstance(value, pd.Series):
+            return SharedFrameHandle(
+                array=self._put_array(value.to_numpy()),
+                index=value.index,
+                series_name=value.name,
+            )
+        # Keep the columns contiguous, which is the layout of the values in
+        # the dataframe blocks
+        return SharedFrameHandle(
+            array=self._put_array(np.asfortranarray(value.to_numpy())),
+            index=value.index,
+            columns=value.columns,
+        )
+
+    def acquire(self, handle: SharedHandle) -> SharedHandle:
+        """
+        Add a reference to the segment of the handle, e.g. for a worker.
+
+        Parameters
+        ----------
+        handle : SharedHandle
+            The handle of the value.
+        """
+        with self._lock:
+            if handle.name not in self._references:
+                raise KeyError(f"Segment {handle.name} is not in the store")
+            self._references[handle.name] += 1
+        return handle
+
+    def release(self, handle: SharedHandle) -> None:
+        """
+        Remove a reference to the segment of the handle, and unlink the
+        segment if it is the last reference.
+
+        Parameters
+        ----------
+        handle : SharedHandle
+            The handle of the value.
+        """
+        with self._lock:
+            references = self._references.get(handle.name, 0) - 1
+            if references > 0:
+                self._references[handle.name] = references
+                return
+            self._references.pop(handle.name, None)
+        _unlink_owned_segment(handle.name)
+
+    def close(self) -> None:
+        """
+        Unlink all the segments of the store.
+        """
+        with self._lock:
+            _unlink_owned_segments(self._references)
+
+    def _put_array(self, array: np.ndarray) -> SharedArrayHandle:
+        """
+        Copy the array into a new segment.
+        """
+        order = (
+            "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+        )
+        name = (
+            f"{self._prefix}_{_namespace_token() or 'x'}_{os.getpid()}_"
+            f"{uuid.uuid4().hex[:10]}"
+        )
+        segment = shared_memory.SharedMemory(
+            name=name, create=True, size=max(array.nbytes, 1)
+        )
+        shared = np.ndarray(
+            array.shape, dtype=array.dtype, buffer=segment.buf, order=order
+        )
+        shared[...] = array
+        with _LOCK:
+            _OWNED_SEGMENTS[name] = segment
+        with self._lock:
+            self._references[name] = 1
+        return SharedArrayHandle(
+            name=name, shape=array.shape, dtype=array.dtype.str, order=order
+        )
+
+
+class _ReadOnlySegment:
+    """
+    Segment mapped read-only from /dev/shm without the shared memory class,
+    which registers the segment to the resource tracker before Python 3.13.
+    The resource tracker is shared with the owner process, so the
+    registration of the worker would be confused with the one of the owner.
+    """
+
+    def __init__(self, name: str):
+        fd = os.open(os.path.join(_SHARED_MEMORY_DIRECTORY, name), os.O_RDONLY)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        self.buf = memoryview(self._mmap)
+
+    def close(self) -> None:
+        self.buf.release()
+        self._mmap.close()
+
+
+def _attach_segment(name: str) -> Any:
+    """
+    Attach a segment created by another process.
+    """
+    with _LOCK:
+        segment = _ATTACHED_SEGMENTS.get(name)
+        if segment is not None:
+            return segment
+
+        try:
+            segment = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            if os.path.isdir(_SHARED_MEMORY_DIRECTORY):
+                segment = _ReadOnlySegment(name)
+            else:
+                # The segments are not listed in /dev/shm, e.g. on Windows
+                segment = shared_memory.SharedMemory(name=name)
+        _ATTACHED_SEGMENTS[name] = segment
+        return segment
+
+
+def _unlink_owned_segment(name: str) -> None:
+    """
+    Unlink a segment created by this process.
+    """
+    with _LOCK:
+        segment = _OWNED_SEGMENTS.pop(name, None)
+    if segment is None:
+        return
+
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+    _close_segment(segment)
+
+
+def _unlink_owned_segments(references: Dict[str, int]) -> None:
+    """
+    Unlink the segments of the references of a store, and clear the
+    references.
+    """
+    names = list(references.keys())
+    references.clear()
+    for name in names:
+        _unlink_owned_segment(name)
+
+
+def _close_segment(segment: Any) -> None:
+    """
+    Unmap a segment, or retain it if its arrays are still referenced.
+    """
+    try:
+        segment.close()
+    except BufferError:
+        with _LOCK:
+            _RETAINED_SEGMENTS.append(segment)
+
+
+@lru_cache(maxsize=None)
+def _namespace_token() -> Optional[str]:
+    """
+    Return the token of the boot of the host and the process id namespace
+    of this process, or None if they are unknown.
+    """
+    try:
+        with open(_BOOT_ID_FILE) as fp:
+            boot_id = fp.read().strip()
+        namespace = os.stat(_PID_NAMESPACE_FILE).st_ino
+    except OSError:
+        return None
+    return hashlib.sha1(f"{boot_id}:{namespace}".encode()).hexdigest()[:8]
+
+
+def _process_exists(pid: int) -> bool:
+    """
+    Return whether the process exists.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
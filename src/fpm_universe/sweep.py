@@ -0,0 +1,203 @@
+from datetime import datetime
+from itertools import product
+from typing import Dict, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .kernels import hold_validity_sweep
+from .pipeline import _float_dtype
+from .utils import lookback_window, make_datetime_range
+
+
+def _stack(
+    results: Dict[tuple, np.ndarray],
+    grid: Dict[str, Sequence],
+    datetime_range: pd.DatetimeIndex,
+    columns: pd.Index,
+) -> pd.DataFrame:
+    """
+    Stack the validities keyed by the parameter tuples into a dataframe,
+    where the index levels are the parameters followed by the datetime.
+    """
+    return pd.DataFrame(
+        np.concatenate([results[key] for key in product(*grid.values())]),
+        index=pd.MultiIndex.from_product(
+            [*grid.values(), datetime_range], names=[*grid.keys(), "datetime"]
+        ),
+        columns=columns,
+    )
+
+
+@lookback_window(lambda tolerance_timeframes, **_: max(tolerance_timeframes))
+def ranking_sweep(
+    values: pd.DataFrame,
+    threshold_pct: Sequence[float],
+    tolerance_timeframes: Sequence[int],
+    start_datetime: Union[str, datetime, pd.Timestamp],
+    last_datetime: Union[str, datetime, pd.Timestamp],
+    frequency: str,
+) -> pd.DataFrame:
+    """
+    Evaluate the pipeline :func:`fpm_universe.pipeline.ranking` over the grid
+    of the threshold percentages and the tolerance timeframes.
+
+    The cross sectional ranks are computed once and thresholded by each
+    threshold percentage, and the validity of each threshold percentage is
+    held by all the tolerance timeframes at once, so the cost of the sweep
+    is close to a single run.
+
+    :param values: The values are sorted in cross sectional rank. The
+      columns are instruments, and the index are in datetime.
+    :type values: class:`pandas.DataFrame`.
+    :param threshold_pct: The threshold percentages, each of which should be
+      between 0 and 1.
+    :type threshold_pct: `Sequence[float]`.
+    :param tolerance_timeframes: The numbers of tolerance timeframes.
+    :type tolerance_timeframes: `Sequence[int]`.
+    :param start_datetime: The universe start datetime.
+    :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
+    :param last_datetime: The universe last datetime.
+    :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
+    :param frequency: The frequency string supported in pandas, or the
+        calendar frequency of the trading timestamps.
+    :type frequency: `str`
+    :return: The validities stacked by the parameters, where the index
+      levels are `threshold_pct`, `tolerance_timeframes` and `datetime`.
+    :rtype: `pd.DataFrame`.
+    """
+    for pct in threshold_pct:
+        if not (0 <= pct <= 1):
+            raise ValueError(f"Threshold percentage {pct} must be between 0 and 1")
+
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
+        name="datetime",
+    )
+    # Only the ranks on the universe datetimes are thresholded
+    values = values.loc[values.index.isin(datetime_range)]
+    rows = datetime_range.get_indexer(values.index)
+    ranks = values.astype(_float_dtype(values)).rank(
+        axis=1, method="average", ascending=False
+    )
+    counts = ranks.notnull().sum(axis=1).to_numpy()
+    ranks = ranks.to_numpy(na_value=np.nan)
+
+    results = {}
+    for pct in threshold_pct:
+        validity = np.zeros((len(datetime_range), values.shape[1]), dtype=bool)
+        # The missing ranks are never within the threshold
+        validity[rows] = ranks <= (counts * pct)[:, None]
+        held = hold_validity_sweep(
+            validity=validity, tolerance_timeframes=tolerance_timeframes
+        )
+        for tolerance, result in zip(tolerance_timeframes, held):
+            results[(pct, tolerance)] = result
+
+    return _stack(
+        results,
+        grid={
+            "threshold_pct": threshold_pct,
+            "tolerance_timeframes": tolerance_timeframes,
+        },
+        datetime_range=datetime_range,
+        columns=values.columns,
+    )
+
+
+@lookback_window(
+    lambda rolling_window, tolerance_timeframes, **_: (
+        max(rolling_window) + max(tolerance_timeframes)
+    )
+)
+def rolling_validity_sweep(
+    values: pd.DataFrame,
+    threshold_pct: Sequence[float],
+    rolling_window: Sequence[int],
+    tolerance_timeframes: Sequence[int],
+    start_datetime: Union[str, datetime, pd.Timestamp],
+    last_datetime: Union[str, datetime, pd.Timestamp],
+    frequency: str,
+) -> pd.DataFrame:
+    """
+    Evaluate the pipeline :func:`fpm_universe.pipeline.rolling_validity` over
+    the grid of the threshold percentages, the rolling windows and the
+    tolerance timeframes.
+
+    The cumulative count of the valid values is computed once, so the
+    rolling count of each window is the difference of two rows of it, and
+    the validity of each threshold percentage and window is held by all the
+    tolerance timeframes at once.
+
+    :param values: The values are sorted in cross sectional rank. The
+      columns are instruments, and the index are in datetime.
+    :type values: class:`pandas.DataFrame`.
+    :param threshold_pct: The threshold percentages, each of which should be
+      between 0 and 1.
+    :type threshold_pct: `Sequence[float]`.
+    :param rolling_window: The numbers of rolling timeframes, each of which
+      must be positive.
+    :type rolling_window: `Sequence[int]`.
+    :param tolerance_timeframes: The numbers of tolerance timeframes.
+    :type tolerance_timeframes: `Sequence[int]`.
+    :param start_datetime: The universe start datetime.
+    :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
+    :param last_datetime: The universe last datetime.
+    :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
+    :param frequency: The frequency string supported in pandas, or the
+        calendar frequency of the trading timestamps.
+    :type frequency: `str`
+    :return: The validities stacked by the parameters, where the index
+      levels are `threshold_pct`, `rolling_window`, `tolerance_timeframes`
+      and `datetime`.
+    :rtype: `pd.DataFrame`.
+    """
+    for window in rolling_window:
+        if window <= 0:
+            raise ValueError(f"Rolling window {window} must be positive")
+
+    datetime_range = make_datetime_range(
+        start_datetime=start_datetime,
+        last_datetime=last_datetime,
+        frequency=frequency,
+        name="datetime",
+    )
+    # Cumulative count of the valid values with a leading row of zeros, so
+    # the rolling count of a window ending on row i is counts[i + 1] less
+    # counts[i + 1 - window], clipped to the first row
+    counts = np.zeros((values.shape[0] + 1, values.shape[1]), dtype=np.int64)
+    np.cumsum(values.notnull().to_numpy(), axis=0, out=counts[1:])
+
+    # Only the rows on the universe datetimes are evaluated
+    targets = datetime_range.get_indexer(values.index)
+    sources = np.flatnonzero(targets >= 0)
+    targets = targets[sources]
+    ends = sources + 1
+    holdable = ~datetime_range.isin(values.index)[:, None]
+
+    results = {}
+    for window in rolling_window:
+        rolling_counts = counts[ends] - counts[np.maximum(ends - window, 0)]
+        for pct in threshold_pct:
+            validity = np.zeros((len(datetime_range), values.shape[1]), dtype=bool)
+            validity[targets] = rolling_counts >= pct * window
+            held = hold_validity_sweep(
+                validity=validity,
+                tolerance_timeframes=tolerance_timeframes,
+                holdable=holdable,
+            )
+            for tolerance, result in zip(tolerance_timeframes, held):
+                results[(pct, window, tolerance)] = result
+
+    return _stack(
+        results,
+        grid={
+            "threshold_pct": threshold_pct,
+            "rolling_window": rolling_window,
+            "tolerance_timeframes": tolerance_timeframes,
+        },
+        datetime_range=datetime_range,
+        columns=values.columns,
+    )
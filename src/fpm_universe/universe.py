@@ -0,0 +1,611 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_PARQUET_METADATA_KEY = b"fpm_universe"
+
+
+def _to_validity_array(df: pd.DataFrame) -> np.ndarray:
+    """
+    Convert a validity dataframe to a boolean array, where the missing
+    values are regarded as invalid.
+    """
+    values = df.to_numpy()
+    if values.dtype == bool:
+        return values
+
+    # Missing values are never equal to True
+    return values == True  # noqa: E712
+
+
+class IntervalUniverse:
+    """
+    Interval universe.
+
+    The universe is encoded in the intervals of validity instead of a
+    dense dataframe of datetimes and instruments. Each interval is a tuple
+    of symbol, start position and stop position, where the instrument is
+    included in the universe on the datetimes of the index between the
+    start position (inclusive) and the stop position (exclusive).
+
+    The intervals are normalized on construction, i.e. sorted by symbol
+    and position, and the overlapping or adjacent intervals of the same
+    symbol are merged.
+    """
+
+    def __init__(
+        self,
+        index: pd.DatetimeIndex,
+        symbols: Sequence[str],
+        codes: Sequence[int],
+        starts: Sequence[int],
+        stops: Sequence[int],
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        index : pd.DatetimeIndex
+            Datetime index of the universe.
+        symbols : Sequence[str]
+            Symbols of the universe.
+        codes : Sequence[int]
+            Symbol positions of the intervals in the symbols.
+        starts : Sequence[int]
+            Start positions of the intervals in the index.
+        stops : Sequence[int]
+            Stop positions of the intervals in the index.
+        """
+        self._index = pd.DatetimeIndex(index)
+        self._symbols = pd.Index(symbols)
+        if not self._symbols.is_unique:
+            raise ValueError("Symbols of the interval universe must be unique")
+
+        codes = np.asarray(codes, dtype=np.int64)
+        starts = np.clip(np.asarray(starts, dtype=np.int64), 0, len(self._index))
+        stops = np.clip(np.asarray(stops, dtype=np.int64), 0, len(self._index))
+        if not (len(codes) == len(starts) == len(stops)):
+            raise ValueError(
+                "Lengths of codes, starts and stops of the intervals must be equal"
+            )
+        if len(codes) and (codes.min() < 0 or codes.max() >= len(self._symbols)):
+            raise ValueError("Codes of the intervals are out of the symbols range")
+
+        self._codes, self._starts, self._stops = IntervalUniverse._sweep(
+            length=len(self._index),
+            codes=codes,
+            starts=starts,
+            stops=stops,
+            min_count=1,
+        )
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """
+        Return the datetime index of the universe.
+        """
+        return self._index
+
+    @property
+    def symbols(self) -> pd.Index:
+        """
+        Return the symbols of the universe.
+        """
+        return self._symbols
+
+    @property
+    def shape(self):
+        """
+        Return the shape of the universe in the dense form.
+        """
+        return (len(self._index), len(self._symbols))
+
+    @property
+    def intervals(self) -> pd.DataFrame:
+        """
+        Return the intervals in a dataframe of symbol, start and stop.
+        """
+        return pd.DataFrame(
+            {
+                "symbol": self._symbols.take(self._codes),
+                "start": self._starts,
+                "stop": self._stops,
+            }
+        )
+
+    def __len__(self) -> int:
+        """
+        Return the number of intervals.
+        """
+        return len(self._codes)
+
+    def __eq__(self, other) -> bool:
+        """
+        Equal operator.
+
+        The universes are the same if they have the same index, symbols
+        and intervals.
+        """
+        if not isinstance(other, IntervalUniverse):
+            return False
+
+        return (
+            self._index.equals(other._index)
+            and self._symbols.equals(other._symbols)
+            and np.array_equal(self._codes, other._codes)
+            and np.array_equal(self._starts, other._starts)
+            and np.array_equal(self._stops, other._stops)
+        )
+
+    def __and__(self, other: "IntervalUniverse") -> "IntervalUniverse":
+        return self.intersection(other)
+
+    def __or__(self, other: "IntervalUniverse") -> "IntervalUniverse":
+        return self.union(other)
+
+    @classmethod
+    def from_dense(cls, df: pd.DataFrame) -> "IntervalUniverse":
+        """
+        Create an interval universe from a dense validity dataframe.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Validity dataframe. The index is datetime and the columns are
+            the symbols. Missing values are regarded as invalid.
+
+        Returns
+        -------
+        IntervalUniverse
+            The interval universe.
+        """
+        validity = _to_validity_array(df)
+        padding = np.zeros((1, validity.shape[1]), dtype=np.int8)
+        changes = np.diff(
+            np.concatenate([padding, validity.view(np.int8), padding]), axis=0
+        ).T
+        codes, starts = np.nonzero(changes == 1)
+        _, stops = np.nonzero(changes == -1)
+        return cls(
+            index=df.index,
+            symbols=df.columns,
+            codes=codes,
+            starts=starts,
+            stops=stops,
+        )
+
+    def to_dense(self) -> pd.DataFrame:
+        """
+        Convert the universe to a dense validity dataframe.
+
+        Returns
+        -------
+        pd.DataFrame
+            Boolean dataframe. The index is datetime and the columns are
+            the symbols.
+        """
+        changes = np.zeros((len(self._index) + 1, len(self._symbols)), dtype=np.int8)
+        np.add.at(changes, (self._starts, self._codes), 1)
+        np.add.at(changes, (self._stops, self._codes), -1)
+        validity = np.cumsum(changes[:-1], axis=0, dtype=np.int8).astype(bool)
+        return pd.DataFrame(validity, index=self._index, columns=self._symbols)
+
+    def intersection(self, *others: "IntervalUniverse") -> "IntervalUniverse":
+        """
+        Intersect the universe with the other universes.
+
+        The instruments are included only if they are included in all
+        the universes. The symbols are the union of the symbols.
+
+        Parameters
+        ----------
+        others : IntervalUniverse
+            Universes with the same datetime index.
+        """
+        return IntervalUniverse._combine([self, *others], all_required=True)
+
+    def union(self, *others: "IntervalUniverse") -> "IntervalUniverse":
+        """
+        Union the universe with the other universes.
+
+        The instruments are included if they are included in any of the
+        universes. The symbols are the union of the symbols.
+
+        Parameters
+        ----------
+        others : IntervalUniverse
+            Universes with the same datetime index.
+        """
+        return IntervalUniverse._combine([self, *others], all_required=False)
+
+    @classmethod
+    def concat(cls, universes: List["IntervalUniverse"]) -> "IntervalUniverse":
+        """
+        Concatenate the universes of consecutive datetime ranges.
+
+        The intervals are shifted to the concatenated index, and the
+        intervals of a symbol adjacent across the universes are merged, so
+        the result is the same as the universe of the whole range.
+
+        Parameters
+        ----------
+        universes : List[IntervalUniverse]
+            Universes in the order of their datetime indexes, which must
+            not overlap.
+        """
+        if not universes:
+            raise ValueError("No interval universes to concatenate")
+
+        index = universes[0]._index.append([u._index for u in universes[1:]])
+        if not index.is_monotonic_increasing or not index.is_unique:
+            raise ValueError(
+                "Interval universes can only be concatenated in the order of "
+                "their datetime indexes without overlapping"
+            )
+
+        symbols = universes[0]._symbols
+        for universe in universes[1:]:
+            symbols = symbols.append(
+                universe._symbols[~universe._symbols.isin(symbols)]
+            )
+
+        offsets = np.cumsum([0] + [len(u._index) for u in universes[:-1]])
+        return cls(
+            index=index,
+            symbols=symbols,
+            codes=np.concatenate(
+                [symbols.get_indexer(u._symbols)[u._codes] for u in universes]
+            ),
+            starts=np.concatenate(
+                [u._starts + offset for u, offset in zip(universes, offsets)]
+            ),
+            stops=np.concatenate(
+                [u._stops + offset for u, offset in zip(universes, offsets)]
+            ),
+        )
+
+    def slice(
+        self,
+        start_datetime: Union[str, datetime, pd.Timestamp],
+        last_datetime: Union[str, datetime, pd.Timestamp],
+    ) -> "IntervalUniverse":
+        """
+        Return the universe between the start and last datetimes.
+
+        Parameters
+        ----------
+        start_datetime : Union[str, datetime, pd.Timestamp]
+            The start datetime (inclusive).
+        last_datetime : Union[str, datetime, pd.Timestamp]
+            The last datetime (inclusive).
+        """
+        start = self._index.searchsorted(pd.Timestamp(start_datetime), side="left")
+        stop = self._index.searchsorted(pd.Timestamp(last_datetime), side="right")
+        return IntervalUniverse(
+            index=self._index[start:stop],
+            symbols=self._symbols,
+            codes=self._codes,
+            starts=self._starts - start,
+            stops=self._stops - start,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the universe to a JSON compatible dictionary.
+        """
+        return {
+            "index": [timestamp.isoformat() for timestamp in self._index],
+            "index_name": self._index.name,
+            "frequency": self._index.freqstr,
+            "symbols": self._symbols.tolist(),
+            "codes": self._codes.tolist(),
+            "starts": self._starts.tolist(),
+            "stops": self._stops.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "IntervalUniverse":
+        """
+        Deserialize the universe from a dictionary created by `to_dict`.
+
+        Parameters
+        ----------
+        value : dict
+            Serialized universe.
+        """
+        index = pd.DatetimeIndex(value["index"], name=value.get("index_name"))
+        if value.get("frequency") and len(index) > 0:
+            try:
+                index.freq = value["frequency"]
+            except ValueError:
+                # Frequency of a session calendar, e.g. custom business
+                # days, which cannot be restored from the frequency string
+                pass
+
+        return cls(
+            index=index,
+            symbols=value["symbols"],
+            codes=value["codes"],
+            starts=value["starts"],
+            stops=value["stops"],
+        )
+
+    def to_parquet(self, path: str) -> None:
+        """
+        Export the intervals to a parquet file.
+
+        The symbols are dictionary encoded and the datetime index and
+        symbols are stored in the file metadata.
+
+        Parameters
+        ----------
+        path : str
+            Parquet file path.
+        """
+        metadata = self.to_dict()
+        table = pa.table(
+            {
+                "symbol": pa.DictionaryArray.from_arrays(
+                    pa.array(metadata.pop("codes"), type=pa.int32()),
+                    pa.array(metadata["symbols"], type=pa.string()),
+                ),
+                "start": pa.array(metadata.pop("starts"), type=pa.int64()),
+                "stop": pa.array(metadata.pop("stops"), type=pa.int64()),
+            }
+        )
+        table = table.replace_schema_metadata(
+            {_PARQUET_METADATA_KEY: json.dumps(metadata)}
+        )
+        pq.write_table(table, path)
+
+    @classmethod
+    def read_parquet(cls, path: str) -> "IntervalUniverse":
+        """
+        Read the universe from a parquet file created by `to_parquet`.
+
+        Parameters
+        ----------
+        path : str
+            Parquet file path.
+        """
+        table = pq.read_table(path)
+        try:
+            metadata = json.loads(table.schema.metadata[_PARQUET_METADATA_KEY])
+        except (KeyError, TypeError):
+            raise ValueError(f"File {path} is not an interval universe")
+
+        symbols = table.column("symbol").to_pandas()
+        codes = pd.Index(metadata["symbols"]).get_indexer(symbols)
+        return cls.from_dict(
+            {
+                **metadata,
+                "codes": codes,
+                "starts": table.column("start").to_numpy(),
+                "stops": table.column("stop").to_numpy(),
+            }
+        )
+
+    @classmethod
+    def from_ranges(
+        cls,
+        index: pd.DatetimeIndex,
+        ranges: Dict[str, Optional[tuple]],
+    ) -> "IntervalUniverse":
+        """
+        Create an interval universe from the inclusive datetime ranges.
+
+        Parameters
+        ----------
+        index : pd.DatetimeIndex
+            Sorted datetime index of the universe.
+        ranges : Dict[str, tuple]
+            Dictionary of symbols and their valid start and last datetimes,
+            both inclusive.
+        """
+        index = pd.DatetimeIndex(index)
+        symbols = list(ranges.keys())
+        starts = index.searchsorted(
+            [valid_range[0] for valid_range in ranges.values()], side="left"
+        )
+        stops = index.searchsorted(
+            [valid_range[1] for valid_range in ranges.values()], side="right"
+        )
+        return cls(
+            index=index,
+            symbols=symbols,
+            codes=np.arange(len(symbols)),
+            starts=starts,
+            stops=stops,
+        )
+
+    @classmethod
+    def _combine(
+        cls, universes: List["IntervalUniverse"], all_required: bool
+    ) -> "IntervalUniverse":
+        """
+        Combine the universes by counting the coverage of their intervals.
+        """
+        index = universes[0]._index
+        for universe in universes[1:]:
+            if not universe._index.equals(index):
+                raise ValueError(
+                    "Interval universes can only be combined with the same index"
+                )
+
+        symbols = universes[0]._symbols
+        for universe in universes[1:]:
+            symbols = symbols.append(
+                universe._symbols[~universe._symbols.isin(symbols)]
+            )
+
+        codes, starts, stops = cls._sweep(
+            length=len(index),
+            codes=np.concatenate(
+                [symbols.get_indexer(u._symbols)[u._codes] for u in universes]
+            ),
+            starts=np.concatenate([u._starts for u in universes]),
+            stops=np.concatenate([u._stops for u in universes]),
+            min_count=len(universes) if all_required else 1,
+        )
+        return cls(
+            index=index, symbols=symbols, codes=codes, starts=starts, stops=stops
+        )
+
+    @staticmethod
+    def _sweep(
+        length: int,
+        codes: np.ndarray,
+        starts: np.ndarray,
+        stops: np.ndarray,
+        min_count: int,
+    ):
+        """
+        Sweep the interval boundaries and return the normalized intervals
+        covered by at least `min_count` intervals.
+        """
+        non_empty = starts < stops
+        codes, starts, stops = codes[non_empty], starts[non_empty], stops[non_empty]
+        if len(codes) == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, empty
+
+        # Encode the symbol and position of the boundaries in a single key
+        # so that the boundaries of each symbol are contiguous after sorting
+        keys = np.concatenate(
+            [codes * (length + 1) + starts, codes * (length + 1) + stops]
+        )
+        deltas = np.concatenate([np.ones(len(starts)), -np.ones(len(stops))])
+        keys, inverse = np.unique(keys, return_inverse=True)
+        coverage = np.cumsum(np.bincount(inverse, weights=deltas))
+
+        # The coverage between a boundary and the next one. The coverage
+        # returns to zero at the last boundary of each symbol, so a covered
+        # segment is always followed by a boundary of the same symbol.
+        covered = coverage >= min_count
+        previous_covered = np.concatenate([[False], covered[:-1]])
+        next_covered = np.concatenate([covered[1:], [False]])
+        segment_starts = np.flatnonzero(covered & ~previous_covered)
+        segment_stops = np.flatnonzero(covered & ~next_covered) + 1
+
+        return (
+            keys[segment_starts] // (length + 1),
+            keys[segment_starts] % (length + 1),
+            keys[segment_stops] % (length + 1),
+        )
+
+
+class ValidityCombiner:
+    """
+    Validity combiner.
+
+    The combiner intersects the validities of the pipelines incrementally
+    into a single preallocated boolean array, so the validities can be
+    released once they are added.
+
+    The datetimes and symbols of the combined validity are aligned once
+    for each validity. Unless they are specified, they are the index and
+    columns of the first validity. The datetimes and symbols missing in a
+    validity are regarded as `fill_value`, and missing values are regarded
+    as invalid.
+    """
+
+    def __init__(
+        self,
+        index: Optional[pd.Index] = None,
+        columns: Optional[pd.Index] = None,
+        fill_value: bool = False,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        index : Optional[pd.Index]
+            Datetime index of the combined validity. Default is None, which
+            means the index of the first validity.
+        columns : Optional[pd.Index]
+            Symbols of the combined validity. Default is None, which means
+            the columns of the first validity.
+        fill_value : bool
+            Validity of the datetimes and symbols missing in a validity.
+            Default is False, which means they are invalid. If True, a
+            validity does not constrain the datetimes and symbols it misses.
+        """
+        self._index = None if index is None else pd.Index(index)
+        self._columns = None if columns is None else pd.Index(columns)
+        self._fill_value = fill_value
+        self._values = None
+
+    @property
+    def result(self) -> Optional[pd.DataFrame]:
+        """
+        Return the combined validity, or None if no validity is added.
+        """
+        if self._values is None:
+            return None
+
+        return pd.DataFrame(self._values, index=self._index, columns=self._columns)
+
+    def add(self, validity: Union[pd.DataFrame, IntervalUniverse]) -> None:
+        """
+        Intersect a validity into the combined validity.
+
+        Parameters
+        ----------
+        validity : Union[pd.DataFrame, IntervalUniverse]
+            Validity produced by a single pipeline.
+        """
+        if isinstance(validity, IntervalUniverse):
+            validity = validity.to_dense()
+
+        if self._values is None:
+            if self._index is None:
+                self._index = validity.index
+            if self._columns is None:
+                self._columns = validity.columns
+            self._values = np.ones((len(self._index), len(self._columns)), dtype=bool)
+
+        values = _to_validity_array(validity)
+        row_targets, row_sources = ValidityCombiner._align(self._index, validity.index)
+        column_targets, column_sources = ValidityCombiner._align(
+            self._columns, validity.columns
+        )
+        if row_targets is None and column_targets is None:
+            np.logical_and(self._values, values, out=self._values)
+            return
+
+        if row_targets is None:
+            row_targets = row_sources = np.arange(len(self._index))
+        if column_targets is None:
+            column_targets = column_sources = np.arange(len(self._columns))
+
+        if not self._fill_value:
+            missing_rows = np.ones(len(self._index), dtype=bool)
+            missing_rows[row_targets] = False
+            self._values[missing_rows] = False
+            missing_columns = np.ones(len(self._columns), dtype=bool)
+            missing_columns[column_targets] = False
+            self._values[:, missing_columns] = False
+
+        self._values[np.ix_(row_targets, column_targets)] &= values[
+            np.ix_(row_sources, column_sources)
+        ]
+
+    @staticmethod
+    def _align(target: pd.Index, source: pd.Index):
+        """
+        Return the positions in the target and the source of the common
+        labels, or None if the source is identical to the target.
+        """
+        if target.equals(source):
+            return None, None
+
+        indexer = source.get_indexer(target)
+        targets = np.flatnonzero(indexer >= 0)
+        return targets, indexer[targets]
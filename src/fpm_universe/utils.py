@@ -1,8 +1,23 @@
-from datetime import datetime
-from typing import Optional, Union
+import hashlib
+import inspect
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from enum import Enum
+from functools import wraps
+from os import listdir
+from os.path import isdir
+from os.path import join as fsjoin
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
 
+import numpy as np
+import pandas as pd
 from pandas import Timestamp
 
+from .calendars import CalendarFrequency
+
 
 def to_timestamp(value: Optional[Union[str, datetime, Timestamp]]) -> Timestamp:
     """
@@ -20,3 +35,330 @@ def to_timestamp(value: Optional[Union[str, datetime, Timestamp]]) -> Timestamp:
         return Timestamp(value)
     except ValueError:
         raise ValueError(f"Failed to convert value {value} to Timestamp")
+
+
+def make_datetime_range(
+    start_datetime: Union[str, datetime, Timestamp],
+    last_datetime: Union[str, datetime, Timestamp],
+    frequency: str,
+    name: Optional[str] = None,
+) -> pd.DatetimeIndex:
+    """
+    Create the datetime range of the universe.
+
+    If the frequency is a calendar frequency, the range contains only the
+    trading timestamps of its session calendar. Otherwise, it is the pandas
+    datetime range of the frequency.
+
+    :param start_datetime: The universe start datetime.
+    :type start_datetime: `str`, or any type convertible by pandas `Timestamp`.
+    :param last_datetime: The universe last datetime.
+    :type last_datetime: `str`, or any type convertible by pandas `Timestamp`.
+    :param frequency: The frequency string supported in pandas, or the
+      calendar frequency.
+    :type frequency: `str`, or `fpm_universe.calendars.CalendarFrequency`.
+    :param name: The name of the datetime range.
+    :type name: `str`.
+    :rtype: `pandas.DatetimeIndex`.
+    """
+    if isinstance(frequency, CalendarFrequency):
+        return frequency.calendar.datetime_range(
+            start_datetime=start_datetime,
+            last_datetime=last_datetime,
+            frequency=str(frequency),
+            name=name,
+        )
+
+    return pd.date_range(
+        start=start_datetime, end=last_datetime, freq=frequency, name=name
+    )
+
+
+def shift_datetime_range(
+    datetime_range: pd.DatetimeIndex, periods: int, frequency: Optional[str] = None
+) -> pd.DatetimeIndex:
+    """
+    Shift the datetime range by a number of timeframes.
+
+    :param datetime_range: The datetime range created by
+      `make_datetime_range`.
+    :type datetime_range: `pandas.DatetimeIndex`.
+    :param periods: The number of timeframes to shift, which is negative to
+      shift backward.
+    :type periods: `int`.
+    :param frequency: The frequency of the range. The range is shifted in
+      the trading timestamps if it is a calendar frequency, or in the
+      frequency of the range otherwise.
+    :type frequency: `str`, or `fpm_universe.calendars.CalendarFrequency`.
+    :rtype: `pandas.DatetimeIndex`.
+    """
+    if isinstance(frequency, CalendarFrequency):
+        return frequency.calendar.shift(
+            datetime_range=datetime_range,
+            periods=periods,
+            frequency=str(frequency),
+        )
+
+    return datetime_range.shift(periods, freq=datetime_range.freq or frequency)
+
+
+def slice_window(
+    values: Any,
+    datetime_range: pd.DatetimeIndex,
+    lookback: int,
+    frequency: Optional[str] = None,
+) -> Any:
+    """
+    Slice the values to the datetime range with the lookback timeframes.
+
+    The values are kept from `lookback` timeframes before the first
+    datetime of the range, counted both in the frequency of the range and
+    in the rows of the values, whichever is earlier, to the last datetime
+    of the range.
+
+    :param values: The values indexed by datetime. Values which are not
+      pandas objects, or not indexed by a sorted datetime index, are returned
+      as is.
+    :type values: `pandas.DataFrame` or `pandas.Series`.
+    :param datetime_range: The datetime range of the universe.
+    :type datetime_range: `pandas.DatetimeIndex`.
+    :param lookback: The number of timeframes required before the first
+      datetime of the range.
+    :type lookback: `int`.
+    :param frequency: The frequency of the range, which counts the lookback
+      timeframes in the trading timestamps if it is a calendar frequency.
+    :type frequency: `str`, or `fpm_universe.calendars.CalendarFrequency`.
+    :return: The sliced values.
+    """
+    if (
+        not isinstance(values, (pd.DataFrame, pd.Series))
+        or not isinstance(values.index, pd.DatetimeIndex)
+        or not values.index.is_monotonic_increasing
+        or len(datetime_range) == 0
+    ):
+        return values
+
+    index = values.index
+    first_datetime = datetime_range[0]
+    window_start_datetime = first_datetime
+    if lookback > 0 and isinstance(frequency, CalendarFrequency):
+        window_start_datetime = shift_datetime_range(
+            datetime_range=datetime_range[:1], periods=-lookback, frequency=frequency
+        )[0]
+    elif lookback > 0 and datetime_range.freq is not None:
+        window_start_datetime = first_datetime - lookback * datetime_range.freq
+
+    try:
+        start = min(
+            index.searchsorted(window_start_datetime, side="left"),
+            max(index.searchsorted(first_datetime, side="left") - lookback, 0),
+        )
+        stop = index.searchsorted(datetime_range[-1], side="right")
+    except TypeError:
+        # Mismatch of timezone awareness between the values and the range
+        return values
+
+    return values.iloc[start:stop]
+
+
+def lookback_window(
+    lookback: Callable[..., int], inputs: Sequence[str] = ("values",)
+) -> Callable:
+    """
+    Decorate a pipeline function to compute only on the universe window.
+
+    The decorated function slices its inputs to the range between the
+    start datetime, less the lookback timeframes, and the last datetime
+    before computing. The lookback is declared by a callable receiving the
+    arguments of the pipeline function, and is exposed as the attribute
+    `lookback` of the decorated function.
+
+    :param lookback: Callable returning the number of timeframes required
+      before the start datetime, given the arguments of the function.
+    :type lookback: `Callable[..., int]`.
+    :param inputs: The names of the arguments to slice.
+    :type inputs: `Sequence[str]`.
+    :return: The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            datetime_range = make_datetime_range(
+                start_datetime=arguments["start_datetime"],
+                last_datetime=arguments["last_datetime"],
+                frequency=arguments["frequency"],
+            )
+            periods = lookback(**arguments)
+            for name in inputs:
+                arguments[name] = slice_window(
+                    values=arguments[name],
+                    datetime_range=datetime_range,
+                    lookback=periods,
+                    frequency=arguments["frequency"],
+                )
+            return function(*bound.args, **bound.kwargs)
+
+        wrapper.lookback = lookback
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """
+    Yield a temporary path to write a file or a directory, which replaces
+    the path atomically once the block exits without errors, so the readers
+    never see a partial file or directory. The temporary path is removed
+    if the block raises.
+
+    :param path: The path of the file or directory.
+    :type path: `str`.
+    :return: The temporary path next to the path.
+    :raises OSError: If the temporary path cannot replace the path, e.g. a
+      directory replacing a non-empty directory.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    _remove_path(temporary_path)
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    except BaseException:
+        _remove_path(temporary_path)
+        raise
+
+
+def write_json(path: str, value: Any) -> None:
+    """
+    Write the value into a json file atomically.
+
+    :param path: The path of the json file.
+    :type path: `str`.
+    :param value: The value serializable in json.
+    :type value: `Any`.
+    """
+    with atomic_path(path) as temporary_path:
+        with open(temporary_path, "w") as fp:
+            json.dump(value, fp)
+
+
+def read_versioned_json(path: str, version: int, description: str) -> Dict[str, Any]:
+    """
+    Read a json file with the key `version`, e.g. a manifest or metadata.
+
+    :param path: The path of the json file.
+    :type path: `str`.
+    :param version: The supported version.
+    :type version: `int`.
+    :param description: The description of the file in the error, e.g.
+      "Dataset".
+    :type description: `str`.
+    :return: The content of the file.
+    :rtype: `dict`.
+    :raises ValueError: If the version of the file is not supported.
+    """
+    with open(path) as fp:
+        value = json.load(fp)
+    if value.get("version") != version:
+        raise ValueError(
+            f"{description} version {value.get('version')} of {path} is not "
+            "supported"
+        )
+    return value
+
+
+def prefixed_directories(directory: str, prefix: str) -> List[str]:
+    """
+    Return the names of the subdirectories starting with the prefix, with
+    the prefix removed, e.g. the keys of the partitions.
+
+    :param directory: The parent directory.
+    :type directory: `str`.
+    :param prefix: The prefix of the subdirectory names, e.g. "date=".
+    :type prefix: `str`.
+    :return: The names without the prefix, sorted.
+    :rtype: `list[str]`.
+    """
+    return sorted(
+        name[len(prefix) :]  # noqa: E203
+        for name in listdir(directory)
+        if name.startswith(prefix) and isdir(fsjoin(directory, name))
+    )
+
+
+def _remove_path(path: str) -> None:
+    """
+    Remove the file or directory of the path if it exists.
+    """
+    if isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def fingerprint(value: Any) -> str:
+    """
+    Return the fingerprint of a value.
+
+    The fingerprint is a digest of the content of the value, so that equal
+    dataframes, arrays and containers of them share the same fingerprint
+    even if they are different objects.
+
+    :param value: The value to fingerprint. Supported types are pandas
+      objects, numpy arrays of non-object dtypes, dictionaries, lists, tuples
+      and the scalars of primitive, datetime and enum types.
+    :type value: `Any`.
+    :return: The hexadecimal digest of the value.
+    :rtype: `str`.
+    :raises TypeError: If the value, or any value it contains, is not
+      supported.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_fingerprint(digest, value)
+    return digest.hexdigest()
+
+
+def _update_fingerprint(digest: Any, value: Any) -> None:
+    """
+    Update the digest with the type and the content of the value.
+    """
+    digest.update(type(value).__qualname__.encode())
+    if isinstance(value, pd.DataFrame):
+        _update_fingerprint(digest, [str(column) for column in value.columns])
+        _update_fingerprint(digest, [str(dtype) for dtype in value.dtypes])
+        digest.update(pd.util.hash_pandas_object(value, index=True).values)
+    elif isinstance(value, pd.Series):
+        _update_fingerprint(digest, (str(value.name), str(value.dtype)))
+        digest.update(pd.util.hash_pandas_object(value, index=True).values)
+    elif isinstance(value, pd.Index):
+        _update_fingerprint(digest, str(value.dtype))
+        digest.update(pd.util.hash_pandas_object(value).values)
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Cannot fingerprint numpy arrays of object dtype")
+        _update_fingerprint(digest, (str(value.dtype), value.shape))
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(str(len(value)).encode())
+        for key in sorted(value.keys(), key=repr):
+            _update_fingerprint(digest, key)
+            _update_fingerprint(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update_fingerprint(digest, item)
+    elif value is None or isinstance(
+        value, (bool, int, float, str, bytes, date, timedelta, Enum, np.generic)
+    ):
+        digest.update(repr(value).encode())
+    else:
+        raise TypeError(f"Cannot fingerprint value of type {type(value)}")
@@ -0,0 +1,142 @@
+import os
+import pickle
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+import pytest
+
+from fpm_universe.calendars import CalendarFrequency, SessionCalendar
+from fpm_universe.config import Configuration
+from fpm_universe.pipeline import ranking
+from fpm_universe.utils import make_datetime_range, shift_datetime_range
+
+
+@pytest.fixture
+def calendar():
+    return SessionCalendar(
+        holidays=["2022-01-17"], open_time="09:30", close_time="16:00"
+    )
+
+
+def test_session_calendar_daily_range(calendar):
+    result = calendar.datetime_range("2022-01-13", "2022-01-19", "B")
+    pd.testing.assert_index_equal(
+        pd.DatetimeIndex(["2022-01-13", "2022-01-14", "2022-01-18", "2022-01-19"]),
+        result,
+        exact=False,
+    )
+    assert result.freq == calendar.offset
+
+
+def test_session_calendar_intraday_range(calendar):
+    result = calendar.datetime_range("2022-01-14 15:00", "2022-01-18 10:00", "30min")
+    pd.testing.assert_index_equal(
+        pd.DatetimeIndex(
+            [
+                "2022-01-14 15:00",
+                "2022-01-14 15:30",
+                "2022-01-14 16:00",
+                "2022-01-18 09:30",
+                "2022-01-18 10:00",
+            ]
+        ),
+        result,
+    )
+
+
+def test_session_calendar_whole_day_range():
+    result = SessionCalendar().datetime_range("2022-01-14", "2022-01-17 06:00", "6H")
+    pd.testing.assert_index_equal(
+        pd.DatetimeIndex(
+            [
+                "2022-01-14 00:00",
+                "2022-01-14 06:00",
+                "2022-01-14 12:00",
+                "2022-01-14 18:00",
+                "2022-01-17 00:00",
+                "2022-01-17 06:00",
+            ]
+        ),
+        result,
+    )
+
+
+def test_session_calendar_shift(calendar):
+    frequency = CalendarFrequency("30min", calendar)
+    datetime_range = make_datetime_range(
+        "2022-01-18 09:30", "2022-01-18 10:00", frequency
+    )
+    result = shift_datetime_range(datetime_range, periods=-2, frequency=frequency)
+    pd.testing.assert_index_equal(
+        pd.DatetimeIndex(["2022-01-14 15:30", "2022-01-14 16:00"]),
+        result,
+    )
+
+
+def test_session_calendar_unsupported_frequency(calendar):
+    with pytest.raises(ValueError):
+        calendar.datetime_range("2022-01-01", "2022-03-31", "M")
+
+
+def test_session_calendar_from_file():
+    with TemporaryDirectory() as tmp_dir:
+        with open(os.path.join(tmp_dir, "holidays.csv"), "w") as fp:
+            fp.write("date,name\n2022-01-17,Martin Luther King Jr. Day\n")
+        path = os.path.join(tmp_dir, "calendar.yaml")
+        with open(path, "w") as fp:
+            fp.write(
+                'holidays: holidays.csv\nopen_time: "09:30"\nclose_time: "16:00"\n'
+            )
+
+        calendar = SessionCalendar.from_file(path)
+
+    pd.testing.assert_index_equal(pd.DatetimeIndex(["2022-01-17"]), calendar.holidays)
+
+
+def test_calendar_frequency_pickle(calendar):
+    frequency = CalendarFrequency("5min", calendar)
+    result = pickle.loads(pickle.dumps(frequency))
+    assert result == "5min"
+    assert repr(result.calendar) == repr(calendar)
+
+
+def test_configuration_calendar():
+    config = Configuration(
+        stream="""
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-14"
+last_datetime: "2022-01-18"
+frequency: "B"
+calendar:
+    holidays: ["2022-01-17"]
+pipeline: []
+data: {}
+"""
+    )
+    assert isinstance(config.frequency, CalendarFrequency)
+
+    values = pd.DataFrame(
+        [[1.0, 2.0], [2.0, 1.0], [1.0, 2.0], [2.0, 1.0]],
+        index=pd.bdate_range("2022-01-13", "2022-01-18"),
+        columns=["A", "B"],
+    )
+    result = ranking(
+        values=values,
+        threshold_pct=0.5,
+        tolerance_timeframes=1,
+        start_datetime=config.start_datetime,
+        last_datetime=config.last_datetime,
+        frequency=config.frequency,
+    )
+    # The holiday is excluded from the datetime range, so the validity of
+    # instrument B on the holiday is not held to the next session
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(
+            [[True, False], [True, False]],
+            index=pd.DatetimeIndex(["2022-01-14", "2022-01-18"], name="datetime"),
+            columns=["A", "B"],
+        ),
+        result,
+        check_freq=False,
+    )
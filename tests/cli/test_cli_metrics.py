@@ -0,0 +1,97 @@
+import pandas as pd
+from click.testing import CliRunner
+
+from fpm_universe.cli import main
+
+CONFIG_TEXT = """
+output_filename: "{output_directory}/universe.parquet"
+intermediate_directory: "{output_directory}/intermediate/"
+start_datetime: "2022-01-03"
+last_datetime: "2022-01-14"
+frequency: "B"
+pipeline:
+  - name: close_ranking
+    function: ranking
+    parameters:
+      values: !data closes
+      threshold_pct: 0.5
+      tolerance_timeframes: 0
+data:
+  prices:
+    function: load_all_data
+    parameters:
+      directory: "{output_directory}/prices"
+      from_format: "csv"
+      to_format:
+        dataframe:
+          index_col: "Date"
+          parse_dates: true
+      lazy: true
+  closes:
+    function: concat
+    parameters:
+      data: !data prices
+      column: "Close"
+"""
+
+
+def test_cli_metrics_file(tmp_path):
+    (tmp_path / "prices").mkdir()
+    index = pd.bdate_range("2022-01-03", "2022-01-14", name="Date")
+    for i, symbol in enumerate(["A", "B", "C", "D"]):
+        pd.DataFrame({"Close": range(i, i + len(index))}, index=index).to_csv(
+            tmp_path / "prices" / f"{symbol}.csv"
+        )
+    config_path = tmp_path / "universe.yaml"
+    config_path.write_text(CONFIG_TEXT)
+    metrics_path = tmp_path / "universe.prom"
+
+    result = CliRunner().invoke(
+        main,
+        [
+            "-c",
+            str(config_path),
+            "-p",
+            f"output_directory={tmp_path}",
+            "--metrics-file",
+            str(metrics_path),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    text = metrics_path.read_text()
+    labels = f'config="universe",parameter_output_directory="{tmp_path}"'
+    assert f"fpm_universe_run_success{{{labels}}} 1\n" in text
+    assert f'fpm_universe_pipeline_rows{{{labels},pipeline="close_ranking"}} 10\n' in (
+        text
+    )
+    assert (
+        'fpm_universe_data_columns{config="universe",data="closes",'
+        f'parameter_output_directory="{tmp_path}"}} 4\n'
+    ) in text
+    assert f'fpm_universe_cache_misses{{cache="data_files",{labels}}} 4\n' in text
+    assert "fpm_universe_pipeline_duration_seconds{" in text
+    assert "fpm_universe_bytes_read{" in text
+    assert "fpm_universe_bytes_written{" in text
+    assert "fpm_universe_peak_rss_bytes{" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_cli_metrics_file_failure(tmp_path):
+    config_path = tmp_path / "universe.yaml"
+    config_path.write_text(CONFIG_TEXT)
+    metrics_path = tmp_path / "universe.prom"
+
+    result = CliRunner().invoke(
+        main,
+        [
+            "-c",
+            str(config_path),
+            "-p",
+            f"output_directory={tmp_path}",
+            "--metrics-file",
+            str(metrics_path),
+        ],
+    )
+    assert result.exit_code != 0
+    assert "fpm_universe_run_success{" in metrics_path.read_text()
+    assert "} 0\n" in metrics_path.read_text()
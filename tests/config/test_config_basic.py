@@ -33,3 +33,14 @@ def test_config_basic(config_text, parameters):
     assert config.frequency == "B"
     assert config.pipelines == []
     assert config.datas == []
+    assert config.output_dataset is None
+
+
+def test_config_output_dataset(config_text, parameters):
+    config_text = config_text.replace(
+        'output_filename: "{output_directory}/universe/{date}.parquet"',
+        'output_dataset: "{output_directory}/universe"',
+    )
+    config = Configuration(stream=config_text, parameters=parameters)
+    assert config.output_filename is None
+    assert config.output_dataset == ".data/universe"
@@ -45,3 +45,51 @@ def test_data_store(config_text: str):
     )
     obj_b = data_store.get(name="b")
     assert obj_b == [5, 10, 15, 2, 4, 6]
+
+
+@pytest.fixture
+def column_consumers_config_text():
+    return """
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2020-01-01"
+last_datetime: "2020-01-31"
+frequency: "B"
+pipeline:
+    - name: "pipeline_a"
+      function: "pipeline_a"
+      parameters:
+          values: !data volumes
+data:
+    prices:
+        function: load_all_data
+    others:
+        function: load_all_data
+    volumes:
+        function: concat
+        parameters:
+            data: !data prices
+            column: Volume
+    panels:
+        function: concat_columns
+        parameters:
+            data: !data prices
+            columns: [Close, Volume]
+    other_volumes:
+        function: concat
+        parameters:
+            data: !data others
+            column: Volume
+    other_custom:
+        function: custom
+        parameters:
+            values: !data others
+"""
+
+
+def test_data_store_infer_columns(column_consumers_config_text: str):
+    config = Configuration(stream=column_consumers_config_text)
+    data_store = DataStore(config=config)
+    assert data_store._infer_columns(name="prices") == ["Volume", "Close"]
+    assert data_store._infer_columns(name="others") is None
+    assert data_store._infer_columns(name="volumes") is None
@@ -1,6 +1,11 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 from fpm_universe.config import Configuration, DataStore, PipelineExecutor
+from fpm_universe.registry import declare
+from fpm_universe.universe import IntervalUniverse
+from fpm_universe.utils import lookback_window
 
 
 def pipeline_a(a, **kwargs):
@@ -56,3 +61,115 @@ def test_pipeline_executor_execute_all(config_text):
     name, pipeline_result = next(iter)
     assert name == "pipeline_a"
     assert pipeline_result == 106
+
+
+@pytest.fixture
+def chunk_config_text():
+    return """
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-10"
+last_datetime: "2022-03-31"
+frequency: "B"
+chunk_timeframes: 7
+pipeline:
+    - name: "ranking"
+      function: "ranking"
+      parameters:
+          values: !data values
+          threshold_pct: 0.5
+          tolerance_timeframes: 3
+    - name: "rolling_validity"
+      function: "rolling_validity"
+      parameters:
+          values: !data values
+          threshold_pct: 0.6
+          rolling_window: 5
+          tolerance_timeframes: 2
+    - name: "sparse_validity"
+      function: "sparse_validity"
+      parameters:
+          values: !data values
+data:
+    values:
+        function: random_values
+"""
+
+
+def random_values():
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2021-12-01", "2022-03-31")
+    values = pd.DataFrame(
+        random_state.rand(len(index), 5), index=index, columns=list("ABCDE")
+    )
+    values = values.mask(random_state.rand(*values.shape) < 0.3)
+    # Drop some datetimes from the values
+    return values.loc[random_state.rand(len(index)) > 0.1]
+
+
+@lookback_window(lambda **_: 2)
+def sparse_validity(values, start_datetime, last_datetime, frequency):
+    datetime_range = pd.date_range(start_datetime, last_datetime, freq=frequency)
+    validity = values.notnull().rolling(3, min_periods=1).sum() >= 2
+    return IntervalUniverse.from_dense(
+        validity.reindex(index=datetime_range, fill_value=False)
+    )
+
+
+def test_pipeline_executor_execute_chunks(chunk_config_text):
+    config = Configuration(stream=chunk_config_text)
+    single_shot_config = Configuration(stream=chunk_config_text)
+    single_shot_config.chunk_timeframes = None
+    data_store = DataStore(
+        config=config, custom_functions={"random_values": random_values}
+    )
+    custom_functions = {"sparse_validity": sparse_validity}
+
+    for pipeline in config.pipelines:
+        _, result = PipelineExecutor.execute(
+            config=config,
+            pipeline=dict(pipeline),
+            data_store=data_store,
+            custom_functions=custom_functions,
+        )
+        _, expected = PipelineExecutor.execute(
+            config=single_shot_config,
+            pipeline=dict(pipeline),
+            data_store=data_store,
+            custom_functions=custom_functions,
+        )
+        if isinstance(expected, IntervalUniverse):
+            assert expected == result
+        else:
+            pd.testing.assert_frame_equal(expected, result, check_freq=False)
+
+
+def test_pipeline_executor_execute_chunks_not_memoized(chunk_config_text):
+    config = Configuration(stream=chunk_config_text)
+    data_store = DataStore(
+        config=config, custom_functions={"random_values": random_values}
+    )
+    calls = []
+
+    @declare(pure=True, memoize=True, lookback=lambda **_: 2)
+    def memoized_validity(values, start_datetime, last_datetime, frequency):
+        calls.append((start_datetime, last_datetime))
+        return sparse_validity(values, start_datetime, last_datetime, frequency)
+
+    registry = PipelineExecutor.create_registry(
+        custom_functions={"memoized_validity": memoized_validity}
+    )
+    PipelineExecutor.execute(
+        config=config,
+        pipeline={
+            "name": "memoized_validity",
+            "function": "memoized_validity",
+            "parameters": {"values": data_store.get("values")},
+        },
+        data_store=data_store,
+        registry=registry,
+    )
+
+    # Each chunk is called without being fingerprinted or cached
+    assert len(calls) > 1
+    assert (registry.hits, registry.misses) == (0, 0)
@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def validity():
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2022-01-20", "2022-03-10", name="datetime")
+    return pd.DataFrame(
+        random_state.rand(len(index), 6) < 0.6,
+        index=index,
+        columns=["A", "AA", "AAL", "AAPL", "ABC", "ABT"],
+    )
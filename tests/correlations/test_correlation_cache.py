@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from fpm_universe.correlations import CorrelationCache, _triangle_pairs
+
+
+def test_triangle_pairs():
+    rows, columns = np.triu_indices(5, k=1)
+    positions = np.arange(len(rows))
+    result_rows, result_columns = _triangle_pairs(5, positions)
+    np.testing.assert_array_equal(rows, result_rows)
+    np.testing.assert_array_equal(columns, result_columns)
+
+
+def test_correlation_cache(tmp_path):
+    random_state = np.random.RandomState(0)
+    values = pd.DataFrame(random_state.randn(20, 4), columns=["A", "B", "C", "D"])
+    datetimes = pd.date_range("2020-01-01", periods=3, freq="D")
+    matrices = [values.iloc[i:].head(10).corr().to_numpy() for i in range(3)]
+
+    cache = CorrelationCache(str(tmp_path))
+    key = CorrelationCache.key(values, datetimes, 10)
+    assert key == CorrelationCache.key(values.copy(), datetimes, 10)
+    assert key != CorrelationCache.key(values, datetimes, 5)
+    assert cache.get(key) is None
+
+    cache.put(key, datetimes, values.columns, lambda i: matrices[i])
+    entry = CorrelationCache(str(tmp_path)).get(key)
+    assert entry.columns == ["A", "B", "C", "D"]
+    assert entry.triangles.dtype == np.float32
+    assert isinstance(entry.triangles, np.memmap)
+    for i, datetime in enumerate(datetimes):
+        left, right = entry.pairs(datetime, threshold=0.2)
+        expected_left, expected_right = np.nonzero(
+            np.triu(np.abs(matrices[i]) > 0.2, k=1)
+        )
+        np.testing.assert_array_equal(expected_left, left)
+        np.testing.assert_array_equal(expected_right, right)
@@ -1,7 +1,7 @@
 import pandas as pd
 import pytest
 
-from fpm_universe.data import concat
+from fpm_universe.data import concat, concat_columns
 
 
 @pytest.fixture
@@ -34,3 +34,19 @@ def test_concat(prices):
         index=pd.bdate_range("2022-01-01", "2022-01-05", name="Date"),
     )
     pd.testing.assert_frame_equal(result, expected)
+
+
+def test_concat_columns_unaligned():
+    index = pd.bdate_range("2022-01-03", periods=6, name="Date")
+    data = {
+        "A": pd.DataFrame({"Close": 1.0, "Volume": 10}, index=index[:4]),
+        "AA": pd.DataFrame({"Close": 2.0, "Volume": 20}, index=index[2:]),
+        "AAPL": pd.DataFrame({"Close": 3.0, "Volume": 30}, index=index[[0, 5]]),
+    }
+
+    result = concat_columns(data=data, columns=["Close", "Volume"])
+
+    assert list(result.keys()) == ["Close", "Volume"]
+    for column, df in result.items():
+        expected = pd.DataFrame({key: value[column] for key, value in data.items()})
+        pd.testing.assert_frame_equal(expected.astype("float64"), df, check_freq=False)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.data import convert_str_index_to_date
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {"A": [1.0, 2.0, 3.0], "B": [4.0, 5.0, 6.0]},
+        index=pd.Index(
+            [
+                "2022-01-03 00:00:00-05:00",
+                "2022-01-04 00:00:00-05:00",
+                "2022-01-05 00:00:00-05:00",
+            ],
+            name="Date",
+        ),
+    )
+
+
+@pytest.mark.parametrize("format", [None, "%Y-%m-%d"])
+def test_convert_str_index_to_date(df, format):
+    original = df.copy()
+    result = convert_str_index_to_date(df=df, format=format)
+
+    pd.testing.assert_index_equal(
+        pd.DatetimeIndex(["2022-01-03", "2022-01-04", "2022-01-05"], name="Date"),
+        result.index,
+    )
+    pd.testing.assert_frame_equal(original, df)
+    assert np.shares_memory(df.to_numpy(), result.to_numpy())
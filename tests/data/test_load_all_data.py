@@ -1,8 +1,12 @@
+import gzip
+import io
 import json
 import os
 from tempfile import TemporaryDirectory
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import pytest
 
 from fpm_universe.data import load_all_data
@@ -120,3 +124,216 @@ def test_load_all_data_from_json_to_dict(companies_directory, companies):
     )
 
     assert result == companies
+
+
+################################################################
+# Test column projection
+################################################################
+@pytest.fixture
+def ohlc_directory():
+    index = pd.Index(["2022-01-03", "2022-01-04", "2022-01-05"], name="Date")
+    with TemporaryDirectory() as tmp_dir:
+        for symbol in ["A", "AA"]:
+            pd.DataFrame(
+                {"Open": 1.0, "Close": 2.0, "Volume": 100, "Name": symbol},
+                index=index,
+            ).to_csv(os.path.join(tmp_dir, f"{symbol}.csv"))
+        yield tmp_dir
+
+
+@pytest.mark.parametrize("engine", [None, "pyarrow"])
+def test_load_all_data_columns(ohlc_directory, engine):
+    result = load_all_data(
+        directory=ohlc_directory,
+        from_format="csv",
+        to_format={"dataframe": {"index_col": "Date"}},
+        columns=["Close", "Volume"],
+        dtypes={"Volume": "float32"},
+        engine=engine,
+    )
+
+    assert sorted(result.keys()) == ["A", "AA"]
+    for df in result.values():
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(
+                {"Close": 2.0, "Volume": 100.0},
+                index=pd.Index(["2022-01-03", "2022-01-04", "2022-01-05"], name="Date"),
+            ).astype({"Volume": "float32"}),
+            df,
+        )
+
+
+@pytest.mark.parametrize("engine", [None, "pyarrow"])
+def test_load_all_data_columns_index_position(ohlc_directory, engine):
+    result = load_all_data(
+        directory=ohlc_directory,
+        from_format="csv",
+        to_format={"dataframe": {"index_col": 0}},
+        columns=["Close"],
+        engine=engine,
+    )
+
+    for df in result.values():
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(
+                {"Close": 2.0},
+                index=pd.Index(["2022-01-03", "2022-01-04", "2022-01-05"], name="Date"),
+            ),
+            df,
+        )
+
+
+def test_load_all_data_pyarrow_parse_dates(ohlc_directory):
+    options = {"dataframe": {"index_col": "Date", "parse_dates": True}}
+    expected = load_all_data(
+        directory=ohlc_directory, from_format="csv", to_format=options
+    )
+    result = load_all_data(
+        directory=ohlc_directory,
+        from_format="csv",
+        to_format=options,
+        engine="pyarrow",
+    )
+
+    for name, df in result.items():
+        pd.testing.assert_frame_equal(expected[name], df)
+
+
+################################################################
+# Test binary formats
+################################################################
+@pytest.fixture
+def binary_directory(prices):
+    with TemporaryDirectory() as tmp_dir:
+        for from_format in ["parquet", "arrow", "npy"]:
+            os.mkdir(os.path.join(tmp_dir, from_format))
+        for symbol, price in prices.items():
+            price.reset_index().to_parquet(
+                os.path.join(tmp_dir, "parquet", f"{symbol}.parquet")
+            )
+            price.reset_index().to_feather(
+                os.path.join(tmp_dir, "arrow", f"{symbol}.arrow")
+            )
+            np.save(os.path.join(tmp_dir, "npy", f"{symbol}.npy"), price.to_numpy())
+        yield tmp_dir
+
+
+@pytest.mark.parametrize("from_format", ["parquet", "arrow"])
+def test_load_all_data_from_arrow_to_df(binary_directory, prices, from_format):
+    result = load_all_data(
+        directory=os.path.join(binary_directory, from_format),
+        from_format=from_format,
+        to_format={"dataframe": {"index_col": "Date"}},
+        includes=["A", "AAPL"],
+        columns=["Volume"],
+    )
+
+    assert sorted(result.keys()) == ["A", "AAPL"]
+    for name, df in result.items():
+        df.index.freq = "B"
+        pd.testing.assert_frame_equal(prices[name][["Volume"]], df)
+
+
+def test_load_all_data_from_arrow_to_default(binary_directory, prices):
+    result = load_all_data(
+        directory=os.path.join(binary_directory, "arrow"),
+        from_format="arrow",
+        to_format="default",
+    )
+
+    assert isinstance(result["A"], pa.Table)
+    assert result["A"].column_names == ["Date", "Close", "Volume"]
+
+
+def test_load_all_data_from_npy(binary_directory, prices):
+    result = load_all_data(
+        directory=os.path.join(binary_directory, "npy"),
+        from_format="npy",
+        to_format="default",
+    )
+
+    for name, values in result.items():
+        assert isinstance(values, np.memmap)
+        np.testing.assert_array_equal(prices[name].to_numpy(), values)
+
+
+################################################################
+# Test compressed files
+################################################################
+@pytest.mark.parametrize("compression", ["gz", "bz2", "xz", "zst"])
+@pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+def test_load_all_data_from_compressed_csv(prices, compression, engine):
+    with TemporaryDirectory() as tmp_dir:
+        for symbol, price in prices.items():
+            path = os.path.join(tmp_dir, f"{symbol}.csv.{compression}")
+            if compression == "zst":
+                with pa.output_stream(path, compression="zstd") as f:
+                    f.write(price.to_csv().encode())
+            else:
+                price.to_csv(path)
+
+        result = load_all_data(
+            directory=tmp_dir,
+            from_format="csv",
+            to_format={"dataframe": dict(parse_dates=True, index_col="Date")},
+            includes=["A", "AAPL"],
+            engine=engine,
+            max_workers=2,
+        )
+
+    assert sorted(result.keys()) == ["A", "AAPL"]
+    for name, df in result.items():
+        df.index.freq = "B"
+        pd.testing.assert_frame_equal(prices[name], df)
+
+
+def test_load_all_data_from_compressed_json():
+    with TemporaryDirectory() as tmp_dir:
+        with pa.output_stream(
+            os.path.join(tmp_dir, "A.json.zst"), compression="zstd"
+        ) as f:
+            f.write(json.dumps({"symbol": "A"}).encode())
+
+        result = load_all_data(directory=tmp_dir, from_format="json", to_format="dict")
+
+    assert result == {"A": {"symbol": "A"}}
+
+
+def test_load_all_data_from_compressed_parquet(prices):
+    with TemporaryDirectory() as tmp_dir:
+        buffer = io.BytesIO()
+        prices["A"].reset_index().to_parquet(buffer)
+        with gzip.open(os.path.join(tmp_dir, "A.parquet.gz"), "wb") as f:
+            f.write(buffer.getvalue())
+
+        result = load_all_data(
+            directory=tmp_dir,
+            from_format="parquet",
+            to_format={"dataframe": {"index_col": "Date"}},
+        )
+
+    result["A"].index.freq = "B"
+    pd.testing.assert_frame_equal(prices["A"], result["A"])
+
+
+def test_load_all_data_skips_other_formats(prices):
+    with TemporaryDirectory() as tmp_dir:
+        prices["AAPL"].to_csv(os.path.join(tmp_dir, "AAPL.csv"))
+        prices["AAPL"].reset_index().to_json(os.path.join(tmp_dir, "AAPL.json"))
+
+        result = load_all_data(
+            directory=tmp_dir,
+            from_format="csv",
+            to_format={"dataframe": {"index_col": "Date", "parse_dates": True}},
+        )
+        assert list(result.keys()) == ["AAPL"]
+        pd.testing.assert_frame_equal(prices["AAPL"], result["AAPL"], check_freq=False)
+
+
+def test_load_all_data_duplicated_symbols(prices):
+    with TemporaryDirectory() as tmp_dir:
+        prices["AAPL"].to_csv(os.path.join(tmp_dir, "AAPL.csv"))
+        prices["AAPL"].to_csv(os.path.join(tmp_dir, "AAPL.csv.gz"))
+
+        with pytest.raises(ValueError, match="same symbol AAPL"):
+            load_all_data(directory=tmp_dir, from_format="csv", to_format="dict")
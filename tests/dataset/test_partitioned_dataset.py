@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from fpm_universe.dataset import PartitionedDataset
+from fpm_universe.universe import IntervalUniverse
+
+
+def test_partitioned_dataset_round_trip(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path))
+    assert dataset.write(validity) == ["2022-01", "2022-02", "2022-03"]
+    assert dataset.partitions == ["2022-01", "2022-02", "2022-03"]
+
+    # The dataset is read from the manifest by a new instance
+    dataset = PartitionedDataset(str(tmp_path))
+    pd.testing.assert_frame_equal(
+        validity, dataset.read_validity(), check_names=False, check_freq=False
+    )
+
+
+def test_partitioned_dataset_interval_universe(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path), partition="year")
+    dataset.write(IntervalUniverse.from_dense(validity))
+    pd.testing.assert_frame_equal(
+        validity, dataset.read_validity(), check_names=False, check_freq=False
+    )
+
+
+def test_partitioned_dataset_rewrite_changed(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path))
+    dataset.write(validity.loc[:"2022-03-07"])
+    files = {
+        key: (tmp_path / f"date={key}" / "part-0.parquet").stat().st_mtime_ns
+        for key in dataset.partitions
+    }
+
+    # Only the last partition is extended
+    assert dataset.write(validity) == ["2022-03"]
+    for key in ["2022-01", "2022-02"]:
+        assert (tmp_path / f"date={key}" / "part-0.parquet").stat().st_mtime_ns == (
+            files[key]
+        )
+
+    # The unchanged validity writes nothing
+    assert dataset.write(validity) == []
+    pd.testing.assert_frame_equal(
+        validity, dataset.read_validity(), check_names=False, check_freq=False
+    )
+
+
+def test_partitioned_dataset_rewrite_partial(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path))
+    dataset.write(validity)
+
+    # Only the last days of the month are rewritten, where the earlier days
+    # of the month are kept
+    updated = validity.loc["2022-02-24":"2022-02-28"].copy()
+    updated["AAPL"] = ~updated["AAPL"]
+    assert dataset.write(updated) == ["2022-02"]
+
+    expected = validity.copy()
+    expected.loc[updated.index, "AAPL"] = updated["AAPL"]
+    pd.testing.assert_frame_equal(
+        expected,
+        PartitionedDataset(str(tmp_path)).read_validity(),
+        check_names=False,
+        check_freq=False,
+    )
+
+    # Rewriting the same days again writes nothing
+    assert dataset.write(updated) == []
+
+
+@pytest.mark.parametrize("tz", ["UTC", "America/New_York"])
+def test_partitioned_dataset_timezone(tmp_path, validity, tz):
+    validity = validity.tz_localize(tz)
+    dataset = PartitionedDataset(str(tmp_path))
+    dataset.write(validity.loc[:"2022-02-15"])
+    # The partially rewritten partition keeps the aware datetimes
+    assert dataset.write(validity) == ["2022-02", "2022-03"]
+
+    # The timezone is restored by a new instance
+    dataset = PartitionedDataset(str(tmp_path))
+    pd.testing.assert_frame_equal(
+        validity, dataset.read_validity(), check_names=False, check_freq=False
+    )
+    pd.testing.assert_frame_equal(
+        validity.loc["2022-02-01":"2022-02-03"],
+        dataset.read_validity("2022-02-01", "2022-02-03").reindex(
+            columns=validity.columns, fill_value=False
+        ),
+        check_names=False,
+        check_freq=False,
+    )
+    assert str(dataset.read()["datetime"].dt.tz) == tz
+
+    # The naive validity cannot be written to the aware dataset
+    with pytest.raises(ValueError):
+        dataset.write(validity.tz_localize(None))
+
+
+def test_partitioned_dataset_missing_datetimes(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path))
+    dataset.write(validity)
+    dataset._manifest["datetimes"]["2022-02"] = []
+    with pytest.raises(ValueError):
+        dataset.read_validity()
+
+
+def test_partitioned_dataset_read(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path), partition="day", row_group_size=2)
+    dataset.write(validity)
+    assert len(dataset.partitions) == len(validity.index)
+
+    members = dataset.read("2022-02-01", "2022-02-03")
+    rows, columns = np.nonzero(validity.loc["2022-02-01":"2022-02-03"].to_numpy())
+    expected = pd.DataFrame(
+        {
+            "datetime": validity.loc["2022-02-01":"2022-02-03"].index[rows],
+            "symbol": validity.columns[columns],
+        }
+    )
+    pd.testing.assert_frame_equal(expected, members, check_names=False)
+    pd.testing.assert_frame_equal(
+        validity.loc["2022-02-01":"2022-02-03"],
+        dataset.read_validity("2022-02-01", "2022-02-03").reindex(
+            columns=validity.columns, fill_value=False
+        ),
+        check_names=False,
+        check_freq=False,
+    )
+
+
+def test_partitioned_dataset_layout(tmp_path, validity):
+    dataset = PartitionedDataset(str(tmp_path), row_group_size=10)
+    dataset.write(validity)
+    parquet_file = pq.ParquetFile(str(tmp_path / "date=2022-02" / "part-0.parquet"))
+    assert parquet_file.metadata.num_row_groups > 1
+    statistics = parquet_file.metadata.row_group(0).column(0).statistics
+    assert statistics.has_min_max
+    assert parquet_file.schema_arrow.field("symbol").type.value_type == "string"
+
+
+def test_partitioned_dataset_invalid(tmp_path, validity):
+    with pytest.raises(ValueError):
+        PartitionedDataset(str(tmp_path), partition="week")
+
+    PartitionedDataset(str(tmp_path)).write(validity)
+    with pytest.raises(ValueError):
+        PartitionedDataset(str(tmp_path), partition="day")
@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.config import Configuration, DataStore, PipelineExecutor
+from fpm_universe.dtypes import DtypePolicy
+from fpm_universe.pipeline import ranking, rolling_validity
+
+
+@pytest.fixture
+def values():
+    return pd.DataFrame(
+        {
+            "close": [100.25, 101.5, np.nan],
+            "volume": [1000, 2000, 3000],
+            "symbol": ["A", "AAPL", "A"],
+        },
+        index=pd.bdate_range("2022-01-03", periods=3),
+    )
+
+
+def test_dtype_policy_apply(values):
+    policy = DtypePolicy(values="float32", symbols="category")
+    result = policy.apply({"prices": values})["prices"]
+
+    assert result["close"].dtype == np.float32
+    assert result["volume"].dtype == np.float32
+    assert result["symbol"].dtype == "category"
+    pd.testing.assert_frame_equal(
+        values.astype({"close": "float64", "volume": "float64"}),
+        result.astype({"close": "float64", "volume": "float64", "symbol": object}),
+    )
+
+
+def test_dtype_policy_out_of_tolerance(values):
+    values["volume"] = [1, 2, 16777217]
+    result = DtypePolicy(values="float32", rtol=0.0).apply(values)
+    assert result["volume"].dtype == np.int64
+    assert result["close"].dtype == np.float64
+
+
+@pytest.fixture
+def near_values():
+    # Columns within the tolerance of each other, which tie in float32
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2022-01-03", periods=40)
+    base = random_state.rand(len(index), 1) * 100 + 1
+    return pd.DataFrame(
+        np.hstack([base * (1 + number * 1e-8) for number in range(4)]),
+        index=index,
+        columns=["A", "AA", "AAL", "AAPL"],
+    )
+
+
+def test_dtype_policy_verify_ranking(near_values):
+    policy = DtypePolicy(values="float32")
+    parameters = dict(
+        threshold_pct=0.5,
+        tolerance_timeframes=0,
+        start_datetime=near_values.index[0],
+        last_datetime=near_values.index[-1],
+        frequency="B",
+    )
+    assert policy.apply(near_values)["A"].dtype == np.float32
+
+    # The ranks of the ties in float32 flip
+    assert policy.verify(ranking, values=near_values, **parameters) > 0
+
+    random_state = np.random.RandomState(1)
+    values = pd.DataFrame(
+        random_state.rand(*near_values.shape),
+        index=near_values.index,
+        columns=near_values.columns,
+    )
+    assert policy.verify(ranking, values=values, **parameters) == 0
+
+
+def test_dtype_policy_verify_rolling_validity(near_values):
+    values = near_values.mask(np.random.RandomState(2).rand(*near_values.shape) < 0.3)
+    assert (
+        DtypePolicy(values="float32").verify(
+            rolling_validity,
+            values=values,
+            threshold_pct=0.6,
+            rolling_window=5,
+            tolerance_timeframes=2,
+            start_datetime=values.index[0],
+            last_datetime=values.index[-1],
+            frequency="B",
+        )
+        == 0
+    )
+
+
+def test_dtype_policy_apply_validity():
+    validity = pd.DataFrame([[True, np.nan], [False, True]], columns=["A", "B"])
+    result = DtypePolicy(validity="bool").apply_validity(validity)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame([[True, False], [False, True]], columns=["A", "B"]), result
+    )
+
+
+def test_dtype_policy_unsupported():
+    with pytest.raises(ValueError):
+        DtypePolicy(values="int8")
+
+
+def test_dtype_policy_override():
+    policy = DtypePolicy.from_config(
+        {"values": None}, base=DtypePolicy(values="float32", validity="bool")
+    )
+    assert policy.values is None
+    assert policy.validity == "bool"
+    assert DtypePolicy.from_config(None) is None
+
+
+def random_prices():
+    random_state = np.random.RandomState(0)
+    return pd.DataFrame(
+        random_state.rand(20, 4) * 100,
+        index=pd.bdate_range("2022-01-03", periods=20),
+        columns=["A", "AA", "AAPL", "MSFT"],
+    )
+
+
+def test_configuration_dtype_policy():
+    config = Configuration(
+        stream="""
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-03"
+last_datetime: "2022-01-28"
+frequency: "B"
+dtype_policy:
+    values: float32
+    validity: bool
+pipeline:
+    - name: "ranking"
+      function: "ranking"
+      parameters:
+          values: !data prices
+          threshold_pct: 0.5
+          tolerance_timeframes: 0
+data:
+    prices:
+        function: random_prices
+    raw_prices:
+        function: random_prices
+        dtype_policy:
+            values: null
+"""
+    )
+    data_store = DataStore(
+        config=config, custom_functions={"random_prices": random_prices}
+    )
+    assert (data_store.get("prices").dtypes == np.float32).all()
+    assert (data_store.get("raw_prices").dtypes == np.float64).all()
+
+    _, result = PipelineExecutor.execute(
+        data_store=data_store, config=config, pipeline=config.pipelines[0]
+    )
+    assert (result.dtypes == bool).all()
+    # The ranks in float32 are the same as in float64
+    expected = random_prices().rank(axis=1, ascending=False) <= 2
+    pd.testing.assert_frame_equal(expected, result, check_names=False, check_freq=False)
+
+
+def near_prices():
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2022-01-03", periods=20)
+    base = random_state.rand(len(index), 1) * 100 + 1
+    return pd.DataFrame(
+        np.hstack([base * (1 + number * 1e-8) for number in range(4)]),
+        index=index,
+        columns=["A", "AA", "AAL", "AAPL"],
+    )
+
+
+@pytest.mark.parametrize(
+    "function, max_mismatch, raises",
+    [
+        ("random_prices", 0.0, False),
+        ("near_prices", 0.0, True),
+        ("near_prices", 1.0, False),
+    ],
+)
+def test_configuration_dtype_policy_max_mismatch(function, max_mismatch, raises):
+    config = Configuration(
+        stream=f"""
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-03"
+last_datetime: "2022-01-28"
+frequency: "B"
+dtype_policy:
+    values: float32
+    max_mismatch: {max_mismatch}
+pipeline:
+    - name: "ranking"
+      function: "ranking"
+      parameters:
+          values: !data prices
+          threshold_pct: 0.5
+          tolerance_timeframes: 0
+data:
+    prices:
+        function: {function}
+"""
+    )
+    data_store = DataStore(
+        config=config,
+        custom_functions={"random_prices": random_prices, "near_prices": near_prices},
+    )
+    assert (data_store.get("prices").dtypes == np.float32).all()
+    assert (data_store.get_original("prices").dtypes == np.float64).all()
+
+    if raises:
+        # The ranks of the ties in float32 flip
+        with pytest.raises(ValueError, match="maximum mismatch"):
+            PipelineExecutor.execute(
+                data_store=data_store, config=config, pipeline=config.pipelines[0]
+            )
+    else:
+        PipelineExecutor.execute(
+            data_store=data_store, config=config, pipeline=config.pipelines[0]
+        )
+
+
+def test_data_store_original_not_kept(values):
+    config = Configuration(
+        stream="""
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-03"
+last_datetime: "2022-01-28"
+frequency: "B"
+dtype_policy:
+    values: float32
+pipeline: []
+data:
+    prices:
+        function: random_prices
+"""
+    )
+    data_store = DataStore(
+        config=config, custom_functions={"random_prices": random_prices}
+    )
+    # The originals are not kept without the verification
+    assert data_store.get_original("prices") is data_store.get("prices")
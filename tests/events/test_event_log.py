@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+
+from fpm_universe.events import EventLog, validity_events
+from fpm_universe.universe import IntervalUniverse
+
+
+def test_validity_events():
+    validity = pd.DataFrame(
+        [[True, False, None], [True, True, True], [False, True, True]],
+        index=pd.bdate_range("2022-01-03", periods=3, name="datetime"),
+        columns=["A", "B", "C"],
+    )
+    events = validity_events(validity, members=["B", "D"])
+    expected = pd.DataFrame(
+        {
+            "datetime": pd.to_datetime(
+                ["2022-01-03"] * 3 + ["2022-01-04"] * 2 + ["2022-01-05"]
+            ),
+            "symbol": ["A", "B", "D", "B", "C", "A"],
+            "event": ["entry", "exit", "exit", "entry", "entry", "exit"],
+        }
+    )
+    pd.testing.assert_frame_equal(expected, events, check_names=False)
+
+
+def test_event_log_append(tmp_path, validity):
+    event_log = EventLog(str(tmp_path))
+    first = event_log.append(validity.loc[:"2022-02-15"])
+    assert event_log.last_datetime == pd.Timestamp("2022-02-15")
+
+    # Datetimes up to the high-water mark are skipped
+    second = event_log.append(validity)
+    assert second["datetime"].min() > pd.Timestamp("2022-02-15")
+    assert event_log.append(validity).empty
+
+    events = EventLog(str(tmp_path)).read()
+    pd.testing.assert_frame_equal(
+        pd.concat([first, second], ignore_index=True), events, check_dtype=False
+    )
+    pd.testing.assert_frame_equal(validity_events(validity), events, check_dtype=False)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "_watermark.json",
+        "month=2022-01",
+        "month=2022-02",
+        "month=2022-03",
+    ]
+    assert len(list((tmp_path / "month=2022-02").iterdir())) == 2
+
+
+def test_event_log_replay(tmp_path, validity):
+    event_log = EventLog(str(tmp_path))
+    event_log.append(IntervalUniverse.from_dense(validity))
+
+    for datetime in validity.index[[0, 10, -1]]:
+        row = validity.loc[datetime]
+        assert event_log.members(datetime) == sorted(row.index[row])
+
+    # Datetimes between the events reflect the events before them
+    index = pd.date_range("2022-01-01", "2022-03-31", freq="D", name="datetime")
+    result = event_log.to_validity(index)
+    expected = validity.reindex(index, method="ffill").fillna(False).astype(bool)
+    pd.testing.assert_frame_equal(
+        expected.loc[:, result.columns], result, check_names=False
+    )
+
+
+def test_event_log_read_range(tmp_path, validity):
+    event_log = EventLog(str(tmp_path))
+    event_log.append(validity)
+
+    events = event_log.read(start_datetime="2022-02-01", last_datetime="2022-02-28")
+    expected = validity_events(validity)
+    expected = expected.loc[
+        expected["datetime"].between("2022-02-01", "2022-02-28")
+    ].reset_index(drop=True)
+    pd.testing.assert_frame_equal(expected, events, check_dtype=False)
+
+
+@pytest.mark.parametrize("tz", ["UTC", "America/New_York"])
+def test_event_log_timezone(tmp_path, validity, tz):
+    validity = validity.tz_localize(tz)
+    event_log = EventLog(str(tmp_path))
+    event_log.append(validity.loc[:"2022-02-15"])
+    event_log.append(validity)
+    assert event_log.last_datetime == validity.index[-1]
+
+    # The timezone is restored by a new instance
+    event_log = EventLog(str(tmp_path))
+    events = event_log.read(last_datetime=pd.Timestamp("2022-03-31", tz=tz))
+    pd.testing.assert_frame_equal(validity_events(validity), events, check_dtype=False)
+    assert event_log.read(start_datetime="2022-02-01")["datetime"].dt.tz is not None
+
+    for datetime in validity.index[[0, 10, -1]]:
+        row = validity.loc[datetime]
+        assert event_log.members(datetime) == sorted(row.index[row])
+    result = event_log.to_validity(validity.index)
+    pd.testing.assert_frame_equal(
+        validity.loc[:, result.columns], result, check_names=False, check_freq=False
+    )
+
+    # The naive validity cannot be appended to the aware events
+    with pytest.raises(ValueError):
+        event_log.append(validity.tz_localize(None))
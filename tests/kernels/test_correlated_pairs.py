@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.kernels import correlated_pairs, pair_correlations
+
+
+@pytest.fixture
+def values():
+    random_state = np.random.RandomState(0)
+    factors = random_state.randn(60, 20)
+    # Clusters of the instruments sharing a factor with the negative
+    # loadings on every other block, and the instruments of noise
+    loadings = np.where(np.arange(200) // 20 % 2 == 0, 1.0, -1.0)
+    values = factors[:, np.arange(200) % 20] * loadings
+    values += random_state.randn(60, 200) * random_state.uniform(0.1, 1.5, 200)
+    values = np.concatenate([values, random_state.randn(60, 200)], axis=1)
+    values[random_state.rand(*values.shape) < 0.02] = np.nan
+    return values
+
+
+def test_pair_correlations(values):
+    left = np.array([0, 0, 5, 399])
+    right = np.array([20, 1, 7, 398])
+    expected = pd.DataFrame(values).corr().to_numpy()[left, right]
+    np.testing.assert_allclose(expected, pair_correlations(values, left, right))
+    np.testing.assert_allclose(
+        expected, pair_correlations(values, left, right, chunk_size=60)
+    )
+
+
+def test_pair_correlations_missing():
+    values = np.array([[1.0, np.nan, 1.0], [2.0, 1.0, 1.0], [3.0, np.nan, 1.0]])
+    correlations = pair_correlations(values, np.array([0, 0]), np.array([1, 2]))
+    assert np.isnan(correlations).all()
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8])
+def test_correlated_pairs(values, threshold):
+    correlations = pd.DataFrame(values).corr().to_numpy()
+    expected_left, expected_right = np.nonzero(
+        np.triu(np.abs(correlations) > threshold, k=1)
+    )
+    assert len(expected_left) > 0
+    assert (correlations[expected_left, expected_right] < 0).any()
+
+    left, right = correlated_pairs(
+        values, threshold=threshold, recall=0.999, random_state=0
+    )
+    expected = set(zip(expected_left.tolist(), expected_right.tolist()))
+    found = set(zip(left.tolist(), right.tolist()))
+    # The candidates are verified exactly, so no pair is a false positive
+    assert found <= expected
+    assert len(found) >= 0.99 * len(expected)
+    assert (left < right).all()
+
+
+def test_correlated_pairs_degenerate():
+    values = np.ones((10, 3))
+    left, right = correlated_pairs(values, threshold=0.5)
+    assert len(left) == 0 and len(right) == 0
+
+    with pytest.raises(ValueError):
+        correlated_pairs(values, threshold=0.5, recall=1)
+    with pytest.raises(ValueError):
+        correlated_pairs(values, threshold=1.5)
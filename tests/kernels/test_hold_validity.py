@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.kernels import hold_validity
+
+
+@pytest.fixture
+def validity():
+    random_state = np.random.RandomState(0)
+    return random_state.rand(100, 10) < 0.2
+
+
+@pytest.mark.parametrize("tolerance_timeframes", [0, 1, 3, 21])
+def test_hold_validity_against_ffill(validity, tolerance_timeframes):
+    expected = (
+        pd.DataFrame(validity)
+        .where(validity)
+        .ffill(limit=tolerance_timeframes or None)
+        .notnull()
+        .to_numpy()
+        if tolerance_timeframes > 0
+        else validity
+    )
+
+    result = hold_validity(validity=validity, tolerance_timeframes=tolerance_timeframes)
+
+    assert result.dtype == bool
+    np.testing.assert_array_equal(expected, result)
+
+
+def test_hold_validity_holdable():
+    validity = np.array([True, False, False, True, False, False, False])
+    holdable = np.array([False, True, False, False, True, True, True])
+
+    result = hold_validity(validity=validity, tolerance_timeframes=2, holdable=holdable)
+
+    np.testing.assert_array_equal(
+        np.array([True, True, False, True, True, True, False]), result
+    )
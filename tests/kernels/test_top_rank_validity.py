@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.kernels import top_rank_validity
+
+
+@pytest.fixture
+def values():
+    random_state = np.random.RandomState(0)
+    values = random_state.randint(0, 5, size=(50, 20)).astype(float)
+    values[random_state.rand(*values.shape) < 0.2] = np.nan
+    values[0, :] = np.nan
+    return values
+
+
+@pytest.mark.parametrize("threshold_pct", [0.0, 0.1, 0.33, 0.5, 0.9, 1.0])
+def test_top_rank_validity_against_rank(values, threshold_pct):
+    df = pd.DataFrame(values)
+    threshold = df.notnull().sum(axis=1) * threshold_pct
+    expected = df.rank(axis=1, ascending=False).le(threshold, axis=0).to_numpy()
+
+    result = top_rank_validity(values=values, threshold_pct=threshold_pct)
+
+    assert result.dtype == bool
+    np.testing.assert_array_equal(expected, result)
+
+
+def test_top_rank_validity_ties():
+    result = top_rank_validity(
+        values=np.array([[3.0, 2.0, 2.0, 1.0], [2.0, 2.0, 2.0, np.nan]]),
+        threshold_pct=0.5,
+    )
+    np.testing.assert_array_equal(
+        np.array([[True, False, False, False], [False, False, False, False]]),
+        result,
+    )
@@ -0,0 +1,74 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+import pytest
+
+from fpm_universe import manifest as manifest_module
+from fpm_universe.data import load_all_data
+from fpm_universe.manifest import MANIFEST_FILE_NAME, DirectoryManifest
+
+
+@pytest.fixture
+def prices_directory():
+    with TemporaryDirectory() as tmp_dir:
+        for symbol in ["A", "AA", "AAPL"]:
+            pd.DataFrame(
+                {"Close": 1.0},
+                index=pd.Index(["2022-01-03", "2022-01-04"], name="Date"),
+            ).to_csv(os.path.join(tmp_dir, f"{symbol}.csv"))
+        yield tmp_dir
+
+
+def _load(directory, **kwargs):
+    return load_all_data(
+        directory=directory,
+        from_format="csv",
+        to_format={"dataframe": {"index_col": "Date"}},
+        **kwargs,
+    )
+
+
+def test_manifest_generation(prices_directory):
+    result = _load(prices_directory, includes=["AA", "B"], manifest=True)
+    assert list(result.keys()) == ["AA"]
+
+    with open(os.path.join(prices_directory, MANIFEST_FILE_NAME)) as fp:
+        files = json.load(fp)["files"]
+    assert sorted(files.keys()) == ["A.csv", "AA.csv", "AAPL.csv"]
+    assert files["AA.csv"]["rows"] == 2
+    assert files["AA.csv"]["start"] == "2022-01-03"
+    assert files["AA.csv"]["last"] == "2022-01-04"
+    assert "rows" not in files["A.csv"]
+
+
+def test_manifest_generation_lazy(prices_directory):
+    result = _load(prices_directory, manifest=True, lazy=True)
+    assert os.path.exists(os.path.join(prices_directory, MANIFEST_FILE_NAME))
+    assert result["AA"]["Close"].tolist() == [1.0, 1.0]
+
+
+def test_manifest_skips_listing(prices_directory, monkeypatch):
+    expected = _load(prices_directory)
+    _load(prices_directory, manifest=True)
+
+    def _listdir(directory):
+        raise AssertionError("The directory should not be listed")
+
+    monkeypatch.setattr(manifest_module, "listdir", _listdir)
+    result = _load(prices_directory, manifest=True)
+
+    assert sorted(result.keys()) == sorted(expected.keys())
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(df, result[name])
+
+
+def test_manifest_refresh(prices_directory):
+    _load(prices_directory, manifest=True)
+    pd.DataFrame({"Close": [1.0]}, index=pd.Index(["2022-01-03"], name="Date")).to_csv(
+        os.path.join(prices_directory, "MSFT.csv")
+    )
+
+    manifest = DirectoryManifest(directory=prices_directory)
+    assert manifest.file_names(includes=["MSFT"]) == ["MSFT.csv"]
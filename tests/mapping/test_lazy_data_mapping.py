@@ -0,0 +1,83 @@
+import os
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+import pytest
+
+from fpm_universe.data import load_all_data
+from fpm_universe.mapping import LazyDataMapping
+
+
+@pytest.fixture
+def parsed_paths():
+    return []
+
+
+@pytest.fixture
+def mapping(parsed_paths):
+    def _reader(path):
+        parsed_paths.append(path)
+        return path.upper()
+
+    return LazyDataMapping(
+        paths={"a": "a.csv", "b": "b.csv", "c": "c.csv"},
+        reader=_reader,
+        cache_size=2,
+        max_workers=2,
+    )
+
+
+def test_lazy_data_mapping_first_access(mapping, parsed_paths):
+    assert len(mapping) == 3
+    assert list(mapping) == ["a", "b", "c"]
+    assert parsed_paths == []
+
+    assert mapping["b"] == "B.CSV"
+    assert mapping["b"] == "B.CSV"
+    assert parsed_paths == ["b.csv"]
+    assert (mapping.hits, mapping.misses) == (1, 1)
+
+
+def test_lazy_data_mapping_eviction(mapping, parsed_paths):
+    mapping["a"]
+    mapping["b"]
+    mapping["a"]
+    mapping["c"]
+
+    assert mapping.is_loaded("a")
+    assert not mapping.is_loaded("b")
+    assert mapping["b"] == "B.CSV"
+    assert parsed_paths == ["a.csv", "b.csv", "c.csv", "b.csv"]
+
+
+def test_lazy_data_mapping_prefetch(mapping, parsed_paths):
+    mapping.prefetch(["a", "c"])
+    assert sorted(parsed_paths) == ["a.csv", "c.csv"]
+    assert mapping.is_loaded("a") and mapping.is_loaded("c")
+
+    with pytest.raises(KeyError):
+        mapping.prefetch(["d"])
+
+
+def test_lazy_data_mapping_to_dict(mapping, parsed_paths):
+    mapping["b"]
+    assert mapping.to_dict() == {"a": "A.CSV", "b": "B.CSV", "c": "C.CSV"}
+
+    # Each file is parsed once, although the cache holds only two values
+    assert sorted(parsed_paths) == ["a.csv", "b.csv", "c.csv"]
+
+
+def test_load_all_data_lazy():
+    with TemporaryDirectory() as tmp_dir:
+        for symbol in ["A", "AA"]:
+            pd.DataFrame({"Close": [1.0]}).to_csv(
+                os.path.join(tmp_dir, f"{symbol}.csv"), index=False
+            )
+
+        result = load_all_data(
+            directory=tmp_dir, from_format="csv", to_format="dataframe", lazy=True
+        )
+        assert isinstance(result, LazyDataMapping)
+        assert sorted(result.keys()) == ["A", "AA"]
+        assert not result.is_loaded("A")
+        pd.testing.assert_frame_equal(pd.DataFrame({"Close": [1.0]}), result["A"])
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from fpm_universe.metrics import MetricsRecorder
+from fpm_universe.universe import IntervalUniverse
+
+
+def test_metrics_recorder_text():
+    metrics = MetricsRecorder(labels={"config": "us", "parameter-date": "2022"})
+    metrics.set("run_duration_seconds", 1.5, "Duration of the run")
+    metrics.set("pipeline_rows", 10, "Number of rows", pipeline='a"b')
+    metrics.set("pipeline_rows", 20, "Number of rows", pipeline="c")
+    metrics.record_cache("registry", hits=1, misses=3)
+    assert metrics.to_text() == (
+        "# TYPE fpm_universe_run_duration_seconds gauge\n"
+        "# HELP fpm_universe_run_duration_seconds Duration of the run\n"
+        'fpm_universe_run_duration_seconds{config="us",parameter_date="2022"} 1.5\n'
+        "# TYPE fpm_universe_pipeline_rows gauge\n"
+        "# HELP fpm_universe_pipeline_rows Number of rows\n"
+        'fpm_universe_pipeline_rows{config="us",parameter_date="2022",'
+        'pipeline="a\\"b"} 10\n'
+        'fpm_universe_pipeline_rows{config="us",parameter_date="2022",'
+        'pipeline="c"} 20\n'
+        "# TYPE fpm_universe_cache_hits gauge\n"
+        "# HELP fpm_universe_cache_hits Number of cache hits\n"
+        'fpm_universe_cache_hits{cache="registry",config="us",'
+        'parameter_date="2022"} 1\n'
+        "# TYPE fpm_universe_cache_misses gauge\n"
+        "# HELP fpm_universe_cache_misses Number of cache misses\n"
+        'fpm_universe_cache_misses{cache="registry",config="us",'
+        'parameter_date="2022"} 3\n'
+        "# TYPE fpm_universe_cache_hit_ratio gauge\n"
+        "# HELP fpm_universe_cache_hit_ratio Ratio of the cache hits to the lookups\n"
+        'fpm_universe_cache_hit_ratio{cache="registry",config="us",'
+        'parameter_date="2022"} 0.25\n'
+        "# EOF\n"
+    )
+
+
+def test_metrics_recorder_values():
+    metrics = MetricsRecorder()
+    validity = pd.DataFrame(
+        [[True, False], [True, True], [False, True]],
+        index=pd.bdate_range("2022-01-03", periods=3),
+        columns=["A", "B"],
+    )
+    metrics.record_value("pipeline", validity, pipeline="a")
+    metrics.record_value(
+        "pipeline", IntervalUniverse.from_dense(validity), pipeline="b"
+    )
+    metrics.record_value("data", np.zeros((4, 5, 2)), data="c")
+    metrics.record_value("data", [1, 2, 3], data="d")
+    metrics.record_peak_memory()
+    text = metrics.to_text()
+    assert 'fpm_universe_pipeline_rows{pipeline="a"} 3\n' in text
+    assert 'fpm_universe_pipeline_columns{pipeline="b"} 2\n' in text
+    assert 'fpm_universe_data_columns{data="c"} 10\n' in text
+    assert 'fpm_universe_data_bytes{data="c"} 320\n' in text
+    assert 'data="d"' not in text
+    assert "fpm_universe_peak_rss_bytes " in text
+
+
+def test_metrics_recorder_write(tmp_path):
+    metrics = MetricsRecorder()
+    try:
+        with metrics.timer("run_duration_seconds", "Duration of the run"):
+            raise RuntimeError()
+    except RuntimeError:
+        pass
+    path = tmp_path / "metrics.prom"
+    metrics.write(str(path))
+    assert path.read_text().startswith(
+        "# TYPE fpm_universe_run_duration_seconds gauge\n"
+    )
+    assert [p.name for p in tmp_path.iterdir()] == ["metrics.prom"]
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -35,3 +36,90 @@ def test_empty_dataframe():
         rolling_correlation_rank_validity(
             empty_df, empty_df, 3, 0.5, "2020-01-01", "2020-01-05", "D"
         )
+
+
+def test_approximate_method():
+    random_state = np.random.RandomState(0)
+    dates = pd.date_range("2020-01-01", periods=40, freq="D")
+    factors = random_state.randn(40, 5)
+    values = pd.DataFrame(
+        factors[:, np.arange(30) % 5] + random_state.randn(40, 30) * 0.3,
+        index=dates,
+        columns=[f"S{i}" for i in range(30)],
+    )
+    rankings = pd.DataFrame(
+        np.argsort(random_state.rand(40, 30), axis=1),
+        index=dates,
+        columns=values.columns,
+    )
+    kwargs = dict(
+        values=values,
+        rankings=rankings,
+        rolling_window=20,
+        threshold=0.6,
+        start_datetime="2020-01-21",
+        last_datetime="2020-02-09",
+        frequency="D",
+    )
+    expected = rolling_correlation_rank_validity(**kwargs)
+    result = rolling_correlation_rank_validity(
+        **kwargs, method="approximate", recall=0.9999
+    )
+    pd.testing.assert_frame_equal(expected, result)
+
+    with pytest.raises(ValueError):
+        rolling_correlation_rank_validity(**kwargs, method="unknown")
+
+
+def test_correlation_cache(tmp_path, monkeypatch):
+    random_state = np.random.RandomState(1)
+    dates = pd.date_range("2020-01-01", periods=30, freq="D")
+    factors = random_state.randn(30, 3)
+    values = pd.DataFrame(
+        factors[:, np.arange(12) % 3] + random_state.randn(30, 12) * 0.5,
+        index=dates,
+        columns=[f"S{i}" for i in range(12)],
+    )
+    values.iloc[3, 4] = np.nan
+    rankings = pd.DataFrame(
+        np.argsort(random_state.rand(30, 12), axis=1).astype(float),
+        index=dates,
+        columns=values.columns,
+    )
+    rankings.iloc[20, 2] = np.nan
+    kwargs = dict(
+        values=values,
+        rolling_window=10,
+        start_datetime="2020-01-11",
+        last_datetime="2020-01-30",
+        frequency="D",
+    )
+    for threshold in [0.5, 0.7]:
+        expected = rolling_correlation_rank_validity(
+            **kwargs, rankings=rankings, threshold=threshold
+        )
+        result = rolling_correlation_rank_validity(
+            **kwargs, rankings=rankings, threshold=threshold, cache_directory=tmp_path
+        )
+        pd.testing.assert_frame_equal(expected, result)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # The cached correlations are screened without recomputing them
+    reversed_rankings = -rankings
+    expected = rolling_correlation_rank_validity(
+        **kwargs, rankings=reversed_rankings, threshold=0.6
+    )
+    monkeypatch.setattr(pd.DataFrame, "corr", None)
+    result = rolling_correlation_rank_validity(
+        **kwargs, rankings=reversed_rankings, threshold=0.6, cache_directory=tmp_path
+    )
+    pd.testing.assert_frame_equal(expected, result)
+
+    with pytest.raises(ValueError):
+        rolling_correlation_rank_validity(
+            **kwargs,
+            rankings=rankings,
+            threshold=0.6,
+            method="approximate",
+            cache_directory=tmp_path,
+        )
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe import pipeline
+from fpm_universe.config import Configuration, DataStore, PipelineExecutor
+from fpm_universe.universe import IntervalUniverse
+
+pytest.importorskip("polars")
+
+from fpm_universe import polars_pipeline  # noqa: E402
+
+START_DATETIME = "2022-01-03"
+LAST_DATETIME = "2022-06-30"
+FREQUENCY = "B"
+
+
+@pytest.fixture
+def values():
+    # Values with missing values, ties, missing datetimes, and datetimes out
+    # of the universe range
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2021-12-01", "2022-07-29", name="datetime")
+    values = pd.DataFrame(
+        np.round(random_state.rand(len(index), 30) * 10),
+        index=index,
+        columns=[f"S{i}" for i in range(29)] + [30],
+    )
+    values = values.mask(random_state.rand(*values.shape) < 0.2)
+    values.iloc[:, 3] = np.nan
+    return values.drop(index[40:45])
+
+
+def _assert_conform(function_name, **parameters):
+    arguments = {
+        "start_datetime": START_DATETIME,
+        "last_datetime": LAST_DATETIME,
+        "frequency": FREQUENCY,
+        **parameters,
+    }
+    expected = getattr(pipeline, function_name)(**arguments)
+    result = getattr(polars_pipeline, function_name)(**arguments)
+    pd.testing.assert_frame_equal(expected, result)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_range_validity(sparse):
+    values = [
+        {"symbol": "A", "valid_start_datetime": "2021-01-01"},
+        {
+            "symbol": "B",
+            "valid_start_datetime": "2022-02-01",
+            "valid_last_datetime": "2022-03-15",
+        },
+        {
+            "symbol": "C",
+            "valid_start_datetime": "2022-05-01",
+            "valid_last_datetime": "2022-04-01",
+        },
+        {"symbol": "D", "valid_start_datetime": "2023-01-01"},
+    ]
+    arguments = {
+        "values": values,
+        "start_datetime": START_DATETIME,
+        "last_datetime": LAST_DATETIME,
+        "frequency": FREQUENCY,
+        "sparse": sparse,
+    }
+    expected = pipeline.range_validity(**arguments)
+    result = polars_pipeline.range_validity(**arguments)
+    if sparse:
+        assert isinstance(result, IntervalUniverse)
+        expected, result = expected.to_dense(), result.to_dense()
+    pd.testing.assert_frame_equal(expected, result)
+
+
+@pytest.mark.parametrize("threshold_pct", [0.0, 0.25, 0.5, 1.0])
+@pytest.mark.parametrize("tolerance_timeframes", [0, 5])
+def test_ranking(values, threshold_pct, tolerance_timeframes):
+    _assert_conform(
+        "ranking",
+        values=values,
+        threshold_pct=threshold_pct,
+        tolerance_timeframes=tolerance_timeframes,
+    )
+
+
+def test_ranking_float32(values):
+    _assert_conform(
+        "ranking",
+        values=values.astype("float32") / 3,
+        threshold_pct=0.4,
+        tolerance_timeframes=3,
+    )
+
+
+@pytest.mark.parametrize("rolling_window", [1, 10])
+@pytest.mark.parametrize("tolerance_timeframes", [0, 3])
+def test_rolling_validity(values, rolling_window, tolerance_timeframes):
+    _assert_conform(
+        "rolling_validity",
+        values=values,
+        threshold_pct=0.6,
+        rolling_window=rolling_window,
+        tolerance_timeframes=tolerance_timeframes,
+    )
+
+
+def test_rolling_validity_object(values):
+    _assert_conform(
+        "rolling_validity",
+        values=values.astype(object).mask(values.isnull(), None),
+        threshold_pct=0.8,
+        rolling_window=5,
+        tolerance_timeframes=2,
+    )
+
+
+@pytest.mark.parametrize("shape", [(0, 3), (10, 0)])
+def test_empty_values(shape):
+    values = pd.DataFrame(
+        np.zeros(shape),
+        index=pd.bdate_range(START_DATETIME, periods=shape[0], name="datetime"),
+        columns=[f"S{i}" for i in range(shape[1])],
+    )
+    _assert_conform("ranking", values=values, threshold_pct=0.5, tolerance_timeframes=2)
+    _assert_conform(
+        "rolling_validity",
+        values=values,
+        threshold_pct=0.5,
+        rolling_window=3,
+        tolerance_timeframes=2,
+    )
+
+
+def test_combine_validity(values):
+    first = values.loc[START_DATETIME:LAST_DATETIME] > 3
+    second = (values.iloc[::2, 5:] > 6).astype(float)
+    third = IntervalUniverse.from_ranges(
+        index=first.index,
+        ranges={
+            "S1": (first.index[3], first.index[50]),
+            "S2": (first.index[20], first.index[-1]),
+        },
+    )
+
+    for validities in ([first], [first, second], [first, third, second]):
+        expected = pipeline.combine_validity(*validities)
+        result = polars_pipeline.combine_validity(*validities)
+        pd.testing.assert_frame_equal(expected, result)
+
+
+def test_backend_config(values):
+    config = Configuration(
+        stream="""
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-03"
+last_datetime: "2022-06-30"
+frequency: "B"
+backend: polars
+pipeline:
+    - name: ranking
+      function: ranking
+      parameters:
+          values: !data values
+          threshold_pct: 0.5
+          tolerance_timeframes: 3
+data:
+    values:
+        function: get_values
+"""
+    )
+    executor = PipelineExecutor(config=config)
+    assert executor.registry.get("ranking").function is polars_pipeline.ranking
+    # Functions without a Polars counterpart fall back to pandas
+    assert (
+        executor.registry.get("rolling_correlation_rank_validity").function
+        is pipeline.rolling_correlation_rank_validity
+    )
+
+    data_store = DataStore(
+        config=config, custom_functions={"get_values": lambda: values}
+    )
+    ((name, result),) = executor.execute_all(data_store)
+    expected = pipeline.ranking(
+        values=values,
+        threshold_pct=0.5,
+        tolerance_timeframes=3,
+        start_datetime=START_DATETIME,
+        last_datetime=LAST_DATETIME,
+        frequency=FREQUENCY,
+    )
+    assert name == "ranking"
+    pd.testing.assert_frame_equal(expected, result)
+
+
+def test_backend_unsupported():
+    with pytest.raises(ValueError, match="Backend"):
+        PipelineExecutor.create_registry(backend="spark")
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from fpm_universe.reader import UniverseReader, write_universe_index
+from fpm_universe.universe import IntervalUniverse
+
+
+def test_universe_reader_members(tmp_path, validity):
+    write_universe_index(validity, str(tmp_path))
+    reader = UniverseReader(str(tmp_path))
+    pd.testing.assert_index_equal(
+        validity.index, reader.datetimes, check_exact=True, exact=False
+    )
+    assert reader.symbols == validity.columns.tolist()
+    for datetime, row in validity.iterrows():
+        assert reader.members(datetime) == row.index[row].tolist()
+
+    # The universe between the datetimes is the one of the earlier datetime
+    assert reader.members("2022-01-22 12:00:00") == reader.members("2022-01-21")
+    assert reader.members("2022-01-19") == []
+    assert reader.members("2030-01-01") == reader.members("2022-03-10")
+
+
+def test_universe_reader_is_member(tmp_path, validity):
+    write_universe_index(IntervalUniverse.from_dense(validity), str(tmp_path))
+    reader = UniverseReader(str(tmp_path))
+    for symbol in validity.columns:
+        for datetime in validity.index:
+            assert reader.is_member(symbol, datetime) == validity.at[datetime, symbol]
+        assert reader.is_member(symbol, "2022-02-01", "2022-02-10") == (
+            validity.loc["2022-02-01":"2022-02-10", symbol].any()
+        )
+
+    assert not reader.is_member("A", "2022-01-19")
+    assert not reader.is_member("A", "2022-01-01", "2022-01-19")
+    assert not reader.is_member("UNKNOWN", "2022-02-01")
+
+
+def test_universe_reader_history(tmp_path, validity):
+    write_universe_index(validity, str(tmp_path))
+    reader = UniverseReader(str(tmp_path))
+    for symbol in validity.columns:
+        pd.testing.assert_index_equal(
+            validity.index[validity[symbol]], reader.history(symbol), exact=False
+        )
+    history = reader.history("A", "2022-02-01", "2022-02-10")
+    expected = validity.loc["2022-02-01":"2022-02-10", "A"]
+    pd.testing.assert_index_equal(expected.index[expected], history, exact=False)
+    assert len(reader.history("UNKNOWN")) == 0
+
+
+def test_universe_reader_refresh(tmp_path, validity):
+    assert write_universe_index(validity.iloc[:10], str(tmp_path)) == "v00000001"
+    reader = UniverseReader(str(tmp_path))
+    assert reader.version == "v00000001"
+    assert not reader.refresh()
+
+    write_universe_index(validity, str(tmp_path), keep_versions=1)
+    # The reader keeps reading the opened version until it is refreshed
+    assert len(reader.datetimes) == 10
+    assert reader.refresh()
+    assert reader.version == "v00000002"
+    assert len(reader.datetimes) == len(validity.index)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["CURRENT", "v00000002"]
+
+
+def test_universe_reader_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        UniverseReader(str(tmp_path))
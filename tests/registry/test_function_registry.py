@@ -0,0 +1,125 @@
+from importlib.metadata import EntryPoint
+
+import pandas as pd
+import pytest
+
+from fpm_universe import registry as registry_module
+from fpm_universe.data import flatten
+from fpm_universe.registry import FunctionRegistry, FunctionSpec, declare
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def custom_functions(calls):
+    @declare(pure=True, column_separable=True, memoize=True)
+    def pure_double(values):
+        calls.append("pure_double")
+        return values * 2
+
+    def impure_double(values):
+        calls.append("impure_double")
+        return values * 2
+
+    return {"pure_double": pure_double, "impure_double": impure_double}
+
+
+@pytest.fixture
+def values():
+    return pd.DataFrame({"A": [1.0, 2.0], "B": [3.0, 4.0]})
+
+
+def test_function_registry_builtin_spec():
+    registry = FunctionRegistry(module="fpm_universe.pipeline")
+
+    spec = registry.get("ranking")
+    assert spec.pure
+    assert not spec.cacheable
+    assert not spec.column_separable
+    assert spec.lookback_periods(tolerance_timeframes=3) == 3
+
+    spec = registry.get("rolling_validity")
+    assert spec.column_separable
+    assert spec.lookback_periods(rolling_window=5, tolerance_timeframes=2) == 7
+
+    spec = FunctionRegistry(module="fpm_universe.data").get("load_all_data")
+    assert spec.io_bound
+    assert not spec.cacheable
+
+
+def test_function_registry_memoize(calls, custom_functions, values):
+    registry = FunctionRegistry(
+        module="fpm_universe.pipeline", custom_functions=custom_functions
+    )
+
+    first = registry.call("pure_double", {"values": values})
+    second = registry.call("pure_double", {"values": values.copy()})
+    pd.testing.assert_frame_equal(values * 2, second)
+    assert first is second
+    assert calls == ["pure_double"]
+    assert (registry.hits, registry.misses) == (1, 1)
+
+    registry.call("pure_double", {"values": values + 1})
+    assert calls == ["pure_double", "pure_double"]
+
+
+def test_function_registry_not_memoize_impure(calls, custom_functions, values):
+    registry = FunctionRegistry(
+        module="fpm_universe.pipeline", custom_functions=custom_functions
+    )
+
+    registry.call("impure_double", {"values": values})
+    registry.call("impure_double", {"values": values})
+    assert calls == ["impure_double", "impure_double"]
+    assert not registry.get("impure_double").cacheable
+
+
+def test_function_registry_cache_size(calls, custom_functions, values):
+    registry = FunctionRegistry(
+        module="fpm_universe.pipeline",
+        custom_functions=custom_functions,
+        cache_size=1,
+    )
+
+    registry.call("pure_double", {"values": values})
+    registry.call("pure_double", {"values": values + 1})
+    registry.call("pure_double", {"values": values})
+    assert len(calls) == 3
+
+
+def test_function_registry_entry_point(monkeypatch):
+    entry_point = EntryPoint(
+        name="my_flatten",
+        value="fpm_universe.data:flatten",
+        group="fpm_universe.data",
+    )
+    monkeypatch.setattr(
+        registry_module,
+        "entry_points",
+        lambda: {"fpm_universe.data": [entry_point]},
+    )
+    registry = FunctionRegistry(
+        module="fpm_universe.data", entry_point_group="fpm_universe.data"
+    )
+
+    spec = registry.get("my_flatten")
+    assert spec.function is flatten
+    assert spec.name == "my_flatten"
+    assert spec.pure
+    assert registry.call("my_flatten", {"values": [[1], [2]]}) == [1, 2]
+
+
+def test_function_registry_not_found():
+    registry = FunctionRegistry(module="fpm_universe.pipeline")
+    with pytest.raises(ValueError):
+        registry.get("unknown_function")
+
+
+def test_function_spec_of_undeclared():
+    spec = FunctionSpec.of(len)
+    assert spec.name == "len"
+    assert not spec.pure
+    assert spec.lookback is None
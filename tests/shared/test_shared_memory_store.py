@@ -0,0 +1,155 @@
+import gc
+import multiprocessing
+import os
+import pickle
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.config import Configuration, DataStore
+from fpm_universe.shared import (
+    SharedMemoryStore,
+    _namespace_token,
+    attach,
+    sweep_stale_segments,
+)
+
+
+@pytest.fixture
+def store():
+    store = SharedMemoryStore()
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def values():
+    random_state = np.random.RandomState(0)
+    return pd.DataFrame(
+        random_state.rand(10, 3),
+        index=pd.bdate_range("2022-01-03", periods=10),
+        columns=["A", "AA", "AAPL"],
+    )
+
+
+def test_shared_memory_store_frame(store, values):
+    handle = store.put(values)
+    result = pickle.loads(pickle.dumps(handle)).attach()
+
+    pd.testing.assert_frame_equal(values, result)
+    assert not result.to_numpy().flags.writeable
+    assert np.shares_memory(result.to_numpy(), handle.array.attach())
+    assert store.nbytes >= values.to_numpy().nbytes
+
+
+def test_shared_memory_store_series_and_array(store, values):
+    series = values["A"]
+    pd.testing.assert_series_equal(series, store.put(series).attach())
+
+    array = values.to_numpy()
+    np.testing.assert_array_equal(array, store.put(array).attach())
+
+
+def test_shared_memory_store_unsupported(store, values):
+    assert store.put({"A": values}) is None
+    assert store.put(pd.DataFrame({"A": [1.0], "B": ["x"]})) is None
+    assert len(store) == 0
+
+
+def test_shared_memory_store_reference_count(store, values):
+    handle = store.acquire(store.put(values))
+    store.release(handle)
+    assert len(store) == 1
+
+    store.release(handle)
+    assert len(store) == 0
+    with pytest.raises(KeyError):
+        store.acquire(handle)
+
+
+def test_shared_memory_store_worker_process(store, values):
+    handle = store.put(values)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        (result,) = pool.map(attach, [handle])
+
+    pd.testing.assert_frame_equal(values, result)
+
+
+@pytest.mark.skipif(
+    not os.path.isdir("/dev/shm") or _namespace_token() is None,
+    reason="No /dev/shm directory or process id namespace",
+)
+def test_sweep_stale_segments():
+    # Segments of a process id which does not exist, in this namespace and
+    # in another namespace sharing /dev/shm
+    path = f"/dev/shm/fpm_{_namespace_token()}_999999999_stale"
+    other_path = "/dev/shm/fpm_00000000_999999999_other"
+    for segment_path in [path, other_path]:
+        with open(segment_path, "wb") as fp:
+            fp.write(b"\0")
+
+    try:
+        SharedMemoryStore().close()
+        assert os.path.exists(path)
+
+        assert sweep_stale_segments() >= 1
+        assert not os.path.exists(path)
+        assert os.path.exists(other_path)
+    finally:
+        for segment_path in [path, other_path]:
+            if os.path.exists(segment_path):
+                os.unlink(segment_path)
+
+
+def test_shared_memory_store_garbage_collected(values):
+    store = SharedMemoryStore()
+    handle = store.put(values)
+    reference = weakref.ref(store)
+    del store
+    gc.collect()
+
+    assert reference() is None
+    with pytest.raises(FileNotFoundError):
+        handle.attach()
+
+
+def random_prices():
+    random_state = np.random.RandomState(0)
+    return pd.DataFrame(
+        random_state.rand(10, 3),
+        index=pd.bdate_range("2022-01-03", periods=10),
+        columns=["A", "AA", "AAPL"],
+    )
+
+
+def test_data_store_backend(store):
+    config = Configuration(
+        stream="""
+output_filename: "output.parquet"
+intermediate_directory: "intermediate/"
+start_datetime: "2022-01-03"
+last_datetime: "2022-01-14"
+frequency: "B"
+pipeline: []
+data:
+    prices:
+        function: random_prices
+"""
+    )
+    data_store = DataStore(
+        config=config,
+        custom_functions={"random_prices": random_prices},
+        backend=store,
+    )
+
+    prices = data_store.get("prices")
+    pd.testing.assert_frame_equal(random_prices(), prices)
+    assert not prices.to_numpy().flags.writeable
+
+    handle = data_store.handle("prices")
+    pd.testing.assert_frame_equal(random_prices(), handle.attach())
+    data_store.release_handle(handle)
+    assert len(store) == 1
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.pipeline import ranking, rolling_validity
+from fpm_universe.sweep import ranking_sweep, rolling_validity_sweep
+
+
+@pytest.fixture
+def values():
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2021-12-01", "2022-03-31", name="datetime")
+    values = pd.DataFrame(
+        np.round(random_state.rand(len(index), 8) * 5),
+        index=index,
+        columns=["A", "AA", "AAL", "AAPL", "ABC", "ABT", "ACN", "ADBE"],
+    )
+    values = values.mask(random_state.rand(*values.shape) < 0.3)
+    return values.drop(index[50:54])
+
+
+@pytest.fixture
+def universe_range():
+    return {
+        "start_datetime": "2022-01-03",
+        "last_datetime": "2022-03-31",
+        "frequency": "B",
+    }
+
+
+def test_ranking_sweep(values, universe_range):
+    threshold_pcts = [0.2, 0.5, 1.0]
+    tolerance_timeframes = [0, 3, 10]
+    result = ranking_sweep(
+        values=values,
+        threshold_pct=threshold_pcts,
+        tolerance_timeframes=tolerance_timeframes,
+        **universe_range,
+    )
+
+    assert result.index.names == ["threshold_pct", "tolerance_timeframes", "datetime"]
+    for pct in threshold_pcts:
+        for tolerance in tolerance_timeframes:
+            expected = ranking(
+                values=values,
+                threshold_pct=pct,
+                tolerance_timeframes=tolerance,
+                **universe_range,
+            )
+            pd.testing.assert_frame_equal(expected, result.loc[(pct, tolerance)])
+
+
+def test_rolling_validity_sweep(values, universe_range):
+    threshold_pcts = [0.5, 0.8]
+    rolling_windows = [1, 5, 21]
+    tolerance_timeframes = [0, 2]
+    result = rolling_validity_sweep(
+        values=values,
+        threshold_pct=threshold_pcts,
+        rolling_window=rolling_windows,
+        tolerance_timeframes=tolerance_timeframes,
+        **universe_range,
+    )
+
+    assert len(result) == 12 * len(result.loc[(0.5, 1, 0)])
+    for pct in threshold_pcts:
+        for window in rolling_windows:
+            for tolerance in tolerance_timeframes:
+                expected = rolling_validity(
+                    values=values,
+                    threshold_pct=pct,
+                    rolling_window=window,
+                    tolerance_timeframes=tolerance,
+                    **universe_range,
+                )
+                pd.testing.assert_frame_equal(
+                    expected, result.loc[(pct, window, tolerance)]
+                )
+
+
+def test_sweep_invalid_parameters(values, universe_range):
+    with pytest.raises(ValueError):
+        ranking_sweep(
+            values=values,
+            threshold_pct=[0.5, 1.5],
+            tolerance_timeframes=[0],
+            **universe_range,
+        )
+    with pytest.raises(ValueError):
+        rolling_validity_sweep(
+            values=values,
+            threshold_pct=[0.5],
+            rolling_window=[0],
+            tolerance_timeframes=[0],
+            **universe_range,
+        )
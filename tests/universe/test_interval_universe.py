@@ -0,0 +1,135 @@
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.pipeline import combine_validity, range_validity
+from fpm_universe.universe import IntervalUniverse
+
+
+@pytest.fixture
+def index():
+    return pd.bdate_range("2022-01-01", "2022-03-31", name="datetime")
+
+
+def _random_validity(index, columns, seed):
+    random_state = np.random.RandomState(seed)
+    return pd.DataFrame(
+        random_state.rand(len(index), len(columns)) < 0.7,
+        index=index,
+        columns=columns,
+    )
+
+
+@pytest.fixture
+def validity_a(index):
+    return _random_validity(index, ["A", "B", "C"], seed=0)
+
+
+@pytest.fixture
+def validity_b(index):
+    return _random_validity(index, ["B", "C", "D"], seed=1)
+
+
+def test_dense_round_trip(validity_a):
+    universe = IntervalUniverse.from_dense(validity_a)
+    assert universe.shape == validity_a.shape
+    pd.testing.assert_frame_equal(validity_a, universe.to_dense())
+
+
+def test_intervals():
+    index = pd.bdate_range("2022-01-03", periods=5)
+    universe = IntervalUniverse(
+        index=index,
+        symbols=["A", "B"],
+        codes=[1, 0, 0, 1],
+        starts=[0, 3, 0, 2],
+        stops=[1, 5, 3, 3],
+    )
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(
+            {"symbol": ["A", "B", "B"], "start": [0, 0, 2], "stop": [5, 1, 3]}
+        ),
+        universe.intervals,
+    )
+
+
+def test_intersection(validity_a, validity_b):
+    result = IntervalUniverse.from_dense(validity_a) & IntervalUniverse.from_dense(
+        validity_b
+    )
+    expected = (validity_a & validity_b).fillna(False).astype(bool)
+    pd.testing.assert_frame_equal(expected, result.to_dense()[expected.columns])
+
+
+def test_union(validity_a, validity_b):
+    result = IntervalUniverse.from_dense(validity_a) | IntervalUniverse.from_dense(
+        validity_b
+    )
+    columns = ["A", "B", "C", "D"]
+    expected = validity_a.reindex(columns=columns, fill_value=False) | (
+        validity_b.reindex(columns=columns, fill_value=False)
+    )
+    pd.testing.assert_frame_equal(expected, result.to_dense())
+
+
+def test_combine_validity(validity_a, validity_b):
+    result = combine_validity(
+        IntervalUniverse.from_dense(validity_a),
+        IntervalUniverse.from_dense(validity_b),
+    )
+    assert isinstance(result, IntervalUniverse)
+    assert result == IntervalUniverse.from_dense(validity_a).intersection(
+        IntervalUniverse.from_dense(validity_b)
+    )
+
+
+def test_serialization(validity_a):
+    universe = IntervalUniverse.from_dense(validity_a)
+    assert IntervalUniverse.from_dict(universe.to_dict()) == universe
+    with TemporaryDirectory() as tmp_directory:
+        path = os.path.join(tmp_directory, "universe.parquet")
+        universe.to_parquet(path)
+        assert IntervalUniverse.read_parquet(path) == universe
+
+
+def test_range_validity_sparse():
+    values = [
+        {"symbol": "A", "valid_start_datetime": "1999-11-18"},
+        {
+            "symbol": "ZX",
+            "valid_start_datetime": "2011-05-16",
+            "valid_last_datetime": "2018-06-14",
+        },
+    ]
+    parameters = dict(
+        values=values,
+        start_datetime="2018-01-01",
+        last_datetime="2019-01-01",
+        frequency="B",
+    )
+    result = range_validity(sparse=True, **parameters)
+    assert isinstance(result, IntervalUniverse)
+    assert len(result) == 2
+    pd.testing.assert_frame_equal(range_validity(**parameters), result.to_dense())
+
+
+def test_slice_and_concat(validity_a):
+    universe = IntervalUniverse.from_dense(validity_a)
+    index = validity_a.index
+    chunks = [
+        universe.slice(index[0], index[9]),
+        universe.slice(index[10], index[40]),
+        universe.slice(index[41], index[-1]),
+    ]
+
+    pd.testing.assert_frame_equal(validity_a.iloc[10:41], chunks[1].to_dense())
+    assert IntervalUniverse.concat(chunks) == universe
+
+
+def test_concat_overlapping(validity_a):
+    universe = IntervalUniverse.from_dense(validity_a)
+    with pytest.raises(ValueError):
+        IntervalUniverse.concat([universe, universe])
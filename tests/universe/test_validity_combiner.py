@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.pipeline import combine_validity
+from fpm_universe.universe import IntervalUniverse, ValidityCombiner
+
+
+@pytest.fixture
+def validity_a():
+    return pd.DataFrame(
+        [[True, True, False], [True, True, True], [False, True, True]],
+        index=pd.bdate_range("2022-11-01", periods=3, name="datetime"),
+        columns=["A", "B", "C"],
+    )
+
+
+@pytest.fixture
+def validity_b():
+    return pd.DataFrame(
+        [[True, np.nan, True], [False, True, True]],
+        index=pd.bdate_range("2022-11-02", periods=2, name="datetime"),
+        columns=["B", "C", "D"],
+    )
+
+
+def test_combine_validity(validity_a, validity_b):
+    original = validity_a.copy()
+    result = combine_validity(validity_a, validity_b)
+
+    expected = pd.DataFrame(
+        [[False, False, False], [False, True, False], [False, False, True]],
+        index=validity_a.index,
+        columns=validity_a.columns,
+    )
+    pd.testing.assert_frame_equal(expected, result)
+    pd.testing.assert_frame_equal(original, validity_a)
+
+
+def test_combiner_fill_value(validity_a, validity_b):
+    combiner = ValidityCombiner(fill_value=True)
+    combiner.add(validity_a)
+    combiner.add(IntervalUniverse.from_dense(validity_b.fillna(False)))
+
+    expected = pd.DataFrame(
+        [[True, True, False], [True, True, False], [False, False, True]],
+        index=validity_a.index,
+        columns=validity_a.columns,
+    )
+    pd.testing.assert_frame_equal(expected, combiner.result)
+
+
+def test_combiner_empty():
+    assert ValidityCombiner().result is None
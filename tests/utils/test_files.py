@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+from fpm_universe.utils import (
+    atomic_path,
+    prefixed_directories,
+    read_versioned_json,
+    write_json,
+)
+
+
+def test_atomic_path(tmp_path):
+    path = str(tmp_path / "data.txt")
+    with atomic_path(path) as temporary_path:
+        with open(temporary_path, "w") as fp:
+            fp.write("data")
+        assert not os.path.exists(path)
+
+    with open(path) as fp:
+        assert fp.read() == "data"
+    assert os.listdir(tmp_path) == ["data.txt"]
+
+
+def test_atomic_path_error(tmp_path):
+    path = str(tmp_path / "data.txt")
+    write_json(path, {"version": 1})
+    with pytest.raises(RuntimeError):
+        with atomic_path(path) as temporary_path:
+            os.makedirs(temporary_path)
+            raise RuntimeError()
+
+    # The previous file is kept and the temporary directory is removed
+    assert os.listdir(tmp_path) == ["data.txt"]
+    assert read_versioned_json(path, version=1, description="Data") == {"version": 1}
+
+
+def test_read_versioned_json(tmp_path):
+    path = str(tmp_path / "metadata.json")
+    with open(path, "w") as fp:
+        json.dump({"version": 2}, fp)
+
+    with pytest.raises(ValueError, match="Metadata version 2"):
+        read_versioned_json(path, version=1, description="Metadata")
+
+
+def test_prefixed_directories(tmp_path):
+    for name in ["date=2022-02", "date=2022-01", "other"]:
+        os.makedirs(tmp_path / name)
+    (tmp_path / "date=2022-03").touch()
+
+    assert prefixed_directories(str(tmp_path), "date=") == ["2022-01", "2022-02"]
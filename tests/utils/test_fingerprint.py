@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.utils import fingerprint
+
+
+@pytest.fixture
+def values():
+    return pd.DataFrame(
+        {"A": [1.0, 2.0], "B": [3.0, np.nan]},
+        index=pd.date_range("2022-01-03", periods=2),
+    )
+
+
+def test_fingerprint_equal_content(values):
+    assert fingerprint(values) == fingerprint(values.copy())
+    assert fingerprint({"a": values, "b": [1, "x"]}) == fingerprint(
+        {"b": [1, "x"], "a": values.copy()}
+    )
+
+
+def test_fingerprint_different_content(values):
+    assert fingerprint(values) != fingerprint(values + 1)
+    assert fingerprint(values) != fingerprint(values.rename(columns={"A": "C"}))
+    assert fingerprint(values) != fingerprint(values.astype("float32"))
+    assert fingerprint(values) != fingerprint(values.shift(1, freq="D"))
+    assert fingerprint(np.arange(4)) != fingerprint(np.arange(4).reshape(2, 2))
+    assert fingerprint([1]) != fingerprint((1,))
+
+
+def test_fingerprint_unsupported():
+    with pytest.raises(TypeError):
+        fingerprint(object())
+    with pytest.raises(TypeError):
+        fingerprint(np.array([object()]))
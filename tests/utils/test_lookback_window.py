@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpm_universe.pipeline import (
+    ranking,
+    rolling_correlation_rank_validity,
+    rolling_validity,
+)
+from fpm_universe.utils import slice_window
+
+
+@pytest.fixture
+def values():
+    random_state = np.random.RandomState(0)
+    index = pd.bdate_range("2021-01-01", "2022-12-31", name="datetime")
+    values = pd.DataFrame(
+        random_state.rand(len(index), 6),
+        index=index,
+        columns=["A", "B", "C", "D", "E", "F"],
+    )
+    return values.mask(random_state.rand(*values.shape) < 0.3)
+
+
+@pytest.fixture
+def parameters():
+    return {
+        "start_datetime": "2022-06-01",
+        "last_datetime": "2022-09-30",
+        "frequency": "B",
+    }
+
+
+def test_slice_window(values):
+    datetime_range = pd.date_range("2022-06-01", "2022-06-30", freq="B")
+    result = slice_window(values=values, datetime_range=datetime_range, lookback=3)
+    assert result.index[0] == pd.Timestamp("2022-05-27")
+    assert result.index[-1] == pd.Timestamp("2022-06-30")
+
+
+def test_ranking_window(values, parameters):
+    kwargs = dict(threshold_pct=0.5, tolerance_timeframes=3, **parameters)
+    pd.testing.assert_frame_equal(
+        ranking.__wrapped__(values=values, **kwargs),
+        ranking(values=values, **kwargs),
+    )
+
+
+def test_rolling_validity_window(values, parameters):
+    kwargs = dict(
+        threshold_pct=0.6, rolling_window=10, tolerance_timeframes=2, **parameters
+    )
+    pd.testing.assert_frame_equal(
+        rolling_validity.__wrapped__(values=values, **kwargs),
+        rolling_validity(values=values, **kwargs),
+    )
+
+
+def test_rolling_correlation_rank_validity_window(values, parameters):
+    kwargs = dict(rankings=values, rolling_window=5, threshold=0.5, **parameters)
+    pd.testing.assert_frame_equal(
+        rolling_correlation_rank_validity.__wrapped__(values=values, **kwargs),
+        rolling_correlation_rank_validity(values=values, **kwargs),
+    )